@@ -4,6 +4,7 @@ from datetime import datetime
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
 
 from app.api.documents.schemas import (
     DocumentIngestResponse,
@@ -49,7 +50,7 @@ async def ingest_document(
     output_path = _build_output_path(file.filename or "document.pdf")
 
     try:
-        result = extract_text_from_pdf(pdf_bytes, output_path, language=language)
+        result = await run_in_threadpool(extract_text_from_pdf, pdf_bytes, output_path, language=language)
     except OCRExtractionError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
@@ -73,7 +74,9 @@ async def generate_paper_endpoint(
     current_user: AppUser = Depends(get_current_user),
 ) -> PaperGenerationResponse:
     try:
-        generation_result = generate_paper(
+        # Generation blocks on LLM, RAG and PDF work for many seconds; keep it off the event loop
+        generation_result = await run_in_threadpool(
+            generate_paper,
             difficulty=request.difficulty.value,
             paper_format=request.paper_format.value,
             section=request.section.value if request.section else None,
@@ -5,6 +5,7 @@ from __future__ import annotations
 from typing import Optional
 
 from fastapi import APIRouter, HTTPException, Query, BackgroundTasks
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 
 from app.services.sync import (
@@ -68,7 +69,8 @@ async def sync_papers(request: SyncRequest = SyncRequest()) -> SyncResponse:
     The operation can take several minutes for many files.
     """
     try:
-        result = sync_original_papers(
+        result = await run_in_threadpool(
+            sync_original_papers,
             force_reprocess=request.force_reprocess,
             file_filter=request.file_filter,
         )
@@ -110,7 +112,7 @@ async def sync_papers(request: SyncRequest = SyncRequest()) -> SyncResponse:
 async def get_status() -> SyncStatusResponse:
     """Get current sync status and embedding statistics."""
     try:
-        status = get_sync_status()
+        status = await run_in_threadpool(get_sync_status)
         return SyncStatusResponse(
             original_papers_count=status["original_papers_count"],
             extracted_texts_count=status["extracted_texts_count"],
@@ -17,6 +17,7 @@ class Settings(BaseSettings):
     app_version: str = "0.1.0"
     app_description: str = "APIs for processing GCE English examination papers"
     cors_allow_origins: List[str] = ["*"]
+    debug: bool = False
 
     storage_root: Path = Path("storage")
     ocr_output_dir: Path = storage_root / "texts"
@@ -25,6 +26,8 @@ class Settings(BaseSettings):
     original_papers_dir: Path = storage_root / "original_papers"
     html_template_dir: Path = Path("app") / "templates"
     visual_output_dir: Path = storage_root / "visuals"
+    llm_cache_dir: Path = storage_root / "llm_cache"
+    embedding_cache_path: Path = storage_root / "embedding_cache.sqlite3"
 
     openai_api_key: Optional[str] = None
     openai_model: str = "gpt-4o-mini"
@@ -34,6 +37,8 @@ class Settings(BaseSettings):
     # Supabase configuration (REST API - no direct DB connection needed)
     supabase_url: Optional[str] = None
     supabase_key: Optional[str] = None
+    # ANN index for paper_embeddings in the setup SQL: "hnsw" (default) or "ivfflat"
+    vector_index_type: str = "hnsw"
 
     # Supabase storage configuration
     supabase_generated_papers_bucket: str = "Genrated_Papers"
@@ -43,10 +48,26 @@ class Settings(BaseSettings):
     jwt_algorithm: str = "HS256"
     jwt_access_token_expires_minutes: int = 60
 
+    # Reuse generated section text for byte-identical prompts instead of calling the LLM again.
+    # Off by default: repeat requests then return the same paper rather than a fresh one.
+    llm_response_cache: bool = False
+
+    # Hours to reuse visual-stimulus URL searches (OpenAI web search, Tavily, LLM) for the
+    # same topics before querying the paid APIs again; 0 disables the cache
+    visual_url_cache_ttl_hours: int = 24
+
+    # PDF rendering: "html" always uses the paper templates (candidate box, instructions,
+    # watermark); "reportlab" renders plain Paper 1/2 text straight through ReportLab, which
+    # is faster but omits the template furniture. Visuals and oral papers always use HTML.
+    pdf_renderer: str = "html"
+
     # Embedding configuration
     embedding_chunk_size: int = 1000
     embedding_chunk_overlap: int = 200
 
+    # Files extracted/chunked concurrently during sync (OCR and file reads are I/O-bound)
+    sync_workers: int = 4
+
     def ensure_directories(self) -> None:
         self.storage_root.mkdir(parents=True, exist_ok=True)
         self.ocr_output_dir.mkdir(parents=True, exist_ok=True)
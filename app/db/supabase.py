@@ -12,6 +12,14 @@ from supabase import create_client, Client
 from app.config.settings import settings
 
 
+# ANN index on the normalized embeddings, matching the <#> operator used by the search
+# functions. IVFFlat is the alternative (VECTOR_INDEX_TYPE=ivfflat); build it after the
+# table has data, since its list centroids are computed from existing rows
+_HNSW_INDEX_SQL = """CREATE INDEX IF NOT EXISTS paper_embeddings_embedding_hnsw_idx ON paper_embeddings
+    USING hnsw (embedding halfvec_ip_ops) WITH (m = 16, ef_construction = 64);"""
+_IVFFLAT_INDEX_SQL = """CREATE INDEX IF NOT EXISTS paper_embeddings_embedding_ivfflat_idx ON paper_embeddings
+    USING ivfflat (embedding halfvec_ip_ops) WITH (lists = 100);"""
+
 # SQL for setting up the database (run once in Supabase SQL Editor)
 SETUP_SQL = """
 -- ===========================================
@@ -32,17 +40,25 @@ CREATE TABLE IF NOT EXISTS paper_embeddings (
     source_file VARCHAR(255) NOT NULL,
     chunk_index INTEGER NOT NULL,
     metadata JSONB DEFAULT '{}',
-    embedding vector(1536),
+    embedding halfvec(1536),  -- FP16 (pgvector 0.7+): half the storage and scan bandwidth
     created_at TIMESTAMPTZ DEFAULT NOW(),
     UNIQUE(source_file, chunk_index)
 );
 
+-- Existing installs with a vector(1536) column: drop any index on embedding, then run
+--   ALTER TABLE paper_embeddings ALTER COLUMN embedding TYPE halfvec(1536)
+--       USING embedding::halfvec(1536);
+
 -- 3. Create indexes for faster queries
 CREATE INDEX IF NOT EXISTS paper_embeddings_paper_type_idx ON paper_embeddings (paper_type);
 CREATE INDEX IF NOT EXISTS paper_embeddings_section_idx ON paper_embeddings (section);
 CREATE INDEX IF NOT EXISTS paper_embeddings_source_file_idx ON paper_embeddings (source_file);
+""" + _HNSW_INDEX_SQL + """
 
 -- 4. Create similarity search function
+--    Embeddings are L2-normalized at ingest, so the negative inner product (<#>)
+--    ranks exactly like cosine distance without the per-row norm computation;
+--    the FP32 query is cast to halfvec to match the column and index
 CREATE OR REPLACE FUNCTION match_paper_embeddings(
     query_embedding vector(1536),
     match_threshold float DEFAULT 0.7,
@@ -70,17 +86,66 @@ BEGIN
         pe.section,
         pe.year,
         pe.source_file,
-        1 - (pe.embedding <=> query_embedding) as similarity
+        (pe.embedding <#> query_embedding::halfvec(1536)) * -1 as similarity
     FROM paper_embeddings pe
     WHERE 
-        (1 - (pe.embedding <=> query_embedding)) >= match_threshold
+        (pe.embedding <#> query_embedding::halfvec(1536)) <= -match_threshold
         AND (filter_paper_type IS NULL OR pe.paper_type = filter_paper_type)
         AND (filter_section IS NULL OR pe.section = filter_section)
-    ORDER BY pe.embedding <=> query_embedding
+    ORDER BY pe.embedding <#> query_embedding::halfvec(1536)
     LIMIT match_count;
 END;
 $$;
 
+-- 5. Create cascading search function (all retrieval fallbacks from one index probe)
+--    A single ANN scan collects the nearest candidates for the paper type; each row comes
+--    back once, tagged with the strictest strategy it satisfies:
+--    tier 1: meets match_threshold and the section (any section when none is given)
+--    tier 2: meets match_threshold in another section
+--    tier 3: only meets the lower fallback threshold
+CREATE OR REPLACE FUNCTION match_paper_embeddings_cascade(
+    query_embedding vector(1536),
+    match_threshold float DEFAULT 0.7,
+    fallback_threshold float DEFAULT 0.5,
+    match_count int DEFAULT 5,
+    filter_paper_type text DEFAULT NULL,
+    filter_section text DEFAULT NULL
+)
+RETURNS TABLE (
+    id uuid,
+    content text,
+    paper_type varchar(20),
+    section varchar(20),
+    year varchar(10),
+    source_file varchar(255),
+    similarity float,
+    tier int
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    WITH candidates AS (
+        SELECT pe.id, pe.content, pe.paper_type, pe.section, pe.year, pe.source_file,
+               (pe.embedding <#> query_embedding::halfvec(1536)) * -1 as similarity
+        FROM paper_embeddings pe
+        WHERE filter_paper_type IS NULL OR pe.paper_type = filter_paper_type
+        ORDER BY pe.embedding <#> query_embedding::halfvec(1536)
+        LIMIT match_count * 3
+    )
+    SELECT c.id, c.content, c.paper_type, c.section, c.year, c.source_file, c.similarity,
+           CASE
+               WHEN c.similarity >= match_threshold
+                    AND (filter_section IS NULL OR c.section = filter_section) THEN 1
+               WHEN c.similarity >= match_threshold THEN 2
+               ELSE 3
+           END as tier
+    FROM candidates c
+    WHERE c.similarity >= LEAST(match_threshold, fallback_threshold)
+    ORDER BY c.similarity DESC;
+END;
+$$;
+
 -- Done! You can now use the /sync endpoint.
 """
 
@@ -137,6 +202,8 @@ def get_supabase_client() -> Client:
 
 def get_setup_sql() -> str:
     """Return the SQL needed to set up the database."""
+    if settings.vector_index_type.lower() == "ivfflat":
+        return SETUP_SQL.replace(_HNSW_INDEX_SQL, _IVFFLAT_INDEX_SQL)
     return SETUP_SQL
 
 
@@ -223,7 +290,7 @@ def create_embeddings_table() -> None:
         logger.info("paper_embeddings table not found, attempting to create...")
     
     # Try to create table via REST SQL execution
-    if _execute_sql_via_rest(SETUP_SQL):
+    if _execute_sql_via_rest(get_setup_sql()):
         logger.info("Successfully created paper_embeddings table via REST API!")
         # Verify it worked
         try:
@@ -318,6 +385,19 @@ def store_embeddings(
         raise SupabaseError(f"Failed to store embeddings: {exc}") from exc
 
 
+def _row_to_record(row: Dict[str, Any]) -> EmbeddingRecord:
+    """Build an EmbeddingRecord from a search RPC result row."""
+    return EmbeddingRecord(
+        id=row["id"],
+        content=row["content"],
+        paper_type=row["paper_type"],
+        section=row.get("section"),
+        year=row.get("year"),
+        source_file=row["source_file"],
+        similarity=row.get("similarity", 0.0),
+    )
+
+
 def search_similar_chunks(
     query_embedding: List[float],
     *,
@@ -348,17 +428,7 @@ def search_similar_chunks(
         
         logger.debug(f"RPC returned {len(result.data or [])} results")
         
-        records = []
-        for row in result.data or []:
-            records.append(EmbeddingRecord(
-                id=row["id"],
-                content=row["content"],
-                paper_type=row["paper_type"],
-                section=row.get("section"),
-                year=row.get("year"),
-                source_file=row["source_file"],
-                similarity=row.get("similarity", 0.0),
-            ))
+        records = [_row_to_record(row) for row in result.data or []]
         
         if records:
             logger.info(f"Found {len(records)} similar chunks (best similarity: {records[0].similarity:.2f})")
@@ -374,6 +444,56 @@ def search_similar_chunks(
         raise SupabaseError(f"Failed to search embeddings: {exc}") from exc
 
 
+def search_similar_chunks_cascade(
+    query_embedding: List[float],
+    *,
+    paper_type: Optional[str] = None,
+    section: Optional[str] = None,
+    limit: int = 5,
+    similarity_threshold: float = 0.7,
+    fallback_threshold: float = 0.5,
+) -> Optional[Dict[int, List[EmbeddingRecord]]]:
+    """Run the exact, broadened and lower-threshold searches in a single RPC.
+
+    Returns each strategy's results keyed 1 (exact section), 2 (whole paper type,
+    only when a section is given) and 3 (lower threshold), each ordered by
+    similarity and capped at ``limit``; or None if the
+    match_paper_embeddings_cascade function is not installed yet.
+    """
+    client = get_supabase_client()
+
+    try:
+        result = client.rpc(
+            "match_paper_embeddings_cascade",
+            {
+                "query_embedding": query_embedding,
+                "match_threshold": similarity_threshold,
+                "fallback_threshold": fallback_threshold,
+                "match_count": limit,
+                "filter_paper_type": paper_type,
+                "filter_section": section,
+            }
+        ).execute()
+    except Exception as exc:
+        error_msg = str(exc).lower()
+        if "function" in error_msg and ("does not exist" in error_msg or "could not find" in error_msg):
+            logger.warning("match_paper_embeddings_cascade function not found, falling back to per-strategy search")
+            return None
+        logger.error("Cascade search failed: {}", exc)
+        raise SupabaseError(f"Failed to search embeddings: {exc}") from exc
+
+    # Rows arrive once each, tagged with the strictest strategy they satisfy; a row
+    # that qualifies for a stricter strategy also qualifies for every looser one
+    rows = result.data or []
+    logger.debug("Cascade RPC returned {} rows", len(rows))
+    records = [(row.get("tier", 1), _row_to_record(row)) for row in rows]
+    return {
+        1: [r for tier, r in records if tier == 1][:limit],
+        2: [r for tier, r in records if tier <= 2][:limit] if section else [],
+        3: [r for _, r in records][:limit],
+    }
+
+
 def get_embedding_stats() -> Dict[str, Any]:
     """Get statistics about stored embeddings via REST API."""
     client = get_supabase_client()
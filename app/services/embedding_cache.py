@@ -0,0 +1,94 @@
+"""Persistent cache of chunk embeddings keyed by content hash.
+
+Re-syncing unchanged papers produces the same chunk texts, so their vectors are
+looked up locally instead of being paid for again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from contextlib import closing
+from typing import Dict, List, Sequence
+
+import numpy as np
+from loguru import logger
+
+from app.config.settings import settings
+from app.services.embeddings import EMBEDDING_BATCH_SIZE, generate_embeddings
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    content_sha256 BLOB NOT NULL,
+    model TEXT NOT NULL,
+    dim INTEGER NOT NULL,
+    vector BLOB NOT NULL,
+    PRIMARY KEY (content_sha256, model)
+)
+"""
+
+# Stay well under SQLite's bound-parameter limit
+_LOOKUP_BATCH = 500
+
+
+def _connect() -> sqlite3.Connection:
+    path = settings.embedding_cache_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute(_SCHEMA)
+    return conn
+
+
+def _content_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+def generate_embeddings_cached(texts: Sequence[str]) -> List[List[float]]:
+    """Embed ``texts`` like ``generate_embeddings``, reusing vectors cached on disk.
+
+    Only texts without a cached vector for the configured model are sent to the API;
+    vectors are stored as float32, the precision the API returns.
+    """
+    if not texts:
+        return []
+
+    model = settings.openai_embedding_model
+    hashes = [_content_hash(t) for t in texts]
+    vectors: Dict[bytes, List[float]] = {}
+
+    # closing() so the connection is released even when embedding fails; ``conn`` commits
+    with closing(_connect()) as conn, conn:
+        unique = list(dict.fromkeys(hashes))
+        for i in range(0, len(unique), _LOOKUP_BATCH):
+            batch = unique[i:i + _LOOKUP_BATCH]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT content_sha256, vector FROM embedding_cache "
+                f"WHERE model = ? AND content_sha256 IN ({placeholders})",
+                (model, *batch),
+            )
+            for digest, blob in rows:
+                vectors[digest] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+        # Embed each missing text once, even if it appears several times
+        missing = {h: t for h, t in zip(hashes, texts) if h not in vectors}
+        logger.info("Embedding cache: {} hits, {} misses", len(unique) - len(missing), len(missing))
+        # Store each API batch as it returns, so a failure later on does not discard
+        # (and a retry does not pay again for) the batches already embedded
+        missing_items = list(missing.items())
+        for i in range(0, len(missing_items), EMBEDDING_BATCH_SIZE):
+            batch_items = missing_items[i:i + EMBEDDING_BATCH_SIZE]
+            fresh = generate_embeddings([t for _, t in batch_items])
+            conn.executemany(
+                "INSERT OR REPLACE INTO embedding_cache (content_sha256, model, dim, vector) "
+                "VALUES (?, ?, ?, ?)",
+                [
+                    (digest, model, len(vec), np.asarray(vec, dtype=np.float32).tobytes())
+                    for (digest, _), vec in zip(batch_items, fresh)
+                ],
+            )
+            conn.commit()
+            vectors.update((digest, vec) for (digest, _), vec in zip(batch_items, fresh))
+
+    return [vectors[h] for h in hashes]
@@ -3,8 +3,10 @@
 from __future__ import annotations
 
 import re
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple
 
+import numpy as np
 from loguru import logger
 from openai import OpenAI
 
@@ -12,6 +14,10 @@ from app.config.settings import settings
 from app.db.supabase import PaperChunk
 
 
+# Texts per embeddings request (OpenAI allows up to 2048)
+EMBEDDING_BATCH_SIZE = 100
+
+
 class EmbeddingError(RuntimeError):
     """Raised when embedding operations fail."""
 
@@ -263,15 +269,15 @@ def create_paper_chunks(
 def generate_embeddings(texts: List[str]) -> List[List[float]]:
     """Generate embeddings for a list of texts using OpenAI.
     
-    Uses text-embedding-3-small model.
+    Uses text-embedding-3-small model. Vectors are L2-normalized so that the
+    inner product used by the search functions equals cosine similarity.
     """
     if not texts:
         return []
     
     client = get_openai_client()
     
-    # OpenAI allows up to 2048 texts per request
-    batch_size = 100
+    batch_size = EMBEDDING_BATCH_SIZE
     all_embeddings: List[List[float]] = []
     
     for i in range(0, len(texts), batch_size):
@@ -283,11 +289,13 @@ def generate_embeddings(texts: List[str]) -> List[List[float]]:
                 input=batch,
             )
             
-            # Extract embeddings in order
-            batch_embeddings = [item.embedding for item in response.data]
-            all_embeddings.extend(batch_embeddings)
+            # Extract embeddings in order, unit-normalized
+            vectors = np.asarray([item.embedding for item in response.data], dtype=np.float64)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            all_embeddings.extend((vectors / norms).tolist())
             
-            logger.debug(f"Generated embeddings for batch {i // batch_size + 1}")
+            logger.debug("Generated embeddings for batch {}", i // batch_size + 1)
             
         except Exception as exc:
             raise EmbeddingError(f"Failed to generate embeddings: {exc}") from exc
@@ -295,10 +303,19 @@ def generate_embeddings(texts: List[str]) -> List[List[float]]:
     return all_embeddings
 
 
-def generate_query_embedding(query: str) -> List[float]:
-    """Generate embedding for a single query string."""
+@lru_cache(maxsize=256)
+def _cached_query_embedding(query: str) -> Tuple[float, ...]:
     embeddings = generate_embeddings([query])
     if not embeddings:
         raise EmbeddingError("Failed to generate query embedding")
-    return embeddings[0]
+    return tuple(embeddings[0])
+
+
+def generate_query_embedding(query: str) -> List[float]:
+    """Generate embedding for a single query string.
+
+    RAG queries are built deterministically from the generation parameters,
+    so embeddings are memoized per query string; failures are not cached.
+    """
+    return list(_cached_query_embedding(query))
 
@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 import re
 import html as _html
+import threading
 from typing import Optional
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape, TemplateNotFound
@@ -12,9 +15,16 @@ from xhtml2pdf import pisa
 from app.config.settings import settings
 
 
+@lru_cache(maxsize=1)
 def _env() -> Environment:
+    """Shared Jinja environment: templates are compiled once and kept (reloaded on change only in debug)."""
     loader = FileSystemLoader(str(settings.html_template_dir))
-    return Environment(loader=loader, autoescape=select_autoescape(["html", "xml"]))
+    return Environment(
+        loader=loader,
+        autoescape=select_autoescape(["html", "xml"]),
+        cache_size=-1,
+        auto_reload=settings.debug,
+    )
 
 
 def _build_p1_section_a_html(content: str) -> Optional[str]:
@@ -147,6 +157,20 @@ def _enhance_section_headers(content: str) -> str:
     return enhanced
 
 
+@lru_cache(maxsize=1024)
+def _block_to_html(block: str) -> str:
+    return _enhance_section_headers(_inline_markdown_to_html(block, escape_html=True))
+
+
+def _content_to_html(content: str) -> str:
+    """Convert paper text to HTML one blank-line-separated block at a time.
+
+    Both conversion steps are line-local, so the result matches converting the whole
+    text at once; repeated blocks (headers, instructions) come from the cache.
+    """
+    return "<br/><br/>".join(_block_to_html(block) for block in content.split("\n\n"))
+
+
 def _add_section_styles() -> str:
     """Return additional CSS for section formatting."""
     return """
@@ -280,15 +304,12 @@ def render_html_template(
                     before_visual = '\n'.join(rest_lines[:section_b_header_idx + 1])
                     after_visual = '\n'.join(rest_lines[section_b_header_idx + 1:])
                     
-                    before_processed = _inline_markdown_to_html(before_visual, escape_html=True)
-                    before_enhanced = _enhance_section_headers(before_processed)
-                    after_processed = _inline_markdown_to_html(after_visual, escape_html=True)
-                    after_enhanced = _enhance_section_headers(after_processed)
+                    before_enhanced = _content_to_html(before_visual)
+                    after_enhanced = _content_to_html(after_visual)
                     
                     rest_html = f"<div>{before_enhanced}</div>{visual_block_html}<div>{after_enhanced}</div>"
                 else:
-                    rest_processed = _inline_markdown_to_html(rest_content, escape_html=True)
-                    rest_enhanced = _enhance_section_headers(rest_processed)
+                    rest_enhanced = _content_to_html(rest_content)
                     rest_html = f"<div>{rest_enhanced}</div>"
                 
                 content_html = f"{_add_section_styles()}{section_a_rendered}{rest_html}"
@@ -352,11 +373,8 @@ def render_html_template(
                 logger.info(f"Found '{target_header}' | header: '{header_line[:60]}' | split_point={split_point} | before ends with: '{before_content[-50:]}'")
                 
                 # Process each part separately
-                before_processed = _inline_markdown_to_html(before_content, escape_html=True)
-                before_enhanced = _enhance_section_headers(before_processed)
-                
-                after_processed = _inline_markdown_to_html(after_content, escape_html=True)
-                after_enhanced = _enhance_section_headers(after_processed)
+                before_enhanced = _content_to_html(before_content)
+                after_enhanced = _content_to_html(after_content)
                 
                 content_html = (
                     f"{_add_section_styles()}"
@@ -391,11 +409,8 @@ def render_html_template(
                     before_lines = lines[:idx + 1]
                     after_lines = lines[idx + 1:]
                     
-                    before_processed = _inline_markdown_to_html("\n".join(before_lines), escape_html=True)
-                    before_enhanced = _enhance_section_headers(before_processed)
-                    
-                    after_processed = _inline_markdown_to_html("\n".join(after_lines), escape_html=True)
-                    after_enhanced = _enhance_section_headers(after_processed)
+                    before_enhanced = _content_to_html("\n".join(before_lines))
+                    after_enhanced = _content_to_html("\n".join(after_lines))
                     
                     content_html = (
                         f"{_add_section_styles()}"
@@ -407,13 +422,11 @@ def render_html_template(
                 else:
                     # Last resort: put visual at top
                     logger.warning(f"Could not find '{target_header}' heading at all. Content preview: {content[:300]}")
-                    processed_content = _inline_markdown_to_html(content, escape_html=True)
-                    enhanced_content = _enhance_section_headers(processed_content)
+                    enhanced_content = _content_to_html(content)
                     content_html = f"{_add_section_styles()}{visual_block}<div>{enhanced_content}</div>"
         else:
             # No visual to inject - just process normally
-            processed_content = _inline_markdown_to_html(content, escape_html=True)
-            enhanced_content = _enhance_section_headers(processed_content)
+            enhanced_content = _content_to_html(content)
             content_html = f"{_add_section_styles()}<div>{enhanced_content}</div>"
     output_html.parent.mkdir(parents=True, exist_ok=True)
     with output_html.open("w", encoding="utf-8") as f:
@@ -434,6 +447,31 @@ def render_html_template(
     return output_html
 
 
+# Each Playwright worker keeps one Chromium and one recycled page (tab). Playwright's sync
+# objects are bound to the thread that created them, so the page pool is one page per
+# worker thread (which also keeps the sync API away from FastAPI's running event loop).
+_PDF_PAGE_WORKERS = 2
+_PLAYWRIGHT_EXECUTOR = ThreadPoolExecutor(max_workers=_PDF_PAGE_WORKERS, thread_name_prefix="playwright")
+_playwright_local = threading.local()
+
+
+def _get_page():
+    """Return this worker's reusable page, (re)launching Chromium if needed. Playwright threads only."""
+    local = _playwright_local
+    page = getattr(local, "page", None)
+    if page is not None and not page.is_closed() and local.browser.is_connected():
+        return page
+    from playwright.sync_api import sync_playwright  # type: ignore
+
+    if getattr(local, "playwright", None) is None:
+        local.playwright = sync_playwright().start()
+    browser = getattr(local, "browser", None)
+    if browser is None or not browser.is_connected():
+        local.browser = local.playwright.chromium.launch(headless=True)
+    local.page = local.browser.new_page()
+    return local.page
+
+
 def html_to_pdf(html_path: Path, pdf_path: Path) -> Path:
     """Convert HTML to PDF with best-effort fidelity.
     Try Playwright (Chromium) -> WeasyPrint -> xhtml2pdf."""
@@ -441,14 +479,9 @@ def html_to_pdf(html_path: Path, pdf_path: Path) -> Path:
     try:
         print("Using Playwright")
         # Highest fidelity: Playwright with headless Chromium.
-        # Important: run sync API in a separate thread to avoid FastAPI's running event loop.
-        from concurrent.futures import ThreadPoolExecutor
-        from playwright.sync_api import sync_playwright  # type: ignore
-
         def _run_playwright() -> None:
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page()
+            page = _get_page()
+            try:
                 # Load via file:// URL for maximum compatibility with assets
                 file_url = html_path.resolve().as_uri()
                 page.goto(file_url, wait_until="load")
@@ -460,11 +493,19 @@ def html_to_pdf(html_path: Path, pdf_path: Path) -> Path:
                     margin={"top": "20mm", "bottom": "20mm", "left": "20mm", "right": "20mm"},
                     prefer_css_page_size=True,
                 )
-                browser.close()
-
-        with ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(_run_playwright)
-            future.result()
+            finally:
+                # Recycle the tab for the next job; if it cannot be blanked, forget it and let
+                # _get_page open a fresh one. Recycling never decides whether the render succeeded.
+                try:
+                    page.goto("about:blank")
+                except Exception:
+                    _playwright_local.page = None
+                    try:
+                        page.close()
+                    except Exception:
+                        pass
+
+        _PLAYWRIGHT_EXECUTOR.submit(_run_playwright).result()
         return pdf_path
     except Exception as e:
         print("Playwright failed", repr(e))
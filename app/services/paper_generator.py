@@ -2,18 +2,30 @@
 
 from __future__ import annotations
 
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
+from io import BytesIO, StringIO
 from pathlib import Path
 from textwrap import dedent
-from typing import Dict, Iterable, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import hashlib
+import json
+import multiprocessing
 import os
+import re
+import threading
 
+import httpx
 from loguru import logger
 from openai import OpenAI
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, ListFlowable, ListItem, Table, TableStyle, Flowable
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 
@@ -24,6 +36,20 @@ from app.services.html_renderer import html_to_pdf, render_html_template
 from app.services.rag import get_rag_enhanced_prompt
 from app.services.answer_key import generate_answer_key, save_answer_key_json, render_answer_key_pdf, AnswerKeyError
 
+# Shape checking validates every attribute assignment during doc.build; keep it for debugging only
+rl_config.shapeChecking = 1 if settings.debug else 0
+
+# Concurrent chat completions allowed across sections and requests
+_LLM_SLOTS = threading.BoundedSemaphore(5)
+
+# Shared pool for storage uploads so they overlap answer-key generation
+_UPLOAD_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="paper-upload")
+
+# Translation table that strips everything except alphanumerics, "-" and "_" from file/storage names
+_SAFE_NAME_TABLE = str.maketrans(
+    "", "", "".join(ch for ch in map(chr, range(256)) if not (ch.isalnum() or ch in "-_"))
+)
+
 
 class PaperGenerationError(RuntimeError):
     """Raised when synthetic paper generation fails."""
@@ -70,6 +96,18 @@ SECTION_TEMPERATURE = {
     "oral_conversation": 0.4,   # Conversation - needs varied themes
 }
 
+# Section-specific output caps; sections not listed keep LLM_COMPLETION_PARAMS["max_tokens"]
+SECTION_MAX_TOKENS = {
+    # Paper 1
+    "paper_1_section_a": 1500,  # Editing - 12 lines plus error key
+    "paper_1_section_b": 1500,  # Situational - stimulus and task
+    "paper_1_section_c": 1200,  # Continuous - four prompts
+    # Paper 2
+    "paper_2_section_a": 1500,  # Visual text - short questions
+    "paper_2_section_b": 3000,  # Comprehension - passage and questions
+    "paper_2_section_c": 2500,  # Summary - passage and questions
+}
+
 # Content validation rules
 VALIDATION_RULES = {
     "paper_1_section_a": {
@@ -113,6 +151,50 @@ def _get_section_temperature(paper_format: str, section: Optional[str]) -> float
     return SECTION_TEMPERATURE.get(key, LLM_COMPLETION_PARAMS["temperature"])
 
 
+def _get_section_max_tokens(paper_format: str, section: Optional[str]) -> int:
+    """Get the output token cap for a section."""
+    if section:
+        key = f"{paper_format}_{section}"
+    else:
+        key = paper_format
+    return SECTION_MAX_TOKENS.get(key, LLM_COMPLETION_PARAMS["max_tokens"])
+
+
+@lru_cache(maxsize=64)
+def _completion_params(temperature: float, max_tokens: int) -> Mapping[str, object]:
+    """Read-only completion params for a given (rounded) temperature and cap, built once per pair."""
+    return MappingProxyType({**LLM_COMPLETION_PARAMS, "temperature": temperature, "max_tokens": max_tokens})
+
+
+def _response_cache_path(prompt: str) -> Path:
+    """On-disk cache entry for a fully built section prompt.
+
+    The prompt already folds in format, section, difficulty, topics, instructions,
+    reference excerpt, visual description and RAG context, so it is the cache key.
+    """
+    key = hashlib.sha256(f"{settings.openai_model}\n{prompt}".encode("utf-8")).hexdigest()
+    return settings.llm_cache_dir / f"{key}.txt"
+
+
+# Answer-key markers and line formats, compiled once for the extraction helpers below
+_ERROR_KEY_RE = re.compile(r'===ERROR_KEY_START===\s*(.*?)\s*===ERROR_KEY_END===', re.DOTALL)
+_ERROR_LINE_RE = re.compile(
+    r'Line\s+(\d+):\s*["\']?([^"\']+)["\']?\s+should\s+be\s+["\']?([^"\']+)["\']?\s*\(([^)]+)\)',
+    re.IGNORECASE,
+)
+_CORRECT_LINES_RE = re.compile(r'Correct\s+lines?:\s*\[?([^\]]+)\]?', re.IGNORECASE)
+_DIGITS_RE = re.compile(r'\d+')
+_FLOWCHART_KEY_RE = re.compile(
+    r'===FLOWCHART_ANSWER_KEY_START===\s*(.*?)\s*===FLOWCHART_ANSWER_KEY_END===', re.DOTALL
+)
+_FLOWCHART_PARA_RE = re.compile(r'Paragraph\s+(\d+):\s*([A-F])\s*(?:\(reason:\s*([^)]+)\))?', re.IGNORECASE)
+_DISTRACTORS_RE = re.compile(r'Distractors?:\s*([A-F,\s]+)', re.IGNORECASE)
+_OPTION_LETTER_RE = re.compile(r'[A-F]')
+_FLOWCHART_ANSWER_RE = re.compile(r'(│\s*)?Paragraph\s+(\d+):\s*([A-F])(?:\s*│|\s*$|\s*\n)', re.IGNORECASE)
+# IGNORECASE already covers "Answer Key", so no alternation is needed
+_STRAY_ANSWER_KEY_RE = re.compile(r'\n*ANSWER KEY.*?(?=\n\n[A-Z]|\n\n\*\*|\Z)', re.DOTALL | re.IGNORECASE)
+
+
 def _extract_section_a_error_key(content: str) -> Tuple[str, Optional[Dict[str, any]]]:
     """
     Extract the error key from Section A content and return cleaned content + error data.
@@ -127,25 +209,21 @@ def _extract_section_a_error_key(content: str) -> Tuple[str, Optional[Dict[str,
     Returns:
         Tuple of (cleaned_content, error_key_dict or None)
     """
-    import re
-
-    error_key_pattern = r'===ERROR_KEY_START===\s*(.*?)\s*===ERROR_KEY_END==='
-    match = re.search(error_key_pattern, content, re.DOTALL)
+    match = _ERROR_KEY_RE.search(content)
 
     if not match:
         logger.warning("No error key found in Section A content")
         return content, None
 
     error_key_text = match.group(1).strip()
-    cleaned_content = re.sub(error_key_pattern, '', content, flags=re.DOTALL).strip()
+    cleaned_content = _ERROR_KEY_RE.sub('', content).strip()
 
     # Parse the error key
     errors = []
     correct_lines = []
 
     # Parse error lines: Line X: "incorrect_word" should be "correct_word" (error_type)
-    error_line_pattern = r'Line\s+(\d+):\s*["\']?([^"\']+)["\']?\s+should\s+be\s+["\']?([^"\']+)["\']?\s*\(([^)]+)\)'
-    for err_match in re.finditer(error_line_pattern, error_key_text, re.IGNORECASE):
+    for err_match in _ERROR_LINE_RE.finditer(error_key_text):
         errors.append({
             "line": int(err_match.group(1)),
             "error": err_match.group(2).strip(),
@@ -154,11 +232,10 @@ def _extract_section_a_error_key(content: str) -> Tuple[str, Optional[Dict[str,
         })
 
     # Parse correct lines: Correct lines: [1, 5, 12] or Correct lines: 1, 5, 12
-    correct_pattern = r'Correct\s+lines?:\s*\[?([^\]]+)\]?'
-    correct_match = re.search(correct_pattern, error_key_text, re.IGNORECASE)
+    correct_match = _CORRECT_LINES_RE.search(error_key_text)
     if correct_match:
         correct_str = correct_match.group(1)
-        correct_lines = [int(n.strip()) for n in re.findall(r'\d+', correct_str)]
+        correct_lines = [int(n.strip()) for n in _DIGITS_RE.findall(correct_str)]
 
     error_key_data = {
         "errors": errors,
@@ -185,35 +262,30 @@ def _extract_flowchart_answer_key(content: str) -> Tuple[str, Optional[Dict[str,
     Returns:
         Tuple of (cleaned_content, flowchart_answer_dict or None)
     """
-    import re
-
-    answer_key_pattern = r'===FLOWCHART_ANSWER_KEY_START===\s*(.*?)\s*===FLOWCHART_ANSWER_KEY_END==='
-    match = re.search(answer_key_pattern, content, re.DOTALL)
+    match = _FLOWCHART_KEY_RE.search(content)
 
     flowchart_data = None
 
     if match:
         answer_key_text = match.group(1).strip()
-        content = re.sub(answer_key_pattern, '', content, flags=re.DOTALL).strip()
+        content = _FLOWCHART_KEY_RE.sub('', content).strip()
 
         # Parse the answer key
         answers = {}
         distractors = []
 
         # Parse paragraph answers: Paragraph X: Y (reason: ...)
-        para_pattern = r'Paragraph\s+(\d+):\s*([A-F])\s*(?:\(reason:\s*([^)]+)\))?'
-        for para_match in re.finditer(para_pattern, answer_key_text, re.IGNORECASE):
+        for para_match in _FLOWCHART_PARA_RE.finditer(answer_key_text):
             para_num = int(para_match.group(1))
             answer = para_match.group(2).upper()
             reason = para_match.group(3).strip() if para_match.group(3) else ""
             answers[f"paragraph_{para_num}"] = {"answer": answer, "reason": reason}
 
         # Parse distractors: Distractors: B, E
-        distractor_pattern = r'Distractors?:\s*([A-F,\s]+)'
-        distractor_match = re.search(distractor_pattern, answer_key_text, re.IGNORECASE)
+        distractor_match = _DISTRACTORS_RE.search(answer_key_text)
         if distractor_match:
             distractor_str = distractor_match.group(1)
-            distractors = [d.strip().upper() for d in re.findall(r'[A-F]', distractor_str)]
+            distractors = [d.strip().upper() for d in _OPTION_LETTER_RE.findall(distractor_str)]
 
         flowchart_data = {
             "answers": answers,
@@ -235,7 +307,6 @@ def _clean_flowchart_answers(content: str) -> str:
     Remove any flowchart answers that appear in the student content.
     Replace "Paragraph X: A" with "Paragraph X: [____]"
     """
-    import re
 
     # Pattern to match flowchart answers like "Paragraph 2: A" or "Paragraph 3: C"
     # but NOT lines that already have blanks like "Paragraph 2: [____]"
@@ -246,10 +317,6 @@ def _clean_flowchart_answers(content: str) -> str:
         para_num = match.group(2)
         return f"{prefix}Paragraph {para_num}: [____]"
 
-    # Match "Paragraph X: [single letter A-F]" that's not followed by more text
-    # This catches both plain text and box drawing formats
-    pattern = r'(│\s*)?Paragraph\s+(\d+):\s*([A-F])(?:\s*│|\s*$|\s*\n)'
-
     def full_replace(match):
         prefix = match.group(1) if match.group(1) else ""
         para_num = match.group(2)
@@ -258,11 +325,12 @@ def _clean_flowchart_answers(content: str) -> str:
             return f"{prefix}Paragraph {para_num}: [____]                     {suffix}\n"
         return f"{prefix}Paragraph {para_num}: [____]\n"
 
-    content = re.sub(pattern, full_replace, content, flags=re.IGNORECASE)
+    # Match "Paragraph X: [single letter A-F]" that's not followed by more text
+    # This catches both plain text and box drawing formats
+    content = _FLOWCHART_ANSWER_RE.sub(full_replace, content)
 
     # Also remove any "ANSWER KEY" sections that might have slipped through without markers
-    answer_key_section_pattern = r'\n*(?:ANSWER KEY|Answer Key).*?(?=\n\n[A-Z]|\n\n\*\*|\Z)'
-    content = re.sub(answer_key_section_pattern, '', content, flags=re.DOTALL | re.IGNORECASE)
+    content = _STRAY_ANSWER_KEY_RE.sub('', content)
 
     return content
 
@@ -369,746 +437,804 @@ def _build_prompt(
     additional_instructions: Optional[str],
 ) -> str:
     structure_guidance = _official_structure_guidance(paper_format, section)
-
     friendly_format = paper_format.replace("_", " ").title()
-    section_fragment = ""
+
+    parts: List[str] = [
+        "Generate a new GCE O-Level English examination paper.\n"
+        "CRITICAL: All content must be written EXCLUSIVELY in English. Do not use any other language.\n"
+        "All questions, instructions, passages, and prompts must be in English only.\n",
+        f"Target difficulty: {difficulty}.\n",
+        f"Paper format: {friendly_format}.",
+    ]
     if section:
-        section_fragment = f"\nTarget section: {section.replace('_', ' ').title()}."
+        parts.append(f"\nTarget section: {section.replace('_', ' ').title()}.")
+    parts.append(f"\n{structure_guidance}\n")
+    parts.append(
+        "Generate ONLY the requested section if a section is specified; do NOT include other sections.\n"
+        "DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, INSERT, etc.). "
+        "Generate ONLY the section content itself, starting with the section heading (e.g., 'Section B [30 marks]').\n"
+        "Provide clearly separated sections with instructions and marking allocations "
+        "when appropriate. Use numbered questions and realistic, context-rich prompts.\n"
+        "Ensure the paper is coherent, internally consistent, and suitable for classroom use.\n"
+        "Avoid placeholders such as [Date], [Time], [Location]. If details are unknown, omit them rather than using brackets."
+    )
 
-    topic_section = ""
     if topics:
         topics_clean = ", ".join(t.strip() for t in topics if t and t.strip())
         if topics_clean:
-            topic_section = f"\nFocus topics: {topics_clean}"
+            parts.append(f"\nFocus topics: {topics_clean}")
 
-    instructions_section = ""
     if additional_instructions:
-        instructions_section = f"\nAdditional guidance: {additional_instructions.strip()}"
+        parts.append(f"\nAdditional guidance: {additional_instructions.strip()}")
+    parts.append("\n")
 
     reference_excerpt = _load_reference_excerpt(paper_format)
-    reference_block = ""
     if reference_excerpt:
-        reference_block = (
+        parts.append(
             "\nUse the following short excerpt as a reference for tone and structure (do not copy):\n"
             f"{reference_excerpt}\n"
         )
 
-    prompt = (
-        "Generate a new GCE O-Level English examination paper.\n"
-        "CRITICAL: All content must be written EXCLUSIVELY in English. Do not use any other language.\n"
-        "All questions, instructions, passages, and prompts must be in English only.\n"
-        f"Target difficulty: {difficulty}.\n"
-        f"Paper format: {friendly_format}.{section_fragment}\n"
-        f"{structure_guidance}\n"
-        "Generate ONLY the requested section if a section is specified; do NOT include other sections.\n"
-        "DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, INSERT, etc.). "
-        "Generate ONLY the section content itself, starting with the section heading (e.g., 'Section B [30 marks]').\n"
-        "Provide clearly separated sections with instructions and marking allocations "
-        "when appropriate. Use numbered questions and realistic, context-rich prompts.\n"
-        "Ensure the paper is coherent, internally consistent, and suitable for classroom use.\n"
-        "Avoid placeholders such as [Date], [Time], [Location]. If details are unknown, omit them rather than using brackets."
-        f"{topic_section}{instructions_section}\n"
-        f"{reference_block}"
+    parts.append(
         "Describe any required visual stimulus in words; do not embed actual images or external links.\n"
         "Return only the paper content without extra commentary."
     )
-    return prompt
+    return "".join(parts)
+
+
+# Official structure guidance per paper/section, dedented and trimmed once at import
+_BASE_GUIDANCE: Dict[str, Dict[Optional[str], str]] = {
+    "paper_1": {
+        None: dedent(
+            """\
+            Follow the official Paper 1 structure and marking:
+            - Section A [10 marks] (Editing): Provide a single 12-line passage. The FIRST and LAST lines are correct. Exactly EIGHT of the remaining lines (out of Lines 2–11) contain ONE grammatical error each. Exactly TWO additional lines contain NO error; place them unpredictably. Output each line prefixed by its line number (1–12). After the passage, include an “Answer Spaces” list with 12 numbered blanks for student corrections. Do not supply answers.
+            - Section B [30 marks] (Situational Writing): Create ONE situational task (letter, email, report, or speech) based on a web-page style visual stimulus. Describe the visual stimulus textually (headings, callouts, short blurbs); include purpose, audience, and context. Indicate 3–5 key points the student must address. Advise 250–350 words.
+            - Section C [30 marks] (Continuous Writing): Provide FOUR prompts total, covering required genres: Narrative (always), and three of {Descriptive, Expository, Argumentative, Reflective}. Instruct students to choose ONE and advise 350–500 words.
+            """
+        ),
+        "section_a": dedent(
+            """\
+            Generate Paper 1 Section A [10 marks] (Editing), SINGLE SECTION ONLY.
+
+            *** YOU MUST CREATE EXACTLY 8 GRAMMATICALLY WRONG SENTENCES ***
+
+            FIXED ERROR PLACEMENT - FOLLOW THIS EXACTLY:
+            - Line 1: CORRECT (no error)
+            - Line 2: MUST HAVE ERROR
+            - Line 3: MUST HAVE ERROR  
+            - Line 4: CORRECT (no error)
+            - Line 5: MUST HAVE ERROR
+            - Line 6: MUST HAVE ERROR
+            - Line 7: MUST HAVE ERROR
+            - Line 8: CORRECT (no error)
+            - Line 9: MUST HAVE ERROR
+            - Line 10: MUST HAVE ERROR
+            - Line 11: MUST HAVE ERROR
+            - Line 12: CORRECT (no error)
+
+            Total: 8 error lines (2,3,5,6,7,9,10,11) + 4 correct lines (1,4,8,12)
+
+            ---
+
+            OUTPUT FORMAT:
+
+            **Section A [10 marks]**
+
+            The following passage contains some errors. Each of the 12 lines may contain one error. If there is an error, write the correction in the space provided. If the line is correct, put a tick (✓).
+
+            1. [CORRECT sentence - no errors]
+            2. [Sentence with ONE clear grammatical error]
+            3. [Sentence with ONE clear grammatical error]
+            4. [CORRECT sentence - no errors]
+            5. [Sentence with ONE clear grammatical error]
+            6. [Sentence with ONE clear grammatical error]
+            7. [Sentence with ONE clear grammatical error]
+            8. [CORRECT sentence - no errors]
+            9. [Sentence with ONE clear grammatical error]
+            10. [Sentence with ONE clear grammatical error]
+            11. [Sentence with ONE clear grammatical error]
+            12. [CORRECT sentence - no errors]
+
+            ===ERROR_KEY_START===
+            Line 2: "[wrong]" should be "[correct]" (error type)
+            Line 3: "[wrong]" should be "[correct]" (error type)
+            Line 5: "[wrong]" should be "[correct]" (error type)
+            Line 6: "[wrong]" should be "[correct]" (error type)
+            Line 7: "[wrong]" should be "[correct]" (error type)
+            Line 9: "[wrong]" should be "[correct]" (error type)
+            Line 10: "[wrong]" should be "[correct]" (error type)
+            Line 11: "[wrong]" should be "[correct]" (error type)
+            Correct lines: 1, 4, 8, 12
+            ===ERROR_KEY_END===
+
+            ---
+
+            *** USE THESE 8 ERROR TYPES - ONE PER ERROR LINE ***
+            
+            *** IMPORTANT: Per official syllabus, ONLY GRAMMATICAL errors are tested ***
+            *** Do NOT include spelling or punctuation errors ***
+
+            Line 2 ERROR - Subject-verb (plural subject needs plural verb):
+               WRONG: "The students was excited" or "Many people was happy"
+               CORRECT: were
+               
+            Line 3 ERROR - Subject-verb (singular subject needs singular verb):
+               WRONG: "The teacher have planned" or "She have finished"
+               CORRECT: has
+               
+            Line 5 ERROR - Wrong tense (past event needs past tense):
+               WRONG: "Yesterday I walk to school" or "Last week he go there"
+               CORRECT: walked, went
+               
+            Line 6 ERROR - Subject-verb (third person singular needs -s):
+               WRONG: "The system allow users" or "This method provide benefits"
+               CORRECT: allows, provides
+               
+            Line 7 ERROR - Wrong adverb form (adverb needed, not adjective):
+               WRONG: "She spoke very soft" or "He ran very quick"
+               CORRECT: softly, quickly
+               
+            Line 9 ERROR - Wrong participle form (passive needs past participle):
+               WRONG: "should be encourage" or "must be complete"
+               CORRECT: encouraged, completed
+               
+            Line 10 ERROR - Wrong word form (noun/adjective confusion):
+               WRONG: "It was a beauty day" or "The success of the plan"
+               CORRECT: beautiful, successful (when adjective needed)
+               
+            Line 11 ERROR - Wrong pronoun or determiner:
+               WRONG: "Me and him went" or "Everyone brought their own"
+               CORRECT: "He and I went", "Everyone brought his or her own"
+
+            ---
+
+            *** COMPLETE EXAMPLE - COPY THIS STRUCTURE EXACTLY ***
+
+            **Section A [10 marks]**
+
+            The following passage contains some errors. Each of the 12 lines may contain one error. If there is an error, write the correction in the space provided. If the line is correct, put a tick (✓).
+
+            1. The annual sports day at Riverside School was a memorable event for everyone.
+            2. All the students was excited to participate in the various competitions.
+            3. The head teacher have been planning this event since the beginning of term.
+            4. Parents and teachers gathered early to find good seats near the field.
+            5. The first race begin at nine o'clock sharp with the youngest students.
+            6. This event bring together families from all parts of the community.
+            7. The athletes ran very quick around the track in the final race.
+            8. Many photographs were taken to capture the special moments of the day.
+            9. The winning team was suppose to receive their medals at the ceremony.
+            10. It was a beauty day and everyone enjoyed the warm sunshine.
+            11. Me and my friends cheered loudly for all the participants.
+            12. Students and parents left the school feeling proud and happy that evening.
+
+            ===ERROR_KEY_START===
+            Line 2: "was" should be "were" (subject-verb agreement with plural "students")
+            Line 3: "have" should be "has" (subject-verb agreement with singular "teacher")
+            Line 5: "begin" should be "began" (past tense required)
+            Line 6: "bring" should be "brings" (third person singular needs -s)
+            Line 7: "quick" should be "quickly" (adverb needed after verb)
+            Line 9: "suppose" should be "supposed" (past participle needed)
+            Line 10: "beauty" should be "beautiful" (adjective needed, not noun)
+            Line 11: "Me" should be "My friends and I" (correct pronoun form)
+            Correct lines: 1, 4, 8, 12
+            ===ERROR_KEY_END===
+
+            ---
+
+            NOW CREATE A NEW 12-LINE PASSAGE:
+            - Use a DIFFERENT topic (not sports day)
+            - ERRORS MUST be in lines: 2, 3, 5, 6, 7, 9, 10, 11
+            - CORRECT lines: 1, 4, 8, 12
+            - Each error must be OBVIOUSLY grammatically wrong
+            - Use the 8 error types listed above
+            """
+        ),
+        "section_b": dedent(
+            """\
+            Generate Paper 1 Section B [30 marks] (Situational Writing), SINGLE SECTION ONLY:
+            - DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, etc.). Generate ONLY the Section B content.
+            - Start directly with "**Section B [30 marks]**" or "Section B [30 marks]".
+
+            O-LEVEL SYLLABUS ALIGNMENT:
+            - Tasks MUST be appropriate for 15-17 year old students taking GCE O-Level English
+            - APPROPRIATE TOPICS: community events, educational programs, environmental initiatives, health campaigns, youth activities, cultural events, library/museum programs, volunteer opportunities, sports programs, school-related activities
+            - AVOID TOPICS: visa/immigration, work permits, adult financial services, complex legal matters, topics beyond student experience
+
+            VISUAL STIMULUS INTEGRATION:
+            - If a visual stimulus is provided, you MUST acknowledge it in your task instructions. Begin with a statement like "You have come across a visually appealing webpage/poster/advertisement..." or "Refer to the visual stimulus provided..." or "Using the visual stimulus shown above..." to explicitly reference the image.
+            - The visual should present COMPELLING, PERSUASIVE content that gives students clear reasons to choose between options or take action.
+            - If the visual shows multiple options (e.g., courses, programs, destinations), ensure the task requires students to make informed comparisons.
+            - If the visual contains ANY immigration, visa, or work permit related content, IGNORE those elements entirely and focus only on the community/educational aspects.
+
+            TASK DESIGN:
+            - Choose ONE appropriate task type (letter, email, report, or speech) consistent with the visual stimulus topic.
+            - You MUST base the task on the provided visual description; reflect its headings/callouts/blurbs.
+            - Ensure the scenario is relatable and achievable for a secondary school student.
+
+            PAC (Purpose, Audience, Context) - IMPLICIT INTEGRATION:
+            - DO NOT use explicit "Purpose:", "Audience:", "Context:" labels.
+            - Instead, WEAVE the PAC elements naturally into the situational scenario. The purpose, audience, and context should be CLEAR from the narrative setup without being labeled.
+            - WRONG: "Purpose: To persuade your friend. Audience: A close friend. Context: You saw an advertisement."
+            - CORRECT: "Your close friend has been looking for a photography course to develop their hobby. You recently came across this advertisement and believe one of the courses would be perfect for them. Write an email to persuade them to sign up, explaining why you think it suits their interests and skill level."
+
+            KEY POINTS & GUIDANCE:
+            - List 3–5 key points students must address that directly tie to the visual description.
+            - State tone/register explicitly based on the audience:
+              • FORMAL tone: For principal, teachers, official school bodies, external organisations
+              • SEMI-FORMAL tone: For school newsletter, club members, community groups
+              • INFORMAL tone: For friends, peers, family members
+            - Example: "Use a formal and enthusiastic tone" (for writing to principal)
+            - Advise 250–350 words.
+            - Avoid placeholders like [Date]/[Time]/[Location]; if not essential, omit them.
+            - End with "---" or "[End of Section B]" marker.
+            """
+        ),
+        "section_c": dedent(
+            """\
+            Generate Paper 1 Section C [30 marks] (Continuous Writing), SINGLE SECTION ONLY:
+            - DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, INSERT, etc.). Generate ONLY the Section C content.
+            - Start directly with "**Section C [30 marks]**" or "Section C [30 marks]".
+            - Present FOUR prompts (not five).
+            
+            PROMPT STYLE - NO GENRE LABELS:
+            - DO NOT label prompts with genre names like "Narrative:", "Descriptive:", "Expository:", "Argumentative:", or "Reflective:".
+            - The genre should be IMPLIED by the prompt's wording, not explicitly stated.
+            - WRONG: "1. **Narrative**: Write a story about a time when..."
+            - WRONG: "1. (Narrative) Write a story about..."
+            - CORRECT: "1. Write about a time when you had to make a difficult decision. What led to this moment, and how did it change you?"
+            - CORRECT: "1. 'The door creaked open slowly.' Continue this story."
+            - CORRECT: "1. Describe a place that holds special meaning to you."
+            - CORRECT: "1. 'Technology has made our lives easier.' Do you agree?"
+            
+            PROMPT CONTENT:
+            - Internally ensure variety: include at least one narrative-style, one descriptive-style, one argumentative/expository-style prompt.
+            - Each prompt should be authentic, concise, and may include 1–2 guiding questions or cues to help candidates develop their ideas.
+            - Prompts can be questions, statements to respond to, or story starters.
+            
+            FORMAT:
+            - Number prompts simply as "1.", "2.", "3.", "4." without genre prefixes.
+            - Instruct students to choose ONE and advise 350–500 words.
+            - End with "---" or "[End of Section C]" marker.
+            """
+        ),
+    },
+    "paper_2": {
+        None: dedent(
+            """\
+            Follow the official Paper 2 structure and marking:
+            - Section A [5 marks] (Visual Text Comprehension):
+              Provide ONE visual text (webpage/poster/advertisement) described fully in words (no images or links).
+              Include headings, callouts, short blurbs, and layout cues (e.g., banner, side panel).
+              Set EXACTLY 4 questions where ONE has two subparts (e.g., Q1(a), Q1(b)) so the total marks is 5.
+              Typical mix: Q1(a) Literal, Q1(b) Literal, Q2 Persuasive technique, Q3 Language effect (phrased as "How does X persuade/influence the reader..."), Q4 Inference.
+              Questions must explicitly reference elements of the described visual text.
+            - Section B [20 marks] (Reading Comprehension Open-Ended - NARRATIVE):
+              *** Per official syllabus: "Text 3 which is narrative in nature" ***
+              Supply ONE NARRATIVE passage (story/recount) of about 600–650 words with characters, setting, plot, and resolution.
+              Include paragraph numbers. Set ~6 questions (Q5-Q10) covering literal retrieval, vocabulary-in-context,
+              writer's craft for narrative (tension, mood, character portrayal), and evaluation.
+              The FINAL question (Q10) MUST be a 4-mark SEQUENCE flowchart showing story events in order (not themes).
+            - Section C [25 marks] (Guided Comprehension + Summary - NON-NARRATIVE):
+              *** Per official syllabus: "Text 4, which is non-narrative in nature" ***
+              Provide a NON-NARRATIVE passage (expository/argumentative/informational) around 400–550 words.
+              Before the summary, set 4–5 questions totaling 10 marks (short-answer mix relevant to the new passage).
+              Then set a 15-mark summary task covering a SUBSET of body paragraphs (e.g., Paragraphs 2-5, not the full text);
+              require continuous writing (≤80 words), using own words as far as possible (not note form).
+            """
+        ),
+        "section_a": dedent(
+            """\
+            Generate Paper 2 Section A [5 marks] (Visual Text Comprehension), SINGLE SECTION ONLY:
+            - DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, etc.). Generate ONLY the Section A content.
+            - Start directly with "**Section A [5 marks]**" or "Section A [5 marks]".
+
+            O-LEVEL SYLLABUS ALIGNMENT:
+            - Questions MUST be appropriate for 15-17 year old students taking GCE O-Level English
+            - Focus on VISUAL TEXT COMPREHENSION skills: identifying information, understanding persuasive techniques, analysing language effects
+            - AVOID questions about: visa/immigration, work permits, adult financial services, complex legal matters
+
+            VISUAL STIMULUS REQUIREMENTS:
+            - Include a DETAILED DESCRIPTION of the visual stimulus with:
+              • Clear headline/title
+              • At least 3-5 specific program names, event names, or feature names (these become answers for Q1)
+              • At least 2-3 persuasive phrases or slogans (for Q2 and Q3)
+              • Statistics, dates, or factual details
+              • Call-to-action phrases
+              • Organization name and tagline
+            - The visual must have ENOUGH DETAIL for all questions to be answerable
+
+            VISUAL STIMULUS INTEGRATION:
+            - Begin with: "Refer to the visual stimulus provided above and answer Questions 1-4."
+            - Write questions that reference SPECIFIC elements visible in the visual.
+
+            QUESTION REQUIREMENTS - CRITICAL:
+            
+            Q1(a) and Q1(b) - DIRECT RETRIEVAL [1 mark each]:
+            - These MUST require students to COPY EXACT PHRASES/WORDS from the visual
+            - The answer must be a direct quote, NOT a paraphrase
+            - Be SPECIFIC in your question about what aspect you're asking about
+            - WRONG: "What does the visual state about the nature of meetings?" (too vague)
+            - CORRECT: "What does the visual state about the frequency and structure of meetings held by the network?"
+            - CORRECT: "Identify the phrase that describes..." or "What is the name of..." or "State the exact phrase that..."
+            - Answer must be DIRECTLY LIFTABLE from the visual text
+            
+            Q2 - PERSUASIVE TECHNIQUE [1 mark]:
+            - Quote an EXACT phrase from the visual and ask about its persuasive effect
+            - CORRECT: "Explain how the phrase '[exact quote]' serves as a persuasive technique."
+            - The quoted phrase MUST appear word-for-word in the visual description
+            
+            Q3 - LANGUAGE EFFECT [1 mark]:
+            - Quote an EXACT phrase and ask about its effect on the reader
+            - CORRECT: "Explain the effect of the phrase '[exact quote]' on the reader."
+            - The quoted phrase MUST appear word-for-word in the visual description
+            
+            Q4 - INFERENCE [1 mark]:
+            - Ask what can be inferred, requiring textual evidence
+            - CORRECT: "Based on the information in the visual, what can you infer about X? Provide evidence from the visual to support your answer."
+
+            VALIDATION CHECKLIST:
+            □ Visual description has at least 3 specific names/terms for Q1 answers
+            □ Visual description has at least 2 quotable persuasive phrases for Q2/Q3
+            □ Q1(a) answer is an EXACT phrase from the visual
+            □ Q1(b) answer is an EXACT phrase from the visual
+            □ Q2 quotes an EXACT phrase that EXISTS in the visual
+            □ Q3 quotes an EXACT phrase that EXISTS in the visual
+            □ Q4 can be answered with evidence from the visual
+            """
+        ),
+        "section_b": dedent(
+            """\
+            Generate Paper 2 Section B [20 marks] (Reading Comprehension Open-Ended), SINGLE SECTION ONLY:
+            - DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, etc.). Generate ONLY the Section B content.
+            - Start directly with "**Section B [20 marks]**" or "Section B [20 marks]".
+            
+            *** OFFICIAL SYLLABUS REQUIREMENT: Text 3 MUST be NARRATIVE in nature ***
+            
+            PASSAGE TYPE - NARRATIVE (Story or Recount):
+            - Generate a NARRATIVE passage (~600–650 words) - this is a STORY or personal RECOUNT
+            - The passage should have characters, settings, events, and/or conflict
+            - Examples: A personal experience, a short story, an adventure, a memoir excerpt, a biographical recount
+            - NOT an expository essay, NOT an argumentative text, NOT an informational article
+            - Include clear PARAGRAPH numbering (Paragraph 1, 2, 3, etc.)
+            
+            NARRATIVE ELEMENTS TO INCLUDE:
+            - Setting: Where and when the story takes place
+            - Character(s): At least one main character with some development
+            - Plot: A clear sequence of events with beginning, middle, end
+            - Conflict or challenge: Something the character(s) must face
+            - Resolution: How things turn out
+            - Descriptive language: Sensory details, imagery, figurative language
+            
+            QUESTION NUMBERING - CRITICAL:
+            - Section A has Questions 1-4 (visual text)
+            - Section B MUST start at Question 5 and continue: 5, 6, 7, 8, 9, 10
+            - DO NOT restart numbering at 1
+
+            REQUIRED QUESTION TYPES FOR NARRATIVE (Q5-Q10):
+            
+            Q5-Q6: Literal retrieval about the narrative (2 questions, 2 marks each)
+              - "Based on Paragraph X, what TWO things did the narrator notice when...?"
+              - "According to the passage, why did [character] decide to...?"
+              - "What happened after [event]?"
+              - "State two feelings the narrator experienced during..."
+            
+            Q7: Vocabulary-in-context (1 mark)
+              - "Give one word from Paragraph X that suggests [feeling/atmosphere/action]..."
+              - "What word in the passage conveys [meaning]...?"
+            
+            Q8: Writer's craft / Language effect (2 marks)
+              - NARRATIVE-FOCUSED PHRASING:
+              - "How does the writer create tension/suspense in Paragraph X?"
+              - "How does the phrase '[exact quote]' contribute to the mood of the passage?"
+              - "What is the effect of the writer's description of [scene/character]?"
+              - "How does the writer convey the character's emotions through [technique]?"
+            
+            Q9: Evaluative/Opinion about the narrative (2-3 marks)
+              - "What do you think the narrator learned from this experience? Explain with evidence."
+              - "Do you think [character's decision] was the right choice? Explain your view."
+              - "What does this story suggest about [theme]?"
+            
+            Q10: Sequence Flowchart (4 marks) - STORY SEQUENCE, not themes
+              - For NARRATIVE passages, the flowchart shows the SEQUENCE OF EVENTS
+              - Structure: What happened first → What happened next → Then → Finally
+              - Provide 6 options, students choose 4 that show correct order of events
+
+            FINAL QUESTION - SEQUENCE FLOWCHART (Q10, worth 4 marks):
+
+            *** FOR NARRATIVE: Track the SEQUENCE OF EVENTS across paragraphs ***
+
+            FLOWCHART DESIGN FOR NARRATIVE:
+            
+            The flowchart should trace the story's plot sequence:
+            - Box 1: Event/situation from Paragraph 1-2 (beginning)
+            - Box 2: Event/development from Paragraph 2-3 (rising action)
+            - Box 3: Event/climax from Paragraph 3-4 (middle/turning point)
+            - Box 4: Event/resolution from Paragraph 4-5 (end)
+            
+            FLOWCHART OPTIONS - Create 6 event descriptions:
+            - 4 CORRECT options: Each summarizes a key event from a specific part of the story
+            - 2 DISTRACTOR options: Events that did NOT happen or happen in wrong order
+            
+            EXAMPLE FOR NARRATIVE:
+
+            Story about a student's first day at a new school:
+            - Para 1-2: Nervous arrival, looking at unfamiliar faces
+            - Para 2-3: First class, struggles to find the classroom
+            - Para 3-4: Makes an unexpected friend during lunch
+            - Para 4-5: Realizes the new school might not be so bad
+
+            Options (showing story sequence):
+            A. The narrator felt anxious while entering the school gates (→ Beginning)
+            B. The narrator immediately felt welcomed by everyone (DISTRACTOR - not what happened)
+            C. The narrator got lost trying to find the first classroom (→ Rising action)
+            D. A classmate invited the narrator to sit together at lunch (→ Middle)
+            E. The narrator decided to transfer to another school (DISTRACTOR - not what happened)
+            F. The narrator felt hopeful about the days ahead (→ Resolution)
+
+            ===FLOWCHART_ANSWER_KEY_START===
+            Box 1 (Beginning): A (reason: describes initial nervousness in Para 1-2)
+            Box 2 (Rising action): C (reason: describes getting lost in Para 2-3)
+            Box 3 (Middle): D (reason: describes making friend in Para 3-4)
+            Box 4 (Resolution): F (reason: describes final positive outlook in Para 4-5)
+            Distractors: B, E (B: contradicts initial feelings; E: not stated in passage)
+            ===FLOWCHART_ANSWER_KEY_END===
+            """
+        ),
+        "section_c": dedent(
+            """\
+            Generate Paper 2 Section C [25 marks] (Guided Comprehension + Summary), SINGLE SECTION ONLY:
+            - DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, etc.). Generate ONLY the Section C content.
+            - Start directly with "**Section C [25 marks]**" or "Section C [25 marks]".
+            
+            *** OFFICIAL SYLLABUS REQUIREMENT: Text 4 MUST be NON-NARRATIVE in nature ***
+            
+            - Provide a NON-NARRATIVE passage (~550–650 words) with paragraph numbers
+            - NON-NARRATIVE means: expository, argumentative, informational, explanatory, persuasive
+            - NOT a story, NOT a personal recount, NOT fiction
+            - Section B is NARRATIVE (story), so Section C must be NON-NARRATIVE (factual/informational)
+            - Do NOT reuse Section B's theme
+
+            QUESTION NUMBERING - CRITICAL:
+            - Section C continues from Section B (which ends at Q10)
+            - Section C questions are: Q11, Q12, Q13, Q14 (comprehension) and Q15 (summary)
+            - Do NOT restart at Q1
+
+            COMPREHENSION QUESTIONS (Q11-Q14, 10 marks total):
+            
+            ALLOWED QUESTION TYPES:
+            1. Literal Retrieval [1-2 marks]
+               - "What are two benefits of...?" 
+               - "According to Paragraph X, what/why/how...?"
+               - "State one reason..."
+
+            2. Explanation/Reasoning [2 marks]
+               - "How does the writer show that X is important in Paragraph Y?"
+               - "Explain how X contributes to Y according to the passage."
+               - CLEAR PHRASING - avoid vague "influence" questions
+
+            3. Vocabulary-in-Context [1 mark]
+               - "Give one word from Paragraph X that means '...'."
+
+            4. Cause-Effect [2 marks]
+               - "What effect does X have on Y?"
+
+            DO NOT INCLUDE:
+            ✗ "Based on your own knowledge..."
+            ✗ "Do you agree...? Justify with your own views"
+            ✗ Open-ended evaluative questions
+            ✗ Writer's tone/attitude analysis
+
+            SUMMARY TASK (Q15, 15 marks):
+            
+            PASSAGE DESIGN FOR SUMMARY:
+            - The summary paragraphs MUST contain AT LEAST 10 DISTINCT summarisable points
+            - Each point should be a separate fact, benefit, feature, or idea
+            - Points should be clearly identifiable (not buried in complex sentences)
+
+            PARAGRAPH RANGE FOR SUMMARY:
+            - Use a SUBSET of paragraphs, NOT all paragraphs
+            - CORRECT: "Paragraphs 2-5" or "Paragraphs 2-4" (specific body paragraphs)
+            - AVOID: "Paragraphs 1-6" (too broad, includes intro and conclusion)
+            - The subset should contain the main content paragraphs with summarisable points
+            - Introduction (Para 1) and Conclusion (final para) typically excluded
+
+            FORMAT:
+            "15. Summary Task [15 marks]
+
+            Using your own words as far as possible, summarise [specific focus] as described in Paragraphs X-Y.
+
+            Your summary must be in continuous writing (not note form) and should not be longer than 80 words, including the 10 words given below to help you begin.
+
+            [Starting line with approximately 10 words]..."
+
+            EXAMPLE:
+            "Using your own words as far as possible, summarise the benefits of civic engagement as described in Paragraphs 2-5.
+            
+            Your summary must be in continuous writing (not note form) and should not be longer than 80 words, including the 10 words given below to help you begin.
+            
+            Civic engagement benefits communities and individuals in several ways..."
+
+            MARK BREAKDOWN (internal, not shown to students):
+            - Content: 8 marks (1 mark per key point, max 8)
+            - Language: 7 marks (paraphrasing quality, fluency, coherence)
+
+            - Ensure total marks are exactly 25 (10 for Q11-Q14 + 15 for Q15).
+            """
+        ),
+    },
+    "oral": {
+        None: dedent(
+            """\
+            Generate a complete GCE O-Level Oral Communication examination with ALL THREE components:
+
+            COMPONENT 1: READING ALOUD [10 marks]
+            - Provide ONE prose passage of 300-400 words
+            - Topic should be contemporary and engaging (technology, environment, social issues, culture)
+            - Include a mix of sentence structures: simple, compound, and complex
+            - Include dialogue or direct speech (1-2 instances)
+            - Include numbers, dates, or statistics that require clear articulation
+            - Include words with varied stress patterns and challenging pronunciations
+            - Mark the passage with suggested pause points using "/" for short pauses and "//" for longer pauses
+            - Note any challenging words in brackets with pronunciation guidance
+
+            COMPONENT 2: STIMULUS-BASED CONVERSATION (SBC) [20 marks]
+            - Provide a VISUAL STIMULUS description (poster, infographic, or advertisement)
+            - The visual should relate to a contemporary issue or topic
+            - Include key visual elements: headings, statistics, images described, callouts
+            - After the visual, provide 4 DISCUSSION PROMPTS:
+              • Q1: Direct reference to stimulus content (literal/factual)
+              • Q2: Personal opinion/experience related to stimulus theme
+              • Q3: Broader implications/analysis of the issue
+              • Q4: Hypothetical scenario or solution-based question
+            - Include examiner notes with potential follow-up probes
+
+            COMPONENT 3: GENERAL CONVERSATION [20 marks]
+            - Provide 5 CONVERSATION THEMES, each with:
+              • Theme title (e.g., "Technology & Daily Life")
+              • 3-4 guiding questions per theme
+              • Questions should progress: factual → personal → analytical → evaluative
+            - Themes should cover diverse areas: personal, social, educational, global
+            - Include examiner guidance on follow-up questions
+
+            FORMAT REQUIREMENTS:
+            - Clear section headers for each component
+            - Timing guidance (Reading: 10 min prep, 2 min read; SBC: 10 min; Conversation: 10 min)
+            - Candidate instructions at the start of each section
+            """
+        ),
+        "reading_aloud": dedent(
+            """\
+            Generate ONLY the READING ALOUD component [10 marks] of the Oral Examination:
+
+            PASSAGE REQUIREMENTS:
+            - Length: 300-400 words of continuous prose
+            - Topic: Contemporary and relevant (technology, environment, health, social issues, culture, travel)
+            - Tone: Narrative, descriptive, or expository (NOT argumentative for reading aloud)
+
+            LINGUISTIC FEATURES TO INCLUDE:
+            - Variety of sentence lengths and structures
+            - 1-2 instances of direct speech or dialogue
+            - Numbers, dates, percentages, or statistics (e.g., "67 percent", "2.5 million", "1997")
+            - Proper nouns and place names requiring clear pronunciation
+            - Words with challenging stress patterns or pronunciations
+            - Emotive or descriptive vocabulary
+            - Connectives and transitional phrases
+
+            FORMAT:
+            - Start with "READING ALOUD [10 marks]" header
+            - Include timing: "Preparation time: 10 minutes | Reading time: Approximately 2 minutes"
+            - Title the passage appropriately
+            - Present the passage in clear paragraphs
+            - After the passage, include:
+              • "Pronunciation Guide:" section with 3-5 challenging words and their phonetic hints
+              • "Suggested Pause Points:" brief guidance on natural pausing
+
+            DIFFICULTY CALIBRATION:
+            - Foundational: Simpler vocabulary, shorter sentences, familiar topics
+            - Standard: Balanced complexity, varied structures, contemporary topics
+            - Advanced: Sophisticated vocabulary, complex structures, nuanced topics
+            """
+        ),
+        "sbc": dedent(
+            """\
+            Generate ONLY the STIMULUS-BASED CONVERSATION (SBC) component [20 marks]:
+
+            VISUAL STIMULUS REQUIREMENTS:
+            - Describe a visual stimulus in detail (poster, infographic, advertisement, or webpage)
+            - Topic: Contemporary issue relevant to students (social media, environment, education, health, technology)
+            - Include these elements in your description:
+              • Main heading/title
+              • Key statistics or facts (at least 2-3)
+              • Visual elements (images, icons, graphics - describe what they show)
+              • Callout boxes or highlighted information
+              • Any slogans, taglines, or quotes
+              • Organization/source attribution
+
+            DISCUSSION PROMPTS (4 questions):
+
+            Question 1 - Stimulus-Based (Factual):
+            - Direct reference to information in the visual
+            - E.g., "According to the infographic, what is the main cause of...?"
+            - Should be answerable from the stimulus content
+
+            Question 2 - Personal Response:
+            - Connects stimulus theme to candidate's experience/opinion
+            - E.g., "How do you personally feel about...?" or "In your experience, have you...?"
+
+            Question 3 - Analysis/Implications:
+            - Broader thinking about the issue
+            - E.g., "Why do you think this is becoming more common...?" or "What are the consequences of...?"
+
+            Question 4 - Hypothetical/Solution:
+            - Forward-thinking or problem-solving
+            - E.g., "If you were in charge of..., what would you do?" or "How might we address...?"
+
+            EXAMINER NOTES:
+            - Include 2-3 potential follow-up probes for each question
+            - Note areas to explore if candidate gives brief responses
+
+            FORMAT:
+            - Start with "STIMULUS-BASED CONVERSATION [20 marks]" header
+            - Include timing: "Discussion time: Approximately 10 minutes"
+            - Present visual stimulus description in a bordered/highlighted section
+            - Number questions clearly as Q1, Q2, Q3, Q4
+            """
+        ),
+        "conversation": dedent(
+            """\
+            Generate ONLY the GENERAL CONVERSATION component [20 marks]:
+
+            THEME REQUIREMENTS:
+            - Provide EXACTLY 5 conversation themes
+            - Themes should be diverse and age-appropriate for O-Level students (15-17 years)
+            - Each theme should allow for personal, analytical, and evaluative responses
+
+            SUGGESTED THEME CATEGORIES (choose 5):
+            1. Personal & Family: relationships, responsibilities, values
+            2. School & Education: learning, teachers, future plans
+            3. Friends & Social Life: friendships, peer pressure, socializing
+            4. Technology & Media: social media, gaming, digital life
+            5. Environment & Society: sustainability, community, social issues
+            6. Health & Lifestyle: wellbeing, sports, habits
+            7. Culture & Traditions: festivals, customs, identity
+            8. Future & Aspirations: career, goals, dreams
+            9. Travel & Experiences: places, adventures, memories
+            10. Current Affairs: news, global issues, local matters
+
+            FOR EACH THEME, PROVIDE:
+
+            Theme Title: [Clear, engaging title]
+
+            Questions (3-4 per theme, progressing in complexity):
+            1. Factual/Personal: Simple question about candidate's experience
+               E.g., "Tell me about your family" or "What do you enjoy doing in your free time?"
+
+            2. Descriptive/Explanatory: Requires more detail
+               E.g., "Describe a memorable experience..." or "Explain why you feel..."
+
+            3. Analytical: Requires reasoning or comparison
+               E.g., "Why do you think young people...?" or "How has this changed over time?"
+
+            4. Evaluative/Hypothetical: Requires judgement or speculation
+               E.g., "What would you do if...?" or "Do you think this is a good development?"
+
+            EXAMINER GUIDANCE:
+            - For each theme, include 2-3 follow-up prompts
+            - Note how to encourage elaboration if responses are brief
+            - Suggest areas to probe for more depth
+
+            FORMAT:
+            - Start with "GENERAL CONVERSATION [20 marks]" header
+            - Include timing: "Conversation time: Approximately 10 minutes"
+            - Use "THEME 1:", "THEME 2:", etc. as headers
+            - Number questions within each theme
+            - Place examiner notes in italics or brackets
+            """
+        ),
+    },
+}
+# Trim once here so lookups below do no string work at all
+_BASE_GUIDANCE = {
+    fmt: {key: text.strip() for key, text in sections.items()}
+    for fmt, sections in _BASE_GUIDANCE.items()
+}
 
 
 def _official_structure_guidance(paper_format: str, section: Optional[str]) -> str:
-    base_guidance: Dict[str, Dict[Optional[str], str]] = {
-        "paper_1": {
-            None: dedent(
-                """\
-                Follow the official Paper 1 structure and marking:
-                - Section A [10 marks] (Editing): Provide a single 12-line passage. The FIRST and LAST lines are correct. Exactly EIGHT of the remaining lines (out of Lines 2–11) contain ONE grammatical error each. Exactly TWO additional lines contain NO error; place them unpredictably. Output each line prefixed by its line number (1–12). After the passage, include an “Answer Spaces” list with 12 numbered blanks for student corrections. Do not supply answers.
-                - Section B [30 marks] (Situational Writing): Create ONE situational task (letter, email, report, or speech) based on a web-page style visual stimulus. Describe the visual stimulus textually (headings, callouts, short blurbs); include purpose, audience, and context. Indicate 3–5 key points the student must address. Advise 250–350 words.
-                - Section C [30 marks] (Continuous Writing): Provide FOUR prompts total, covering required genres: Narrative (always), and three of {Descriptive, Expository, Argumentative, Reflective}. Instruct students to choose ONE and advise 350–500 words.
-                """
-            ),
-            "section_a": dedent(
-                """\
-                Generate Paper 1 Section A [10 marks] (Editing), SINGLE SECTION ONLY.
-
-                *** YOU MUST CREATE EXACTLY 8 GRAMMATICALLY WRONG SENTENCES ***
-
-                FIXED ERROR PLACEMENT - FOLLOW THIS EXACTLY:
-                - Line 1: CORRECT (no error)
-                - Line 2: MUST HAVE ERROR
-                - Line 3: MUST HAVE ERROR  
-                - Line 4: CORRECT (no error)
-                - Line 5: MUST HAVE ERROR
-                - Line 6: MUST HAVE ERROR
-                - Line 7: MUST HAVE ERROR
-                - Line 8: CORRECT (no error)
-                - Line 9: MUST HAVE ERROR
-                - Line 10: MUST HAVE ERROR
-                - Line 11: MUST HAVE ERROR
-                - Line 12: CORRECT (no error)
-
-                Total: 8 error lines (2,3,5,6,7,9,10,11) + 4 correct lines (1,4,8,12)
-
-                ---
-
-                OUTPUT FORMAT:
-
-                **Section A [10 marks]**
-
-                The following passage contains some errors. Each of the 12 lines may contain one error. If there is an error, write the correction in the space provided. If the line is correct, put a tick (✓).
-
-                1. [CORRECT sentence - no errors]
-                2. [Sentence with ONE clear grammatical error]
-                3. [Sentence with ONE clear grammatical error]
-                4. [CORRECT sentence - no errors]
-                5. [Sentence with ONE clear grammatical error]
-                6. [Sentence with ONE clear grammatical error]
-                7. [Sentence with ONE clear grammatical error]
-                8. [CORRECT sentence - no errors]
-                9. [Sentence with ONE clear grammatical error]
-                10. [Sentence with ONE clear grammatical error]
-                11. [Sentence with ONE clear grammatical error]
-                12. [CORRECT sentence - no errors]
-
-                ===ERROR_KEY_START===
-                Line 2: "[wrong]" should be "[correct]" (error type)
-                Line 3: "[wrong]" should be "[correct]" (error type)
-                Line 5: "[wrong]" should be "[correct]" (error type)
-                Line 6: "[wrong]" should be "[correct]" (error type)
-                Line 7: "[wrong]" should be "[correct]" (error type)
-                Line 9: "[wrong]" should be "[correct]" (error type)
-                Line 10: "[wrong]" should be "[correct]" (error type)
-                Line 11: "[wrong]" should be "[correct]" (error type)
-                Correct lines: 1, 4, 8, 12
-                ===ERROR_KEY_END===
-
-                ---
-
-                *** USE THESE 8 ERROR TYPES - ONE PER ERROR LINE ***
-                
-                *** IMPORTANT: Per official syllabus, ONLY GRAMMATICAL errors are tested ***
-                *** Do NOT include spelling or punctuation errors ***
-
-                Line 2 ERROR - Subject-verb (plural subject needs plural verb):
-                   WRONG: "The students was excited" or "Many people was happy"
-                   CORRECT: were
-                   
-                Line 3 ERROR - Subject-verb (singular subject needs singular verb):
-                   WRONG: "The teacher have planned" or "She have finished"
-                   CORRECT: has
-                   
-                Line 5 ERROR - Wrong tense (past event needs past tense):
-                   WRONG: "Yesterday I walk to school" or "Last week he go there"
-                   CORRECT: walked, went
-                   
-                Line 6 ERROR - Subject-verb (third person singular needs -s):
-                   WRONG: "The system allow users" or "This method provide benefits"
-                   CORRECT: allows, provides
-                   
-                Line 7 ERROR - Wrong adverb form (adverb needed, not adjective):
-                   WRONG: "She spoke very soft" or "He ran very quick"
-                   CORRECT: softly, quickly
-                   
-                Line 9 ERROR - Wrong participle form (passive needs past participle):
-                   WRONG: "should be encourage" or "must be complete"
-                   CORRECT: encouraged, completed
-                   
-                Line 10 ERROR - Wrong word form (noun/adjective confusion):
-                   WRONG: "It was a beauty day" or "The success of the plan"
-                   CORRECT: beautiful, successful (when adjective needed)
-                   
-                Line 11 ERROR - Wrong pronoun or determiner:
-                   WRONG: "Me and him went" or "Everyone brought their own"
-                   CORRECT: "He and I went", "Everyone brought his or her own"
-
-                ---
-
-                *** COMPLETE EXAMPLE - COPY THIS STRUCTURE EXACTLY ***
-
-                **Section A [10 marks]**
-
-                The following passage contains some errors. Each of the 12 lines may contain one error. If there is an error, write the correction in the space provided. If the line is correct, put a tick (✓).
-
-                1. The annual sports day at Riverside School was a memorable event for everyone.
-                2. All the students was excited to participate in the various competitions.
-                3. The head teacher have been planning this event since the beginning of term.
-                4. Parents and teachers gathered early to find good seats near the field.
-                5. The first race begin at nine o'clock sharp with the youngest students.
-                6. This event bring together families from all parts of the community.
-                7. The athletes ran very quick around the track in the final race.
-                8. Many photographs were taken to capture the special moments of the day.
-                9. The winning team was suppose to receive their medals at the ceremony.
-                10. It was a beauty day and everyone enjoyed the warm sunshine.
-                11. Me and my friends cheered loudly for all the participants.
-                12. Students and parents left the school feeling proud and happy that evening.
-
-                ===ERROR_KEY_START===
-                Line 2: "was" should be "were" (subject-verb agreement with plural "students")
-                Line 3: "have" should be "has" (subject-verb agreement with singular "teacher")
-                Line 5: "begin" should be "began" (past tense required)
-                Line 6: "bring" should be "brings" (third person singular needs -s)
-                Line 7: "quick" should be "quickly" (adverb needed after verb)
-                Line 9: "suppose" should be "supposed" (past participle needed)
-                Line 10: "beauty" should be "beautiful" (adjective needed, not noun)
-                Line 11: "Me" should be "My friends and I" (correct pronoun form)
-                Correct lines: 1, 4, 8, 12
-                ===ERROR_KEY_END===
-
-                ---
-
-                NOW CREATE A NEW 12-LINE PASSAGE:
-                - Use a DIFFERENT topic (not sports day)
-                - ERRORS MUST be in lines: 2, 3, 5, 6, 7, 9, 10, 11
-                - CORRECT lines: 1, 4, 8, 12
-                - Each error must be OBVIOUSLY grammatically wrong
-                - Use the 8 error types listed above
-                """
-            ),
-            "section_b": dedent(
-                """\
-                Generate Paper 1 Section B [30 marks] (Situational Writing), SINGLE SECTION ONLY:
-                - DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, etc.). Generate ONLY the Section B content.
-                - Start directly with "**Section B [30 marks]**" or "Section B [30 marks]".
-
-                O-LEVEL SYLLABUS ALIGNMENT:
-                - Tasks MUST be appropriate for 15-17 year old students taking GCE O-Level English
-                - APPROPRIATE TOPICS: community events, educational programs, environmental initiatives, health campaigns, youth activities, cultural events, library/museum programs, volunteer opportunities, sports programs, school-related activities
-                - AVOID TOPICS: visa/immigration, work permits, adult financial services, complex legal matters, topics beyond student experience
-
-                VISUAL STIMULUS INTEGRATION:
-                - If a visual stimulus is provided, you MUST acknowledge it in your task instructions. Begin with a statement like "You have come across a visually appealing webpage/poster/advertisement..." or "Refer to the visual stimulus provided..." or "Using the visual stimulus shown above..." to explicitly reference the image.
-                - The visual should present COMPELLING, PERSUASIVE content that gives students clear reasons to choose between options or take action.
-                - If the visual shows multiple options (e.g., courses, programs, destinations), ensure the task requires students to make informed comparisons.
-                - If the visual contains ANY immigration, visa, or work permit related content, IGNORE those elements entirely and focus only on the community/educational aspects.
-
-                TASK DESIGN:
-                - Choose ONE appropriate task type (letter, email, report, or speech) consistent with the visual stimulus topic.
-                - You MUST base the task on the provided visual description; reflect its headings/callouts/blurbs.
-                - Ensure the scenario is relatable and achievable for a secondary school student.
-
-                PAC (Purpose, Audience, Context) - IMPLICIT INTEGRATION:
-                - DO NOT use explicit "Purpose:", "Audience:", "Context:" labels.
-                - Instead, WEAVE the PAC elements naturally into the situational scenario. The purpose, audience, and context should be CLEAR from the narrative setup without being labeled.
-                - WRONG: "Purpose: To persuade your friend. Audience: A close friend. Context: You saw an advertisement."
-                - CORRECT: "Your close friend has been looking for a photography course to develop their hobby. You recently came across this advertisement and believe one of the courses would be perfect for them. Write an email to persuade them to sign up, explaining why you think it suits their interests and skill level."
-
-                KEY POINTS & GUIDANCE:
-                - List 3–5 key points students must address that directly tie to the visual description.
-                - State tone/register explicitly based on the audience:
-                  • FORMAL tone: For principal, teachers, official school bodies, external organisations
-                  • SEMI-FORMAL tone: For school newsletter, club members, community groups
-                  • INFORMAL tone: For friends, peers, family members
-                - Example: "Use a formal and enthusiastic tone" (for writing to principal)
-                - Advise 250–350 words.
-                - Avoid placeholders like [Date]/[Time]/[Location]; if not essential, omit them.
-                - End with "---" or "[End of Section B]" marker.
-                """
-            ),
-            "section_c": dedent(
-                """\
-                Generate Paper 1 Section C [30 marks] (Continuous Writing), SINGLE SECTION ONLY:
-                - DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, INSERT, etc.). Generate ONLY the Section C content.
-                - Start directly with "**Section C [30 marks]**" or "Section C [30 marks]".
-                - Present FOUR prompts (not five).
-                
-                PROMPT STYLE - NO GENRE LABELS:
-                - DO NOT label prompts with genre names like "Narrative:", "Descriptive:", "Expository:", "Argumentative:", or "Reflective:".
-                - The genre should be IMPLIED by the prompt's wording, not explicitly stated.
-                - WRONG: "1. **Narrative**: Write a story about a time when..."
-                - WRONG: "1. (Narrative) Write a story about..."
-                - CORRECT: "1. Write about a time when you had to make a difficult decision. What led to this moment, and how did it change you?"
-                - CORRECT: "1. 'The door creaked open slowly.' Continue this story."
-                - CORRECT: "1. Describe a place that holds special meaning to you."
-                - CORRECT: "1. 'Technology has made our lives easier.' Do you agree?"
-                
-                PROMPT CONTENT:
-                - Internally ensure variety: include at least one narrative-style, one descriptive-style, one argumentative/expository-style prompt.
-                - Each prompt should be authentic, concise, and may include 1–2 guiding questions or cues to help candidates develop their ideas.
-                - Prompts can be questions, statements to respond to, or story starters.
-                
-                FORMAT:
-                - Number prompts simply as "1.", "2.", "3.", "4." without genre prefixes.
-                - Instruct students to choose ONE and advise 350–500 words.
-                - End with "---" or "[End of Section C]" marker.
-                """
-            ),
-        },
-        "paper_2": {
-            None: dedent(
-                """\
-                Follow the official Paper 2 structure and marking:
-                - Section A [5 marks] (Visual Text Comprehension):
-                  Provide ONE visual text (webpage/poster/advertisement) described fully in words (no images or links).
-                  Include headings, callouts, short blurbs, and layout cues (e.g., banner, side panel).
-                  Set EXACTLY 4 questions where ONE has two subparts (e.g., Q1(a), Q1(b)) so the total marks is 5.
-                  Typical mix: Q1(a) Literal, Q1(b) Literal, Q2 Persuasive technique, Q3 Language effect (phrased as "How does X persuade/influence the reader..."), Q4 Inference.
-                  Questions must explicitly reference elements of the described visual text.
-                - Section B [20 marks] (Reading Comprehension Open-Ended - NARRATIVE):
-                  *** Per official syllabus: "Text 3 which is narrative in nature" ***
-                  Supply ONE NARRATIVE passage (story/recount) of about 600–650 words with characters, setting, plot, and resolution.
-                  Include paragraph numbers. Set ~6 questions (Q5-Q10) covering literal retrieval, vocabulary-in-context,
-                  writer's craft for narrative (tension, mood, character portrayal), and evaluation.
-                  The FINAL question (Q10) MUST be a 4-mark SEQUENCE flowchart showing story events in order (not themes).
-                - Section C [25 marks] (Guided Comprehension + Summary - NON-NARRATIVE):
-                  *** Per official syllabus: "Text 4, which is non-narrative in nature" ***
-                  Provide a NON-NARRATIVE passage (expository/argumentative/informational) around 400–550 words.
-                  Before the summary, set 4–5 questions totaling 10 marks (short-answer mix relevant to the new passage).
-                  Then set a 15-mark summary task covering a SUBSET of body paragraphs (e.g., Paragraphs 2-5, not the full text);
-                  require continuous writing (≤80 words), using own words as far as possible (not note form).
-                """
-            ),
-            "section_a": dedent(
-                """\
-                Generate Paper 2 Section A [5 marks] (Visual Text Comprehension), SINGLE SECTION ONLY:
-                - DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, etc.). Generate ONLY the Section A content.
-                - Start directly with "**Section A [5 marks]**" or "Section A [5 marks]".
-
-                O-LEVEL SYLLABUS ALIGNMENT:
-                - Questions MUST be appropriate for 15-17 year old students taking GCE O-Level English
-                - Focus on VISUAL TEXT COMPREHENSION skills: identifying information, understanding persuasive techniques, analysing language effects
-                - AVOID questions about: visa/immigration, work permits, adult financial services, complex legal matters
-
-                VISUAL STIMULUS REQUIREMENTS:
-                - Include a DETAILED DESCRIPTION of the visual stimulus with:
-                  • Clear headline/title
-                  • At least 3-5 specific program names, event names, or feature names (these become answers for Q1)
-                  • At least 2-3 persuasive phrases or slogans (for Q2 and Q3)
-                  • Statistics, dates, or factual details
-                  • Call-to-action phrases
-                  • Organization name and tagline
-                - The visual must have ENOUGH DETAIL for all questions to be answerable
-
-                VISUAL STIMULUS INTEGRATION:
-                - Begin with: "Refer to the visual stimulus provided above and answer Questions 1-4."
-                - Write questions that reference SPECIFIC elements visible in the visual.
-
-                QUESTION REQUIREMENTS - CRITICAL:
-                
-                Q1(a) and Q1(b) - DIRECT RETRIEVAL [1 mark each]:
-                - These MUST require students to COPY EXACT PHRASES/WORDS from the visual
-                - The answer must be a direct quote, NOT a paraphrase
-                - Be SPECIFIC in your question about what aspect you're asking about
-                - WRONG: "What does the visual state about the nature of meetings?" (too vague)
-                - CORRECT: "What does the visual state about the frequency and structure of meetings held by the network?"
-                - CORRECT: "Identify the phrase that describes..." or "What is the name of..." or "State the exact phrase that..."
-                - Answer must be DIRECTLY LIFTABLE from the visual text
-                
-                Q2 - PERSUASIVE TECHNIQUE [1 mark]:
-                - Quote an EXACT phrase from the visual and ask about its persuasive effect
-                - CORRECT: "Explain how the phrase '[exact quote]' serves as a persuasive technique."
-                - The quoted phrase MUST appear word-for-word in the visual description
-                
-                Q3 - LANGUAGE EFFECT [1 mark]:
-                - Quote an EXACT phrase and ask about its effect on the reader
-                - CORRECT: "Explain the effect of the phrase '[exact quote]' on the reader."
-                - The quoted phrase MUST appear word-for-word in the visual description
-                
-                Q4 - INFERENCE [1 mark]:
-                - Ask what can be inferred, requiring textual evidence
-                - CORRECT: "Based on the information in the visual, what can you infer about X? Provide evidence from the visual to support your answer."
-
-                VALIDATION CHECKLIST:
-                □ Visual description has at least 3 specific names/terms for Q1 answers
-                □ Visual description has at least 2 quotable persuasive phrases for Q2/Q3
-                □ Q1(a) answer is an EXACT phrase from the visual
-                □ Q1(b) answer is an EXACT phrase from the visual
-                □ Q2 quotes an EXACT phrase that EXISTS in the visual
-                □ Q3 quotes an EXACT phrase that EXISTS in the visual
-                □ Q4 can be answered with evidence from the visual
-                """
-            ),
-            "section_b": dedent(
-                """\
-                Generate Paper 2 Section B [20 marks] (Reading Comprehension Open-Ended), SINGLE SECTION ONLY:
-                - DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, etc.). Generate ONLY the Section B content.
-                - Start directly with "**Section B [20 marks]**" or "Section B [20 marks]".
-                
-                *** OFFICIAL SYLLABUS REQUIREMENT: Text 3 MUST be NARRATIVE in nature ***
-                
-                PASSAGE TYPE - NARRATIVE (Story or Recount):
-                - Generate a NARRATIVE passage (~600–650 words) - this is a STORY or personal RECOUNT
-                - The passage should have characters, settings, events, and/or conflict
-                - Examples: A personal experience, a short story, an adventure, a memoir excerpt, a biographical recount
-                - NOT an expository essay, NOT an argumentative text, NOT an informational article
-                - Include clear PARAGRAPH numbering (Paragraph 1, 2, 3, etc.)
-                
-                NARRATIVE ELEMENTS TO INCLUDE:
-                - Setting: Where and when the story takes place
-                - Character(s): At least one main character with some development
-                - Plot: A clear sequence of events with beginning, middle, end
-                - Conflict or challenge: Something the character(s) must face
-                - Resolution: How things turn out
-                - Descriptive language: Sensory details, imagery, figurative language
-                
-                QUESTION NUMBERING - CRITICAL:
-                - Section A has Questions 1-4 (visual text)
-                - Section B MUST start at Question 5 and continue: 5, 6, 7, 8, 9, 10
-                - DO NOT restart numbering at 1
-
-                REQUIRED QUESTION TYPES FOR NARRATIVE (Q5-Q10):
-                
-                Q5-Q6: Literal retrieval about the narrative (2 questions, 2 marks each)
-                  - "Based on Paragraph X, what TWO things did the narrator notice when...?"
-                  - "According to the passage, why did [character] decide to...?"
-                  - "What happened after [event]?"
-                  - "State two feelings the narrator experienced during..."
-                
-                Q7: Vocabulary-in-context (1 mark)
-                  - "Give one word from Paragraph X that suggests [feeling/atmosphere/action]..."
-                  - "What word in the passage conveys [meaning]...?"
-                
-                Q8: Writer's craft / Language effect (2 marks)
-                  - NARRATIVE-FOCUSED PHRASING:
-                  - "How does the writer create tension/suspense in Paragraph X?"
-                  - "How does the phrase '[exact quote]' contribute to the mood of the passage?"
-                  - "What is the effect of the writer's description of [scene/character]?"
-                  - "How does the writer convey the character's emotions through [technique]?"
-                
-                Q9: Evaluative/Opinion about the narrative (2-3 marks)
-                  - "What do you think the narrator learned from this experience? Explain with evidence."
-                  - "Do you think [character's decision] was the right choice? Explain your view."
-                  - "What does this story suggest about [theme]?"
-                
-                Q10: Sequence Flowchart (4 marks) - STORY SEQUENCE, not themes
-                  - For NARRATIVE passages, the flowchart shows the SEQUENCE OF EVENTS
-                  - Structure: What happened first → What happened next → Then → Finally
-                  - Provide 6 options, students choose 4 that show correct order of events
-
-                FINAL QUESTION - SEQUENCE FLOWCHART (Q10, worth 4 marks):
-
-                *** FOR NARRATIVE: Track the SEQUENCE OF EVENTS across paragraphs ***
-
-                FLOWCHART DESIGN FOR NARRATIVE:
-                
-                The flowchart should trace the story's plot sequence:
-                - Box 1: Event/situation from Paragraph 1-2 (beginning)
-                - Box 2: Event/development from Paragraph 2-3 (rising action)
-                - Box 3: Event/climax from Paragraph 3-4 (middle/turning point)
-                - Box 4: Event/resolution from Paragraph 4-5 (end)
-                
-                FLOWCHART OPTIONS - Create 6 event descriptions:
-                - 4 CORRECT options: Each summarizes a key event from a specific part of the story
-                - 2 DISTRACTOR options: Events that did NOT happen or happen in wrong order
-                
-                EXAMPLE FOR NARRATIVE:
-
-                Story about a student's first day at a new school:
-                - Para 1-2: Nervous arrival, looking at unfamiliar faces
-                - Para 2-3: First class, struggles to find the classroom
-                - Para 3-4: Makes an unexpected friend during lunch
-                - Para 4-5: Realizes the new school might not be so bad
-
-                Options (showing story sequence):
-                A. The narrator felt anxious while entering the school gates (→ Beginning)
-                B. The narrator immediately felt welcomed by everyone (DISTRACTOR - not what happened)
-                C. The narrator got lost trying to find the first classroom (→ Rising action)
-                D. A classmate invited the narrator to sit together at lunch (→ Middle)
-                E. The narrator decided to transfer to another school (DISTRACTOR - not what happened)
-                F. The narrator felt hopeful about the days ahead (→ Resolution)
-
-                ===FLOWCHART_ANSWER_KEY_START===
-                Box 1 (Beginning): A (reason: describes initial nervousness in Para 1-2)
-                Box 2 (Rising action): C (reason: describes getting lost in Para 2-3)
-                Box 3 (Middle): D (reason: describes making friend in Para 3-4)
-                Box 4 (Resolution): F (reason: describes final positive outlook in Para 4-5)
-                Distractors: B, E (B: contradicts initial feelings; E: not stated in passage)
-                ===FLOWCHART_ANSWER_KEY_END===
-                """
-            ),
-            "section_c": dedent(
-                """\
-                Generate Paper 2 Section C [25 marks] (Guided Comprehension + Summary), SINGLE SECTION ONLY:
-                - DO NOT include headers, footers, or paper metadata (MINISTRY OF EDUCATION, candidate info, etc.). Generate ONLY the Section C content.
-                - Start directly with "**Section C [25 marks]**" or "Section C [25 marks]".
-                
-                *** OFFICIAL SYLLABUS REQUIREMENT: Text 4 MUST be NON-NARRATIVE in nature ***
-                
-                - Provide a NON-NARRATIVE passage (~550–650 words) with paragraph numbers
-                - NON-NARRATIVE means: expository, argumentative, informational, explanatory, persuasive
-                - NOT a story, NOT a personal recount, NOT fiction
-                - Section B is NARRATIVE (story), so Section C must be NON-NARRATIVE (factual/informational)
-                - Do NOT reuse Section B's theme
-
-                QUESTION NUMBERING - CRITICAL:
-                - Section C continues from Section B (which ends at Q10)
-                - Section C questions are: Q11, Q12, Q13, Q14 (comprehension) and Q15 (summary)
-                - Do NOT restart at Q1
-
-                COMPREHENSION QUESTIONS (Q11-Q14, 10 marks total):
-                
-                ALLOWED QUESTION TYPES:
-                1. Literal Retrieval [1-2 marks]
-                   - "What are two benefits of...?" 
-                   - "According to Paragraph X, what/why/how...?"
-                   - "State one reason..."
-
-                2. Explanation/Reasoning [2 marks]
-                   - "How does the writer show that X is important in Paragraph Y?"
-                   - "Explain how X contributes to Y according to the passage."
-                   - CLEAR PHRASING - avoid vague "influence" questions
-
-                3. Vocabulary-in-Context [1 mark]
-                   - "Give one word from Paragraph X that means '...'."
-
-                4. Cause-Effect [2 marks]
-                   - "What effect does X have on Y?"
-
-                DO NOT INCLUDE:
-                ✗ "Based on your own knowledge..."
-                ✗ "Do you agree...? Justify with your own views"
-                ✗ Open-ended evaluative questions
-                ✗ Writer's tone/attitude analysis
-
-                SUMMARY TASK (Q15, 15 marks):
-                
-                PASSAGE DESIGN FOR SUMMARY:
-                - The summary paragraphs MUST contain AT LEAST 10 DISTINCT summarisable points
-                - Each point should be a separate fact, benefit, feature, or idea
-                - Points should be clearly identifiable (not buried in complex sentences)
-
-                PARAGRAPH RANGE FOR SUMMARY:
-                - Use a SUBSET of paragraphs, NOT all paragraphs
-                - CORRECT: "Paragraphs 2-5" or "Paragraphs 2-4" (specific body paragraphs)
-                - AVOID: "Paragraphs 1-6" (too broad, includes intro and conclusion)
-                - The subset should contain the main content paragraphs with summarisable points
-                - Introduction (Para 1) and Conclusion (final para) typically excluded
-
-                FORMAT:
-                "15. Summary Task [15 marks]
-
-                Using your own words as far as possible, summarise [specific focus] as described in Paragraphs X-Y.
-
-                Your summary must be in continuous writing (not note form) and should not be longer than 80 words, including the 10 words given below to help you begin.
-
-                [Starting line with approximately 10 words]..."
-
-                EXAMPLE:
-                "Using your own words as far as possible, summarise the benefits of civic engagement as described in Paragraphs 2-5.
-                
-                Your summary must be in continuous writing (not note form) and should not be longer than 80 words, including the 10 words given below to help you begin.
-                
-                Civic engagement benefits communities and individuals in several ways..."
-
-                MARK BREAKDOWN (internal, not shown to students):
-                - Content: 8 marks (1 mark per key point, max 8)
-                - Language: 7 marks (paraphrasing quality, fluency, coherence)
-
-                - Ensure total marks are exactly 25 (10 for Q11-Q14 + 15 for Q15).
-                """
-            ),
-        },
-        "oral": {
-            None: dedent(
-                """\
-                Generate a complete GCE O-Level Oral Communication examination with ALL THREE components:
-
-                COMPONENT 1: READING ALOUD [10 marks]
-                - Provide ONE prose passage of 300-400 words
-                - Topic should be contemporary and engaging (technology, environment, social issues, culture)
-                - Include a mix of sentence structures: simple, compound, and complex
-                - Include dialogue or direct speech (1-2 instances)
-                - Include numbers, dates, or statistics that require clear articulation
-                - Include words with varied stress patterns and challenging pronunciations
-                - Mark the passage with suggested pause points using "/" for short pauses and "//" for longer pauses
-                - Note any challenging words in brackets with pronunciation guidance
-
-                COMPONENT 2: STIMULUS-BASED CONVERSATION (SBC) [20 marks]
-                - Provide a VISUAL STIMULUS description (poster, infographic, or advertisement)
-                - The visual should relate to a contemporary issue or topic
-                - Include key visual elements: headings, statistics, images described, callouts
-                - After the visual, provide 4 DISCUSSION PROMPTS:
-                  • Q1: Direct reference to stimulus content (literal/factual)
-                  • Q2: Personal opinion/experience related to stimulus theme
-                  • Q3: Broader implications/analysis of the issue
-                  • Q4: Hypothetical scenario or solution-based question
-                - Include examiner notes with potential follow-up probes
-
-                COMPONENT 3: GENERAL CONVERSATION [20 marks]
-                - Provide 5 CONVERSATION THEMES, each with:
-                  • Theme title (e.g., "Technology & Daily Life")
-                  • 3-4 guiding questions per theme
-                  • Questions should progress: factual → personal → analytical → evaluative
-                - Themes should cover diverse areas: personal, social, educational, global
-                - Include examiner guidance on follow-up questions
-
-                FORMAT REQUIREMENTS:
-                - Clear section headers for each component
-                - Timing guidance (Reading: 10 min prep, 2 min read; SBC: 10 min; Conversation: 10 min)
-                - Candidate instructions at the start of each section
-                """
-            ),
-            "reading_aloud": dedent(
-                """\
-                Generate ONLY the READING ALOUD component [10 marks] of the Oral Examination:
-
-                PASSAGE REQUIREMENTS:
-                - Length: 300-400 words of continuous prose
-                - Topic: Contemporary and relevant (technology, environment, health, social issues, culture, travel)
-                - Tone: Narrative, descriptive, or expository (NOT argumentative for reading aloud)
-
-                LINGUISTIC FEATURES TO INCLUDE:
-                - Variety of sentence lengths and structures
-                - 1-2 instances of direct speech or dialogue
-                - Numbers, dates, percentages, or statistics (e.g., "67 percent", "2.5 million", "1997")
-                - Proper nouns and place names requiring clear pronunciation
-                - Words with challenging stress patterns or pronunciations
-                - Emotive or descriptive vocabulary
-                - Connectives and transitional phrases
-
-                FORMAT:
-                - Start with "READING ALOUD [10 marks]" header
-                - Include timing: "Preparation time: 10 minutes | Reading time: Approximately 2 minutes"
-                - Title the passage appropriately
-                - Present the passage in clear paragraphs
-                - After the passage, include:
-                  • "Pronunciation Guide:" section with 3-5 challenging words and their phonetic hints
-                  • "Suggested Pause Points:" brief guidance on natural pausing
-
-                DIFFICULTY CALIBRATION:
-                - Foundational: Simpler vocabulary, shorter sentences, familiar topics
-                - Standard: Balanced complexity, varied structures, contemporary topics
-                - Advanced: Sophisticated vocabulary, complex structures, nuanced topics
-                """
-            ),
-            "sbc": dedent(
-                """\
-                Generate ONLY the STIMULUS-BASED CONVERSATION (SBC) component [20 marks]:
-
-                VISUAL STIMULUS REQUIREMENTS:
-                - Describe a visual stimulus in detail (poster, infographic, advertisement, or webpage)
-                - Topic: Contemporary issue relevant to students (social media, environment, education, health, technology)
-                - Include these elements in your description:
-                  • Main heading/title
-                  • Key statistics or facts (at least 2-3)
-                  • Visual elements (images, icons, graphics - describe what they show)
-                  • Callout boxes or highlighted information
-                  • Any slogans, taglines, or quotes
-                  • Organization/source attribution
-
-                DISCUSSION PROMPTS (4 questions):
-
-                Question 1 - Stimulus-Based (Factual):
-                - Direct reference to information in the visual
-                - E.g., "According to the infographic, what is the main cause of...?"
-                - Should be answerable from the stimulus content
-
-                Question 2 - Personal Response:
-                - Connects stimulus theme to candidate's experience/opinion
-                - E.g., "How do you personally feel about...?" or "In your experience, have you...?"
-
-                Question 3 - Analysis/Implications:
-                - Broader thinking about the issue
-                - E.g., "Why do you think this is becoming more common...?" or "What are the consequences of...?"
-
-                Question 4 - Hypothetical/Solution:
-                - Forward-thinking or problem-solving
-                - E.g., "If you were in charge of..., what would you do?" or "How might we address...?"
-
-                EXAMINER NOTES:
-                - Include 2-3 potential follow-up probes for each question
-                - Note areas to explore if candidate gives brief responses
-
-                FORMAT:
-                - Start with "STIMULUS-BASED CONVERSATION [20 marks]" header
-                - Include timing: "Discussion time: Approximately 10 minutes"
-                - Present visual stimulus description in a bordered/highlighted section
-                - Number questions clearly as Q1, Q2, Q3, Q4
-                """
-            ),
-            "conversation": dedent(
-                """\
-                Generate ONLY the GENERAL CONVERSATION component [20 marks]:
-
-                THEME REQUIREMENTS:
-                - Provide EXACTLY 5 conversation themes
-                - Themes should be diverse and age-appropriate for O-Level students (15-17 years)
-                - Each theme should allow for personal, analytical, and evaluative responses
-
-                SUGGESTED THEME CATEGORIES (choose 5):
-                1. Personal & Family: relationships, responsibilities, values
-                2. School & Education: learning, teachers, future plans
-                3. Friends & Social Life: friendships, peer pressure, socializing
-                4. Technology & Media: social media, gaming, digital life
-                5. Environment & Society: sustainability, community, social issues
-                6. Health & Lifestyle: wellbeing, sports, habits
-                7. Culture & Traditions: festivals, customs, identity
-                8. Future & Aspirations: career, goals, dreams
-                9. Travel & Experiences: places, adventures, memories
-                10. Current Affairs: news, global issues, local matters
-
-                FOR EACH THEME, PROVIDE:
-
-                Theme Title: [Clear, engaging title]
-
-                Questions (3-4 per theme, progressing in complexity):
-                1. Factual/Personal: Simple question about candidate's experience
-                   E.g., "Tell me about your family" or "What do you enjoy doing in your free time?"
-
-                2. Descriptive/Explanatory: Requires more detail
-                   E.g., "Describe a memorable experience..." or "Explain why you feel..."
-
-                3. Analytical: Requires reasoning or comparison
-                   E.g., "Why do you think young people...?" or "How has this changed over time?"
-
-                4. Evaluative/Hypothetical: Requires judgement or speculation
-                   E.g., "What would you do if...?" or "Do you think this is a good development?"
-
-                EXAMINER GUIDANCE:
-                - For each theme, include 2-3 follow-up prompts
-                - Note how to encourage elaboration if responses are brief
-                - Suggest areas to probe for more depth
-
-                FORMAT:
-                - Start with "GENERAL CONVERSATION [20 marks]" header
-                - Include timing: "Conversation time: Approximately 10 minutes"
-                - Use "THEME 1:", "THEME 2:", etc. as headers
-                - Number questions within each theme
-                - Place examiner notes in italics or brackets
-                """
-            ),
-        },
-    }
-
-    guidance_map = base_guidance.get(paper_format, {})
+    guidance_map = _BASE_GUIDANCE.get(paper_format, {})
     section_key = section if section in guidance_map else None
-    guidance = guidance_map.get(section_key)
-    if not guidance:
-        return "Follow the standard format for the selected paper."
-    return guidance.strip()
+    return guidance_map.get(section_key) or "Follow the standard format for the selected paper."
+
 
+# Reference excerpts snapshotted at sync time; lives outside texts/, which sync cleans up
+_REFERENCE_CACHE_PATH = settings.storage_root / "reference_excerpts.json"
+_REFERENCE_EXCERPT_CHARS = 1000
 
-def _load_reference_excerpt(paper_format: str, max_chars: int = 1000) -> Optional[str]:
+
+def _load_reference_excerpt(paper_format: str, max_chars: int = _REFERENCE_EXCERPT_CHARS) -> Optional[str]:
     """
     Load a small excerpt from an existing parsed paper to guide tone/structure.
     Chooses a Paper 1 or Paper 2 reference based on the requested format.
     """
+    cache_key = "paper_1" if paper_format == "paper_1" else "paper_2"
+    cached = _load_reference_cache().get(cache_key)
+    if cached and max_chars <= _REFERENCE_EXCERPT_CHARS:
+        return cached[:max_chars]
     try:
-        texts_dir = settings.ocr_output_dir
-        if not texts_dir.exists():
-            return None
-        # Heuristic filename filters
-        target_key = "Paper-1" if paper_format == "paper_1" else "Paper-2"
-        candidates: List[Path] = []
-        for path in texts_dir.rglob("*.txt"):
-            name = path.name
-            if target_key in name:
-                candidates.append(path)
-        if not candidates:
-            # fallback: any .txt
-            candidates = list(texts_dir.rglob("*.txt"))
-        if not candidates:
-            return None
-        # pick the newest by modified time
-        candidates.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-        ref = candidates[0]
-        content = ref.read_text(encoding="utf-8", errors="ignore").strip()
-        if not content:
+        if not settings.ocr_output_dir.exists():
             return None
-        return content[:max_chars]
+        # Not memoized: only reached before the first sync writes the JSON cache
+        return _scan_reference_excerpt(paper_format, max_chars)
     except Exception:
         return None
 
 
+@lru_cache(maxsize=1)
+def _load_reference_cache() -> Dict[str, str]:
+    try:
+        return json.loads(_REFERENCE_CACHE_PATH.read_bytes())
+    except (OSError, ValueError):
+        return {}
+
+
+def refresh_reference_cache() -> Dict[str, str]:
+    """Rescan parsed papers and persist one reference excerpt per paper format.
+
+    Called by the sync pipeline while freshly parsed texts are still on disk.
+    Formats with no usable text keep their previously cached excerpt.
+    """
+    texts_dir = settings.ocr_output_dir
+    excerpts = dict(_load_reference_cache())
+    if texts_dir.exists():
+        for paper_format in ("paper_1", "paper_2"):
+            excerpt = _scan_reference_excerpt(paper_format, _REFERENCE_EXCERPT_CHARS)
+            if excerpt:
+                excerpts[paper_format] = excerpt
+    _REFERENCE_CACHE_PATH.write_text(json.dumps(excerpts, ensure_ascii=False), encoding="utf-8")
+    _load_reference_cache.cache_clear()
+    return excerpts
+
+
+def _iter_txt(root: str) -> Iterable[os.DirEntry]:
+    """Recursively yield .txt entries under root; DirEntry caches stat results from the scan."""
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _iter_txt(entry.path)
+            elif entry.name.endswith(".txt") and entry.is_file():
+                yield entry
+
+
+def _scan_reference_excerpt(paper_format: str, max_chars: int) -> Optional[str]:
+    # Heuristic filename filters
+    target_key = "Paper-1" if paper_format == "paper_1" else "Paper-2"
+    # Single pass: track the newest matching file and the newest file overall (fallback)
+    best_match: Optional[Tuple[float, str]] = None
+    best_any: Optional[Tuple[float, str]] = None
+    for entry in _iter_txt(os.fspath(settings.ocr_output_dir)):
+        candidate = (entry.stat().st_mtime, entry.path)
+        if best_any is None or candidate[0] > best_any[0]:
+            best_any = candidate
+        if target_key in entry.name and (best_match is None or candidate[0] > best_match[0]):
+            best_match = candidate
+    best = best_match or best_any
+    if best is None:
+        return None
+    # Only read what the excerpt can use (UTF-8 needs at most 4 bytes per character)
+    with open(best[1], "rb") as handle:
+        content = handle.read(max_chars * 4).decode("utf-8", errors="ignore").strip()
+    if not content:
+        return None
+    return content[:max_chars]
+
+
+_openai_client: Optional[OpenAI] = None
+_openai_client_lock = threading.Lock()
+
+
 def _ensure_openai_client(client: Optional[OpenAI] = None) -> OpenAI:
+    global _openai_client
     if client is not None:
         return client
 
@@ -1118,7 +1244,148 @@ def _ensure_openai_client(client: Optional[OpenAI] = None) -> OpenAI:
             "OpenAI API key is not configured. Set the OPENAI_API_KEY environment variable."
         )
 
-    return OpenAI(api_key=api_key)
+    # One client per process so the connection pool (and its TLS sessions) is reused across generations
+    with _openai_client_lock:
+        if _openai_client is None:
+            _openai_client = OpenAI(
+                api_key=api_key,
+                http_client=httpx.Client(
+                    limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+                    timeout=httpx.Timeout(600.0, connect=10.0),
+                ),
+            )
+        return _openai_client
+
+
+_created_dirs: set = set()
+_created_dirs_lock = threading.Lock()
+
+
+def _ensure_dir(path: Path) -> None:
+    """mkdir -p, remembering directories already created by this process to skip repeat syscalls."""
+    if path in _created_dirs:
+        return
+    with _created_dirs_lock:
+        path.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(path)
+
+
+_BOLD_RE = re.compile(r"\*\*(.+?)\*\*")
+
+# One alternative per line kind; the named group that matched (m.lastgroup) is the kind
+# and its text is the payload. Anything else, including blank lines, is "text".
+_PDF_LINE_RE = re.compile(
+    r"^[ \t]*(?:"
+    r"\#[ \t]+(?P<h1>.*?)"
+    r"|\#\#[ \t]+(?P<h2>.*?)"
+    r"|(?P<section>section[ ][abc].*?)"
+    r"|[-*][ \t]+(?P<bullet>\S.*?)"
+    r"|\d+[.)][ \t]+(?P<numbered>\S.*?)"
+    r"|(?P<text>.*?)"
+    r")[ \t\r]*$",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+
+_XML_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+_XML_ESCAPE_RE = re.compile(r"[&<>]")
+
+
+@lru_cache(maxsize=2048)
+def _bold_markup(line: str) -> str:
+    """Escape XML specials, then convert **bold** pairs to <b>bold</b>; a trailing unmatched
+    marker is left as-is.
+
+    Memoized: headings, instructions and answer labels recur across papers rendered in
+    the same worker. Paragraphs themselves are still built fresh per story.
+    """
+    line = _XML_ESCAPE_RE.sub(lambda m: _XML_ESCAPES[m.group()], line)
+    if "**" not in line:
+        return line
+    return _BOLD_RE.sub(r"<b>\1</b>", line)
+
+
+# Answer-space labels are identical for every P1 Section A paper
+_ANSWER_LABELS = tuple(f"{i}." for i in range(1, 13))
+
+
+class AnswerLines(Flowable):
+    """Numbered answer rules drawn straight onto the canvas.
+
+    The answer spaces are a fixed, single-page layout, so this skips the
+    generic Table layout/split machinery entirely.
+    """
+
+    def __init__(self, count: int = 12, line_height: float = 18, label_width: float = 10 * mm) -> None:
+        super().__init__()
+        self.count = count
+        self.line_height = line_height
+        self.label_width = label_width
+
+    def wrap(self, availWidth: float, availHeight: float) -> Tuple[float, float]:
+        self.width = availWidth
+        self.height = self.count * self.line_height
+        return self.width, self.height
+
+    def draw(self) -> None:
+        canv = self.canv
+        canv.setFont("Times-Roman", 11)
+        canv.setLineWidth(0.5)
+        labels = _ANSWER_LABELS if self.count <= len(_ANSWER_LABELS) else [f"{i}." for i in range(1, self.count + 1)]
+        for i in range(self.count):
+            y = self.height - (i + 1) * self.line_height + 4
+            canv.drawString(0, y, labels[i])
+            canv.line(self.label_width, y, self.width, y)
+
+
+# Paragraph and table styles are never mutated by doc.build, so build them once and share across renders
+_STYLES = getSampleStyleSheet()
+_BASE_STYLE = ParagraphStyle(
+    "Base",
+    parent=_STYLES["Normal"],
+    fontName="Times-Roman",
+    fontSize=11,
+    leading=15,
+    spaceAfter=6,
+)
+_H1_STYLE = ParagraphStyle(
+    "Heading1",
+    parent=_BASE_STYLE,
+    fontName="Times-Bold",
+    fontSize=16,
+    leading=20,
+    spaceBefore=6,
+    spaceAfter=10,
+)
+_H2_STYLE = ParagraphStyle(
+    "Heading2",
+    parent=_BASE_STYLE,
+    fontName="Times-Bold",
+    fontSize=13,
+    leading=17,
+    spaceBefore=6,
+    spaceAfter=8,
+)
+_SECTION_STYLE = ParagraphStyle(
+    "Section",
+    parent=_BASE_STYLE,
+    fontName="Times-Bold",
+    fontSize=12,
+    leading=16,
+    spaceBefore=8,
+    spaceAfter=8,
+)
+_P1_SECTION_A_TABLE_STYLE = TableStyle(
+    [
+        ("FONTNAME", (0, 0), (-1, 0), "Times-Bold"),
+        ("FONTSIZE", (0, 0), (-1, 0), 11),
+        ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+        ("FONTNAME", (0, 1), (-1, -1), "Times-Roman"),
+        ("FONTSIZE", (0, 1), (-1, -1), 11),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("ALIGN", (0, 1), (0, -1), "RIGHT"),
+    ]
+)
 
 
 def _render_pdf(text: str, output_path: Path, *, paper_format: Optional[str] = None, section: Optional[str] = None) -> None:
@@ -1126,14 +1393,13 @@ def _render_pdf(text: str, output_path: Path, *, paper_format: Optional[str] = N
     Render text to PDF using ReportLab Platypus (A4, styled paragraphs, lists) to avoid overflow
     and approximate official exam layout more closely.
     """
-    output_path.parent.mkdir(parents=True, exist_ok=True)
-
-    # Document setup: A4 with comfortable margins
+    # Document setup: A4 with comfortable margins; build in memory and write the file once
+    buf = BytesIO()
     left_margin = right_margin = 20 * mm
     top_margin = 20 * mm
     bottom_margin = 20 * mm
     doc = SimpleDocTemplate(
-        str(output_path),
+        buf,
         pagesize=A4,
         leftMargin=left_margin,
         rightMargin=right_margin,
@@ -1143,58 +1409,13 @@ def _render_pdf(text: str, output_path: Path, *, paper_format: Optional[str] = N
         author="GCE English Backend",
     )
 
-    # Styles
-    styles = getSampleStyleSheet()
-    base = ParagraphStyle(
-        "Base",
-        parent=styles["Normal"],
-        fontName="Times-Roman",
-        fontSize=11,
-        leading=15,
-        spaceAfter=6,
-    )
-    h1 = ParagraphStyle(
-        "Heading1",
-        parent=base,
-        fontName="Times-Bold",
-        fontSize=16,
-        leading=20,
-        spaceBefore=6,
-        spaceAfter=10,
-    )
-    h2 = ParagraphStyle(
-        "Heading2",
-        parent=base,
-        fontName="Times-Bold",
-        fontSize=13,
-        leading=17,
-        spaceBefore=6,
-        spaceAfter=8,
-    )
-    section_style = ParagraphStyle(
-        "Section",
-        parent=base,
-        fontName="Times-Bold",
-        fontSize=12,
-        leading=16,
-        spaceBefore=8,
-        spaceAfter=8,
-    )
-
     def _to_paragraph(text_line: str, style: ParagraphStyle) -> Paragraph:
-        # Minimal inline bold: convert **bold** to <b>bold</b>
-        # This is a simple pass; avoids unmatched markers
-        line = text_line
-        parts = line.split("**")
-        if len(parts) >= 3 and len(parts) % 2 == 1:
-            rebuilt = []
-            for i, p in enumerate(parts):
-                if i % 2 == 1:
-                    rebuilt.append(f"<b>{p}</b>")
-                else:
-                    rebuilt.append(p)
-            line = "".join(rebuilt)
-        return Paragraph(line, style)
+        return Paragraph(_bold_markup(text_line), style)
+
+    def _build(flowables: List[object]) -> None:
+        doc.build(flowables)
+        _ensure_dir(output_path.parent)
+        output_path.write_bytes(buf.getvalue())
 
     story: List[object] = []
 
@@ -1202,141 +1423,150 @@ def _render_pdf(text: str, output_path: Path, *, paper_format: Optional[str] = N
     if paper_format in {"paper_1", "paper_2"}:
         code = "1128/01" if paper_format == "paper_1" else "1128/02"
         title = "Paper 1 Writing" if paper_format == "paper_1" else "Paper 2 Comprehension"
-        story.append(_to_paragraph("MINISTRY OF EDUCATION, SINGAPORE", h2))
-        story.append(_to_paragraph("in collaboration with", base))
-        story.append(_to_paragraph("UNIVERSITY OF CAMBRIDGE LOCAL EXAMINATIONS SYNDICATE", h2))
+        story.append(_to_paragraph("MINISTRY OF EDUCATION, SINGAPORE", _H2_STYLE))
+        story.append(_to_paragraph("in collaboration with", _BASE_STYLE))
+        story.append(_to_paragraph("UNIVERSITY OF CAMBRIDGE LOCAL EXAMINATIONS SYNDICATE", _H2_STYLE))
         story.append(Spacer(1, 6))
-        story.append(_to_paragraph("General Certificate of Education Ordinary Level", base))
-        story.append(_to_paragraph("ENGLISH LANGUAGE", h2))
-        story.append(_to_paragraph(code, base))
-        story.append(_to_paragraph(title, base))
+        story.append(_to_paragraph("General Certificate of Education Ordinary Level", _BASE_STYLE))
+        story.append(_to_paragraph("ENGLISH LANGUAGE", _H2_STYLE))
+        story.append(_to_paragraph(code, _BASE_STYLE))
+        story.append(_to_paragraph(title, _BASE_STYLE))
         story.append(Spacer(1, 10))
 
     # Specialized formatting for P1 Section A numbered 12-line passage + answer spaces
     def _try_render_p1_section_a(lines: List[str]) -> Optional[List[object]]:
-        if not (paper_format == "paper_1" and (section == "section_a" or "Section A" in text or "Section A" in "\n".join(lines[:5]))):
+        # Parse the numbered lines ("1. text" .. "12. text") straight into the table rows
+        data = [["Line", "Text"]] + [[str(i), ""] for i in range(1, 13)]
+        for s in lines:
+            dot_idx = s.find(".", 1, 3)
+            if dot_idx == -1 or not s[:dot_idx].isdigit() or s[dot_idx + 1:dot_idx + 2] != " ":
+                continue
+            num = int(s[:dot_idx])
+            # First occurrence wins
+            if 1 <= num <= 12 and not data[num][1]:
+                data[num][1] = s[dot_idx + 2:].strip()
+        if not all(row[1] for row in data[1:]):
             return None
-        # Extract 12 numbered lines in the form "1. text"
-        numbered = []
-        for raw in lines:
-            s = raw.strip()
-            if len(s) >= 3 and s[0].isdigit() and s[1] == "." and s[2] == " ":
-                try:
-                    num = int(s.split(".", 1)[0])
-                except ValueError:
-                    continue
-                content = s.split(".", 1)[1].strip()
-                numbered.append((num, content))
-        nums = [n for n, _ in numbered]
-        if not (len(numbered) >= 12 and set(range(1, 13)).issubset(set(nums))):
-            return None
-        # Build a table for the 12 lines
-        data = [["Line", "Text"]]
-        for idx in range(1, 13):
-            content = next((c for n, c in numbered if n == idx), "")
-            data.append([str(idx), content])
         tbl = Table(data, colWidths=[20 * mm, doc.width - 20 * mm])
-        tbl.setStyle(
-            TableStyle(
-                [
-                    ("FONTNAME", (0, 0), (-1, 0), "Times-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, 0), 11),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                    ("FONTNAME", (0, 1), (-1, -1), "Times-Roman"),
-                    ("FONTSIZE", (0, 1), (-1, -1), 11),
-                    ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
-                    ("ALIGN", (0, 1), (0, -1), "RIGHT"),
-                ]
-            )
-        )
+        tbl.setStyle(_P1_SECTION_A_TABLE_STYLE)
         output: List[object] = []
-        output.append(_to_paragraph("Section A [10 marks] (Editing)", section_style))
+        output.append(_to_paragraph("Section A [10 marks] (Editing)", _SECTION_STYLE))
         output.append(tbl)
         output.append(Spacer(1, 8))
         # Answer spaces
-        answer_rows = []
-        for i in range(1, 13):
-            answer_rows.append([f"{i}.", "_" * 80])
-        ans_tbl = Table(answer_rows, colWidths=[10 * mm, doc.width - 10 * mm])
-        ans_tbl.setStyle(
-            TableStyle(
-                [
-                    ("FONTNAME", (0, 0), (-1, -1), "Times-Roman"),
-                    ("FONTSIZE", (0, 0), (-1, -1), 11),
-                    ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
-                ]
-            )
-        )
-        output.append(_to_paragraph("Answer Spaces:", base))
-        output.append(ans_tbl)
+        output.append(_to_paragraph("Answer Spaces:", _BASE_STYLE))
+        output.append(AnswerLines(12))
         return output
 
-    # Parse lines into flowables with simple rules
-    lines = text.splitlines()
-
-    # If this looks like P1 Section A, try the exact table layout
-    p1a = _try_render_p1_section_a(lines)
-    if p1a:
-        story.extend(p1a)
-        doc.build(story)
-        return
-    i = 0
-    while i < len(lines):
-        raw = lines[i].rstrip()
-        if not raw.strip():
-            story.append(Spacer(1, 4))
-            i += 1
+    # If this is a P1 Section A render, try the exact table layout
+    if paper_format == "paper_1" and section == "section_a":
+        p1a = _try_render_p1_section_a([ln.strip() for ln in text.splitlines()])
+        if p1a:
+            story.extend(p1a)
+            _build(story)
+            return
+
+    # Classify every line in one regex pass, then walk the tokens with a one-token
+    # lookahead so list blocks can absorb their items
+    it = ((m.lastgroup, m.group(m.lastgroup)) for m in _PDF_LINE_RE.finditer(text.rstrip("\r\n")))
+    token = next(it, None)
+    while token is not None:
+        kind, value = token
+
+        # Collapse a run of blank lines into one spacer
+        if kind == "text" and not value:
+            blank_run = 0
+            while token is not None and token == ("text", ""):
+                blank_run += 1
+                token = next(it, None)
+            story.append(Spacer(1, min(4 * blank_run, 20)))
             continue
 
-        # Headings via markdown-like markers
-        if raw.startswith("# "):
-            story.append(_to_paragraph(raw[2:].strip(), h1))
-            i += 1
-            continue
-        if raw.startswith("## "):
-            story.append(_to_paragraph(raw[3:].strip(), h2))
-            i += 1
-            continue
-        # Section labels
-        low = raw.lower()
-        if low.startswith("section a") or low.startswith("section b") or low.startswith("section c"):
-            story.append(_to_paragraph(raw.strip(), section_style))
-            i += 1
-            continue
-
-        # Bulleted list block
-        if raw.lstrip().startswith(("- ", "* ")):
+        # Bulleted / numbered list blocks
+        if kind in {"bullet", "numbered"}:
             items: List[ListItem] = []
-            while i < len(lines):
-                line = lines[i].rstrip()
-                if line.lstrip().startswith(("- ", "* ")):
-                    content = line.lstrip()[2:].strip()
-                    items.append(ListItem(_to_paragraph(content, base)))
-                    i += 1
-                else:
-                    break
-            story.append(ListFlowable(items, bulletType="bullet", bulletFontName="Times-Roman"))
+            while token is not None and token[0] == kind:
+                items.append(ListItem(_to_paragraph(token[1], _BASE_STYLE)))
+                token = next(it, None)
+            if kind == "bullet":
+                story.append(ListFlowable(items, bulletType="bullet", bulletFontName="Times-Roman"))
+            else:
+                story.append(ListFlowable(items, bulletType="1"))
             continue
 
-        # Numbered list block like "1. "
-        stripped = raw.lstrip()
-        if len(stripped) > 3 and stripped[0].isdigit() and stripped[1] in {".", ")"} and stripped[2] == " ":
-            items: List[ListItem] = []
-            while i < len(lines):
-                cand = lines[i].lstrip()
-                if len(cand) > 3 and cand[0].isdigit() and cand[1] in {".", ")"} and cand[2] == " ":
-                    items.append(ListItem(_to_paragraph(cand[3:].strip(), base)))
-                    i += 1
-                else:
-                    break
-            story.append(ListFlowable(items, bulletType="1"))
-            continue
+        if kind == "h1":
+            story.append(_to_paragraph(value, _H1_STYLE))
+        elif kind == "h2":
+            story.append(_to_paragraph(value, _H2_STYLE))
+        elif kind == "section":
+            story.append(_to_paragraph(value, _SECTION_STYLE))
+        else:
+            # Default paragraph: keep the raw line for now, built in one pass below
+            story.append(value)
+        token = next(it, None)
+
+    story = [Paragraph(_bold_markup(item), _BASE_STYLE) if isinstance(item, str) else item for item in story]
+    _build(story)
+
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """Lazily start the shared process pool used for CPU-bound ReportLab layout."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            # spawn: workers must not inherit the request threads/locks of this process
+            _render_pool = ProcessPoolExecutor(
+                max_workers=min(os.cpu_count() or 1, 4),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _render_pool
 
-        # Default paragraph
-        story.append(_to_paragraph(raw, base))
-        i += 1
 
-    doc.build(story)
+def _use_reportlab(paper_format: str, *, has_visual: bool) -> bool:
+    """Whether a paper's PDF is rendered straight through ReportLab instead of the HTML template.
+
+    Opt-in via ``settings.pdf_renderer == "reportlab"``: the ReportLab layout has no candidate
+    box, instructions block or watermark, so the template stays the default. Embedded visuals
+    and oral papers always need the HTML pipeline (which also serves as a preview when debugging).
+    """
+    return (
+        settings.pdf_renderer == "reportlab"
+        and paper_format in {"paper_1", "paper_2"}
+        and not has_visual
+    )
+
+
+def _discard_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken render pool so the next _get_render_pool() starts a fresh one."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False)
+
+
+def _submit_render(content: str, pdf_path: Path, paper_format: Optional[str], section: Optional[str]) -> Future:
+    """Queue _render_pdf on the render pool, replacing the pool if a worker has died."""
+    pool = _get_render_pool()
+    try:
+        future = pool.submit(_render_pdf, content, pdf_path, paper_format=paper_format, section=section)
+    except BrokenProcessPool:
+        logger.warning("Render pool is broken; starting a new one")
+        _discard_render_pool(pool)
+        pool = _get_render_pool()
+        future = pool.submit(_render_pdf, content, pdf_path, paper_format=paper_format, section=section)
+
+    def _discard_if_broken(done: Future) -> None:
+        # A worker dying mid-render (OOM, native crash) breaks the pool for every later job
+        if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool):
+            _discard_render_pool(pool)
+
+    future.add_done_callback(_discard_if_broken)
+    return future
 
 
 def _render_html_then_pdf(
@@ -1348,10 +1578,12 @@ def _render_html_then_pdf(
     section: Optional[str],
     visual_image_path: Optional[Path] = None,
     visual_caption: Optional[str] = None,
+    year: Optional[str] = None,
+    write_pdf: bool = True,
 ) -> None:
     # Defaults for header meta if not provided elsewhere
     default_session = "October/November"
-    default_year = str(datetime.utcnow().year)
+    default_year = year or str(datetime.utcnow().year)
     default_duration = "1 hour 50 minutes" if paper_format in {"paper_1", "paper_2"} else None
     watermark = "MINISTRY OF EDUCATION, SINGAPORE"
     render_html_template(
@@ -1366,7 +1598,8 @@ def _render_html_then_pdf(
         visual_image_path=visual_image_path,
         visual_caption=visual_caption,
     )
-    html_to_pdf(html_path, pdf_path)
+    if write_pdf:
+        html_to_pdf(html_path, pdf_path)
 
 
 def generate_paper(
@@ -1385,6 +1618,8 @@ def generate_paper(
     """Generate a synthetic exam paper using the configured LLM."""
 
     llm_client = _ensure_openai_client(client)
+    # Materialize topics once: callers may pass a generator, which get_visual would otherwise exhaust
+    topics_tuple: Optional[Tuple[str, ...]] = tuple(topics or ()) or None
 
     # Auto-visuals for P1 Section B, P2 Section A, and Oral (Stimulus-Based Conversation)
     snapshot: Optional[VisualSnapshot] = None
@@ -1399,7 +1634,7 @@ def generate_paper(
     if wants_visuals and needs_visuals:
         try:
             snapshot, visual_description = get_visual(
-                topics=topics,
+                topics=topics_tuple,
                 paper_format=paper_format,
                 section=section,
                 search_provider=search_provider,
@@ -1407,13 +1642,15 @@ def generate_paper(
         except Exception:
             snapshot, visual_description = None, None
 
+    # Stat the screenshot once; the result also decides whether it is embedded below
+    shot_exists = bool(snapshot and snapshot.screenshot_path and snapshot.screenshot_path.exists())
     if snapshot:
         logger.info(
             "Visual selected",
             url=snapshot.url,
             title=snapshot.title,
             host=snapshot.host,
-            shot_exists=bool(snapshot.screenshot_path and snapshot.screenshot_path.exists()),
+            shot_exists=shot_exists,
         )
 
     # Helper to generate one section at a time with validation and retry
@@ -1422,7 +1659,7 @@ def generate_paper(
             difficulty=difficulty,
             paper_format=paper_format,
             section=sec,
-            topics=topics,
+            topics=topics_tuple,
             additional_instructions=additional_instructions,
         )
         if extra_visual_desc:
@@ -1444,56 +1681,69 @@ def generate_paper(
             pr,
             paper_format=paper_format,
             section=sec,
-            topics=list(topics) if topics else None,
+            topics=topics_tuple,
             difficulty=difficulty,
             max_context_chunks=5,  # Increased for better context
         )
 
-        # Get section-specific temperature
+        # Get section-specific temperature and output cap
         section_temp = _get_section_temperature(paper_format, sec)
+        max_tokens = _get_section_max_tokens(paper_format, sec)
 
         logger.info(
             "Requesting LLM generated paper",
             difficulty=difficulty,
             paper_format=paper_format,
             section=sec,
-            topics=list(topics) if topics else None,
+            topics=topics_tuple,
             temperature=section_temp,
         )
 
+        cache_path = _response_cache_path(pr) if settings.llm_response_cache else None
+        if cache_path is not None and cache_path.exists():
+            logger.info(f"Reusing cached LLM response | section={sec} | key={cache_path.stem[:12]}")
+            return cache_path.read_text(encoding="utf-8"), pr
+
         last_error: Optional[Exception] = None
         last_issues: List[str] = []
 
         for attempt in range(max_retries + 1):
             try:
-                # Build params with section-specific temperature
-                params = {**LLM_COMPLETION_PARAMS, "temperature": section_temp}
-
-                # On retry, slightly increase temperature and add feedback
+                # Section-specific temperature; on retry, slightly increase it and add feedback
+                temperature = section_temp
                 retry_prompt = pr
                 if attempt > 0:
-                    params["temperature"] = min(section_temp + 0.1 * attempt, 0.8)
+                    temperature = min(section_temp + 0.1 * attempt, 0.8)
                     retry_prompt = pr + f"\n\nPREVIOUS ATTEMPT HAD ISSUES: {'; '.join(last_issues)}. Please fix these issues in this attempt."
-                    logger.info(f"Retry attempt {attempt} with adjusted temperature {params['temperature']}")
-
-                response_local = llm_client.chat.completions.create(
-                    model=settings.openai_model,
-                    messages=[
-                        {
-                            "role": "system",
-                            "content": (
-                                "You are an expert curriculum designer creating official-style English "
-                                "examination papers. All content must be written EXCLUSIVELY in English. "
-                                "Never generate content in any other language, including Urdu, Arabic, or any non-English language. "
-                                "Follow the exact format and structure requirements precisely."
-                            ),
-                        },
-                        {"role": "user", "content": retry_prompt},
-                    ],
-                    **params,
-                )
-
-                out = response_local.choices[0].message.content.strip()
+                    logger.info(f"Retry attempt {attempt} with adjusted temperature {temperature}")
+                params = _completion_params(round(temperature, 2), max_tokens)
+
+                # Cap in-flight completions process-wide so parallel sections/requests stay under rate limits
+                with _LLM_SLOTS:
+                    stream = llm_client.chat.completions.create(
+                        model=settings.openai_model,
+                        messages=[
+                            {
+                                "role": "system",
+                                "content": (
+                                    "You are an expert curriculum designer creating official-style English "
+                                    "examination papers. All content must be written EXCLUSIVELY in English. "
+                                    "Never generate content in any other language, including Urdu, Arabic, or any non-English language. "
+                                    "Follow the exact format and structure requirements precisely."
+                                ),
+                            },
+                            {"role": "user", "content": retry_prompt},
+                        ],
+                        stream=True,
+                        **params,
+                    )
+
+                    # Accumulate streamed deltas instead of waiting on a single buffered response
+                    buffer = StringIO()
+                    for chunk in stream:
+                        if chunk.choices:
+                            buffer.write(chunk.choices[0].delta.content or "")
+                out = buffer.getvalue().strip()
                 if not out:
                     raise PaperGenerationError("LLM returned empty content for the paper")
 
@@ -1515,6 +1765,10 @@ def generate_paper(
                 logger.info(f"LLM content generated | chars={len(out)} | attempt={attempt + 1}")
                 logger.info(f"LLM raw response preview: {out[:2000]}{'...[truncated]' if len(out) > 2000 else ''}")
 
+                if cache_path is not None:
+                    _ensure_dir(cache_path.parent)
+                    cache_path.write_bytes(out.encode("utf-8"))
+
                 return out, pr
 
             except PaperGenerationError:
@@ -1548,28 +1802,35 @@ def generate_paper(
         if paper_format == "paper_2" and section == "section_b":
             content, flowchart_answer_key = _extract_flowchart_answer_key(content)
     else:
+        # Sections are independent LLM round-trips, so issue them concurrently
+        # and collect the results back in section order.
+        def _gen_parallel(plan: List[Tuple[str, Optional[str]]]) -> List[Tuple[str, str]]:
+            with ThreadPoolExecutor(max_workers=len(plan)) as executor:
+                futures = {sec: executor.submit(_gen_one, sec, extra) for sec, extra in plan}
+                return [futures[sec].result() for sec, _ in plan]
+
         if paper_format == "paper_1":
-            a, pr_a = _gen_one("section_a")
+            (a, pr_a), (b, pr_b), (c, pr_c) = _gen_parallel(
+                [("section_a", None), ("section_b", visual_description), ("section_c", None)]
+            )
             # Extract error key from Section A before combining
             a, section_a_error_key = _extract_section_a_error_key(a)
-            b, pr_b = _gen_one("section_b", visual_description)
-            c, pr_c = _gen_one("section_c")
             content = "\n\n".join([a, b, c])
             combined_prompts.extend([pr_a, pr_b, pr_c])
         elif paper_format == "paper_2":
-            a, pr_a = _gen_one("section_a", visual_description)
-            b, pr_b = _gen_one("section_b")
+            (a, pr_a), (b, pr_b), (c, pr_c) = _gen_parallel(
+                [("section_a", visual_description), ("section_b", None), ("section_c", None)]
+            )
             # Extract flowchart answer key from Section B before combining
             b, flowchart_answer_key = _extract_flowchart_answer_key(b)
-            c, pr_c = _gen_one("section_c")
             content = "\n\n".join([a, b, c])
             combined_prompts.extend([pr_a, pr_b, pr_c])
         elif paper_format == "oral":
             # Generate all three oral components
             # Visual stimulus is used for the Stimulus-Based Conversation (SBC) section
-            reading, pr_r = _gen_one("reading_aloud")
-            sbc, pr_s = _gen_one("sbc", visual_description)  # Pass visual description to SBC
-            conv, pr_c = _gen_one("conversation")
+            (reading, pr_r), (sbc, pr_s), (conv, pr_c) = _gen_parallel(
+                [("reading_aloud", None), ("sbc", visual_description), ("conversation", None)]
+            )
             content = "\n\n---\n\n".join([reading, sbc, conv])
             combined_prompts.extend([pr_r, pr_s, pr_c])
         else:
@@ -1577,26 +1838,24 @@ def generate_paper(
             content, pr_single = _gen_one(None)
             combined_prompts.append(pr_single)
 
-    timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
-    safe_format = "".join(ch for ch in paper_format if ch.isalnum() or ch in {"-", "_"}).lower()
-    safe_difficulty = "".join(ch for ch in difficulty if ch.isalnum() or ch in {"-", "_"}).lower()
-    safe_section = ""
-    if section:
-        safe_section = "".join(ch for ch in section if ch.isalnum() or ch in {"-", "_"})  # already lower
-        safe_section = f"-{safe_section.lower()}"
+    now = datetime.utcnow()
+    timestamp = now.strftime("%Y%m%d-%H%M%S")
+    safe_format = paper_format.lower().translate(_SAFE_NAME_TABLE)
+    safe_difficulty = difficulty.lower().translate(_SAFE_NAME_TABLE)
+    safe_section = f"-{section.lower().translate(_SAFE_NAME_TABLE)}" if section else ""
 
     base_name = f"{safe_format}{safe_section}-{safe_difficulty}-{timestamp}"
     pdf_path = settings.paper_output_dir / f"{base_name}.pdf"
     text_path = settings.paper_output_dir / f"{base_name}.txt"
     html_path = settings.paper_output_dir / f"{base_name}.html"
 
-    text_path.parent.mkdir(parents=True, exist_ok=True)
-    text_path.write_text(content, encoding="utf-8")
-    # Produce both HTML (for visual inspection/template tweaking) and PDF (for distribution)
+    _ensure_dir(text_path.parent)
+    # Bytes write skips the TextIOWrapper stack and newline translation
+    text_path.write_bytes(content.encode("utf-8"))
     # Compute relative visual path if any
     visual_image_rel: Optional[Path] = None
     visual_caption: Optional[str] = None
-    if snapshot and snapshot.screenshot_path and snapshot.screenshot_path.exists() and wants_visuals:
+    if wants_visuals and shot_exists:
         try:
             rel = os.path.relpath(snapshot.screenshot_path, start=html_path.parent)
             visual_image_rel = Path(rel)
@@ -1605,45 +1864,47 @@ def generate_paper(
             visual_image_rel = snapshot.screenshot_path
             visual_caption = snapshot.title
 
-    _render_html_then_pdf(
-        content=content,
-        pdf_path=pdf_path,
-        html_path=html_path,
-        paper_format=paper_format,
-        section=section,
-        visual_image_path=visual_image_rel,
-        visual_caption=visual_caption,
-    )
+    use_reportlab = _use_reportlab(paper_format, has_visual=visual_image_rel is not None)
+    # ReportLab layout is CPU-bound: run it in the render pool so it overlaps answer-key generation
+    render_future: Optional[Future] = None
+    if use_reportlab:
+        render_future = _submit_render(content, pdf_path, paper_format, section)
+    if not use_reportlab or settings.debug:
+        _render_html_then_pdf(
+            content=content,
+            pdf_path=pdf_path,
+            html_path=html_path,
+            paper_format=paper_format,
+            section=section,
+            visual_image_path=visual_image_rel,
+            visual_caption=visual_caption,
+            year=str(now.year),
+            write_pdf=not use_reportlab,
+        )
 
     # Upload to Supabase Storage in a per-user, per-paper-type path if user_id is known
-    download_url: Optional[str] = None
-    try:
-        storage_key = f"{base_name}.pdf"
-        if user_id:
-            safe_user = "".join(ch for ch in user_id if ch.isalnum() or ch in {"-", "_"})
-            paper_folder = "paper1" if paper_format == "paper_1" else "paper2" if paper_format == "paper_2" else paper_format
-            storage_key = f"{safe_user}/{paper_folder}/{base_name}.pdf"
-
-        download_url = upload_generated_paper_pdf(pdf_path, object_key=storage_key)
-    except SupabaseError as exc:
-        # Log but don't fail the whole generation if storage is misconfigured
-        logger.error(f"Failed to upload generated paper to Supabase Storage: {exc}")
-
-    logger.info(
-        "Generated synthetic paper",
-        pdf=str(pdf_path),
-        text=str(text_path),
-        difficulty=difficulty,
-        paper_format=paper_format,
-        section=section,
-        visual_embedded=bool(visual_image_rel),
-    )
+    def _upload() -> Optional[str]:
+        if render_future is not None:
+            try:
+                render_future.result()  # PDF must exist before upload; render errors propagate
+            except BrokenProcessPool:
+                logger.warning("Render worker died; rendering the PDF in-process")
+                _render_pdf(content, pdf_path, paper_format=paper_format, section=section)
+        try:
+            storage_key = f"{base_name}.pdf"
+            if user_id:
+                safe_user = user_id.translate(_SAFE_NAME_TABLE)
+                paper_folder = "paper1" if paper_format == "paper_1" else "paper2" if paper_format == "paper_2" else paper_format
+                storage_key = f"{safe_user}/{paper_folder}/{base_name}.pdf"
+
+            return upload_generated_paper_pdf(pdf_path, object_key=storage_key)
+        except SupabaseError as exc:
+            # Log but don't fail the whole generation if storage is misconfigured
+            logger.error(f"Failed to upload generated paper to Supabase Storage: {exc}")
+            return None
 
     # Generate answer key if requested
-    answer_key_data: Optional[Dict[str, any]] = None
-    answer_key_pdf: Optional[Path] = None
-
-    if generate_answer_key_flag:
+    def _answer_key() -> Tuple[Optional[Dict[str, any]], Optional[Path]]:
         try:
             logger.info("Generating answer key...")
             answer_key_result = generate_answer_key(
@@ -1664,16 +1925,37 @@ def generate_paper(
             render_answer_key_pdf(answer_key_result, answer_key_pdf)
 
             logger.info(f"Answer key generated: {answer_key_pdf}")
+            return answer_key_data, answer_key_pdf
         except AnswerKeyError as exc:
             logger.error(f"Failed to generate answer key: {exc}")
             # Don't fail the whole generation, just skip the answer key
+            return None, None
+
+    # The upload only depends on the rendered PDF: hand it (and the wait for the render) to the background pool and
+    # build the answer key on this thread meanwhile, joining just before returning
+    upload_future = _UPLOAD_EXECUTOR.submit(_upload)
+    answer_key_data: Optional[Dict[str, any]] = None
+    answer_key_pdf: Optional[Path] = None
+    if generate_answer_key_flag:
+        answer_key_data, answer_key_pdf = _answer_key()
+    download_url = upload_future.result()
+
+    logger.info(
+        "Generated synthetic paper",
+        pdf=str(pdf_path),
+        text=str(text_path),
+        difficulty=difficulty,
+        paper_format=paper_format,
+        section=section,
+        visual_embedded=bool(visual_image_rel),
+    )
 
     return PaperGenerationResult(
         content=content,
         prompt="\n\n---\n\n".join(combined_prompts),
         pdf_path=pdf_path,
         text_path=text_path,
-        created_at=datetime.utcnow(),
+        created_at=now,
         section=section,
         visual_meta=(
             {
@@ -10,13 +10,25 @@ Enhanced RAG with:
 
 from __future__ import annotations
 
-from typing import List, Optional, Dict, Any
+import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import List, Optional, Dict, Any, Deque, Sequence, Tuple
 from datetime import datetime
 
+import numpy as np
 from loguru import logger
 
 from app.services.embeddings import generate_query_embedding, EmbeddingError
-from app.db.supabase import search_similar_chunks, SupabaseError
+from app.db.supabase import (
+    EmbeddingRecord,
+    SupabaseError,
+    search_similar_chunks,
+    search_similar_chunks_cascade,
+)
 
 
 # RAG Configuration
@@ -30,15 +42,76 @@ RAG_CONFIG = {
 }
 
 
+# Retrieved chunks keyed by request shape; entries expire after RETRIEVAL_CACHE_TTL seconds
+RETRIEVAL_CACHE_TTL = 600
+RETRIEVAL_CACHE_MAX_ENTRIES = 512
+_retrieval_cache: Dict[Tuple[Any, ...], Tuple[float, List[Dict[str, Any]]]] = {}
+_retrieval_cache_lock = threading.Lock()
+
+# Near-duplicate queries (e.g. same format/section, slightly different topics) reuse a recent
+# result when their embeddings are this similar; shares the TTL and lock above
+SEMANTIC_CACHE_SIMILARITY = 0.97
+SEMANTIC_CACHE_SIZE = 32
+_semantic_cache: Deque[Tuple[Tuple[Any, ...], np.ndarray, float, List[Dict[str, Any]]]] = deque(
+    maxlen=SEMANTIC_CACHE_SIZE
+)
+
+# Runs the exact and broadened vector searches concurrently; an unused result is simply dropped
+_SEARCH_EXECUTOR = ThreadPoolExecutor(max_workers=6, thread_name_prefix="rag-search")
+
+
 class RAGError(RuntimeError):
     """Raised when RAG operations fail."""
 
 
+# Query keywords per paper format and section; the None entry covers full papers
+# and unrecognised sections
+_QUERY_SECTION_TERMS: Dict[str, Dict[Optional[str], str]] = {
+    "paper_1": {
+        "section_a": "Section A Editing grammatical errors passage proofreading spelling punctuation verb tense",
+        "section_b": "Section B Situational Writing formal email letter report speech proposal audience purpose register",
+        "section_c": "Section C Continuous Writing composition essay narrative descriptive argumentative expository reflective",
+        None: "Writing skills grammar situational continuous",
+    },
+    "paper_2": {
+        "section_a": "Section A Visual Text comprehension advertisement poster infographic inference persuasive technique",
+        "section_b": "Section B Reading Comprehension passage questions inference vocabulary writer's craft language effect",
+        "section_c": "Section C Summary guided comprehension paraphrasing key points own words",
+        None: "Comprehension inference summary vocabulary analysis",
+    },
+    "oral": {
+        "reading_aloud": "Reading Aloud passage pronunciation fluency expression articulation",
+        "sbc": "Stimulus-Based Conversation discussion visual prompt opinion analysis",
+        "conversation": "General Conversation themes topics personal experience opinion",
+        None: "Speaking oral reading conversation discussion",
+    },
+}
+
+_QUERY_FORMAT_INTRO = {
+    "paper_1": "GCE O-Level English Paper 1 Writing examination",
+    "paper_2": "GCE O-Level English Paper 2 Comprehension reading",
+    "oral": "GCE O-Level English Oral Communication spoken",
+}
+
+_DIFFICULTY_DESCRIPTORS = {
+    "foundational": "basic straightforward accessible",
+    "standard": "moderate balanced typical",
+    "advanced": "challenging complex sophisticated",
+}
+
+# Format + section prefixes, joined once at import; only topics and difficulty vary per call
+_QUERY_PREFIX: Dict[Tuple[str, Optional[str]], str] = {
+    (fmt, sec): f"{_QUERY_FORMAT_INTRO[fmt]} {terms}"
+    for fmt, sections in _QUERY_SECTION_TERMS.items()
+    for sec, terms in sections.items()
+}
+
+
 def build_rag_query(
     *,
     paper_format: str,
     section: Optional[str],
-    topics: Optional[List[str]],
+    topics: Optional[Sequence[str]],
     difficulty: str,
 ) -> str:
     """Build a query string for RAG retrieval based on generation parameters.
@@ -49,112 +122,69 @@ def build_rag_query(
     parts = []
 
     # Paper format context with enhanced keywords
-    if paper_format == "paper_1":
-        parts.append("GCE O-Level English Paper 1 Writing examination")
-        if section == "section_a":
-            parts.append("Section A Editing grammatical errors passage proofreading spelling punctuation verb tense")
-        elif section == "section_b":
-            parts.append("Section B Situational Writing formal email letter report speech proposal audience purpose register")
-        elif section == "section_c":
-            parts.append("Section C Continuous Writing composition essay narrative descriptive argumentative expository reflective")
-        else:
-            parts.append("Writing skills grammar situational continuous")
-    elif paper_format == "paper_2":
-        parts.append("GCE O-Level English Paper 2 Comprehension reading")
-        if section == "section_a":
-            parts.append("Section A Visual Text comprehension advertisement poster infographic inference persuasive technique")
-        elif section == "section_b":
-            parts.append("Section B Reading Comprehension passage questions inference vocabulary writer's craft language effect")
-        elif section == "section_c":
-            parts.append("Section C Summary guided comprehension paraphrasing key points own words")
-        else:
-            parts.append("Comprehension inference summary vocabulary analysis")
-    elif paper_format == "oral":
-        parts.append("GCE O-Level English Oral Communication spoken")
-        if section == "reading_aloud":
-            parts.append("Reading Aloud passage pronunciation fluency expression articulation")
-        elif section == "sbc":
-            parts.append("Stimulus-Based Conversation discussion visual prompt opinion analysis")
-        elif section == "conversation":
-            parts.append("General Conversation themes topics personal experience opinion")
-        else:
-            parts.append("Speaking oral reading conversation discussion")
+    prefix = _QUERY_PREFIX.get((paper_format, section)) or _QUERY_PREFIX.get((paper_format, None))
+    if prefix:
+        parts.append(prefix)
 
     # Add topics with context
     if topics:
-        topic_str = ", ".join(topics)
-        parts.append(f"Topics and themes: {topic_str}")
+        parts.append(f"Topics and themes: {', '.join(topics)}")
 
     # Add difficulty context with descriptors
-    difficulty_descriptors = {
-        "foundational": "basic straightforward accessible",
-        "standard": "moderate balanced typical",
-        "advanced": "challenging complex sophisticated",
-    }
-    desc = difficulty_descriptors.get(difficulty, "")
-    parts.append(f"Difficulty: {difficulty} {desc}")
+    parts.append(f"Difficulty: {difficulty} {_DIFFICULTY_DESCRIPTORS.get(difficulty, '')}")
 
     return " ".join(parts)
 
 
-def _apply_relevance_scoring(
-    chunks: List[Dict[str, Any]],
+def _relevance_score(
+    similarity: float,
+    year_str: Optional[str],
+    chunk_section: Optional[str],
+    chunk_paper_type: Optional[str],
+    *,
     target_section: Optional[str],
     target_paper_format: str,
-) -> List[Dict[str, Any]]:
-    """Apply relevance scoring with recency and section match boosts.
-
-    Boosts:
-    - Recent papers (within last N years): +10% similarity
-    - Exact section match: +15% similarity
-
-    Returns chunks sorted by adjusted similarity score.
+    recency_cutoff: int,
+) -> Tuple[float, Tuple[str, ...]]:
+    """Adjusted similarity (capped at 1.0) and the names of the boosts that applied."""
+    adjusted_similarity = similarity
+    flags: List[str] = []
+
+    # Recency boost
+    if year_str:
+        try:
+            if int(year_str) >= recency_cutoff:
+                adjusted_similarity *= RAG_CONFIG["recency_boost_factor"]
+                flags.append("recency_boost")
+        except ValueError:
+            pass
+
+    # Section match boost
+    if target_section and chunk_section == target_section:
+        adjusted_similarity *= RAG_CONFIG["section_match_boost"]
+        flags.append("section_match_boost")
+
+    # Paper format exact match (slight boost)
+    if chunk_paper_type == target_paper_format:
+        adjusted_similarity *= 1.05
+        flags.append("paper_match_boost")
+
+    return min(adjusted_similarity, 1.0), tuple(flags)
+
+
+def _dedup_key(record: EmbeddingRecord) -> Tuple[str, bytes]:
+    """Identify a search hit by source file and a digest of its full content.
+
+    Past-paper excerpts often share an opening sentence, so a content prefix is not enough.
     """
-    current_year = datetime.now().year
-    recency_cutoff = current_year - RAG_CONFIG["recency_boost_years"]
-
-    scored_chunks = []
-    for chunk in chunks:
-        base_similarity = chunk.get("similarity", 0.0)
-        adjusted_similarity = base_similarity
-
-        # Recency boost
-        year_str = chunk.get("year", "")
-        if year_str:
-            try:
-                year = int(year_str)
-                if year >= recency_cutoff:
-                    adjusted_similarity *= RAG_CONFIG["recency_boost_factor"]
-                    chunk["recency_boost"] = True
-            except ValueError:
-                pass
-
-        # Section match boost
-        chunk_section = chunk.get("section", "")
-        if target_section and chunk_section == target_section:
-            adjusted_similarity *= RAG_CONFIG["section_match_boost"]
-            chunk["section_match_boost"] = True
-
-        # Paper format exact match (slight boost)
-        chunk_paper_type = chunk.get("paper_type", "")
-        if chunk_paper_type == target_paper_format:
-            adjusted_similarity *= 1.05
-            chunk["paper_match_boost"] = True
-
-        chunk["adjusted_similarity"] = min(adjusted_similarity, 1.0)  # Cap at 1.0
-        scored_chunks.append(chunk)
-
-    # Sort by adjusted similarity (descending)
-    scored_chunks.sort(key=lambda x: x["adjusted_similarity"], reverse=True)
-
-    return scored_chunks
+    return record.source_file, hashlib.blake2b(record.content.encode("utf-8"), digest_size=8).digest()
 
 
 def retrieve_relevant_context(
     *,
     paper_format: str,
     section: Optional[str] = None,
-    topics: Optional[List[str]] = None,
+    topics: Optional[Sequence[str]] = None,
     difficulty: str = "standard",
     limit: Optional[int] = None,
     similarity_threshold: Optional[float] = None,
@@ -182,6 +212,20 @@ def retrieve_relevant_context(
     limit = limit or RAG_CONFIG["max_context_chunks"]
     similarity_threshold = similarity_threshold or RAG_CONFIG["similarity_threshold"]
 
+    cache_key = (
+        paper_format,
+        section,
+        tuple(sorted(topics)) if topics else None,
+        difficulty,
+        limit,
+        similarity_threshold,
+    )
+    with _retrieval_cache_lock:
+        cached = _retrieval_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < RETRIEVAL_CACHE_TTL:
+        logger.debug("RAG retrieval cache hit")
+        return [dict(chunk) for chunk in cached[1]]
+
     try:
         # Build enhanced query
         query = build_rag_query(
@@ -191,88 +235,144 @@ def retrieve_relevant_context(
             difficulty=difficulty,
         )
 
-        logger.info(f"RAG query: {query[:200]}...")
+        logger.debug("RAG query: {}...", query[:200])
 
         # Generate query embedding
         query_embedding = generate_query_embedding(query)
 
+        # Semantic cache: reuse a recent retrieval for the same format/section/limits whose
+        # query embedding is nearly identical
+        search_shape = (paper_format, section, limit, similarity_threshold)
+        query_vec = np.asarray(query_embedding, dtype=np.float32)
+        query_vec /= np.linalg.norm(query_vec) or 1.0
+        now = time.monotonic()
+        with _retrieval_cache_lock:
+            for shape, vec, stored_at, chunks in reversed(_semantic_cache):
+                if (
+                    shape == search_shape
+                    and now - stored_at < RETRIEVAL_CACHE_TTL
+                    and float(vec @ query_vec) >= SEMANTIC_CACHE_SIMILARITY
+                ):
+                    logger.debug("RAG semantic cache hit")
+                    return [dict(chunk) for chunk in chunks]
+
         # Retrieve more candidates than needed for scoring
         candidate_limit = limit * 2
 
-        # Strategy 1: Try with exact section filter
-        results = search_similar_chunks(
+        lower_threshold = similarity_threshold * 0.7  # 30% lower
+
+        # All three strategies in one round-trip; each tier is only consumed if needed below
+        tiers = search_similar_chunks_cascade(
             query_embedding,
             paper_type=paper_format,
             section=section,
             limit=candidate_limit,
             similarity_threshold=similarity_threshold,
+            fallback_threshold=lower_threshold,
         )
+        if tiers is not None:
+            fetch_exact = partial(tiers.get, 1, [])
+            fetch_broader = partial(tiers.get, 2, [])
+            fetch_fallback = partial(tiers.get, 3, [])
+        else:
+            # Cascade function not installed: issue strategies 1 and 2 together and 3 on demand
+            def _search(search_section: Optional[str], threshold: float) -> Future:
+                return _SEARCH_EXECUTOR.submit(
+                    search_similar_chunks,
+                    query_embedding,
+                    paper_type=paper_format,
+                    section=search_section,
+                    limit=candidate_limit,
+                    similarity_threshold=threshold,
+                )
+
+            exact_future = _search(section, similarity_threshold)
+            broader_future = _search(None, similarity_threshold) if section else None
+            fetch_exact = exact_future.result
+            fetch_broader = broader_future.result if broader_future is not None else list
+
+            def fetch_fallback() -> List[EmbeddingRecord]:
+                return _search(None, lower_threshold).result()
+
+        # Strategy 1: exact section filter
+        results = list(fetch_exact())
+        # Dedup keys, maintained across all fallback strategies
+        seen = {_dedup_key(r) for r in results}
 
         # Strategy 2: If few results with section, broaden search
         if len(results) < limit and section:
-            logger.info(f"Only {len(results)} results with section={section}, broadening search...")
-            broader_results = search_similar_chunks(
-                query_embedding,
-                paper_type=paper_format,
-                section=None,
-                limit=candidate_limit,
-                similarity_threshold=similarity_threshold,
-            )
-            # Merge and deduplicate by source_file + content hash
-            seen = {(r.source_file, hash(r.content[:100])) for r in results}
-            for r in broader_results:
-                key = (r.source_file, hash(r.content[:100]))
+            logger.info("Only {} results with section={}, broadening search...", len(results), section)
+            # Merge and deduplicate by source_file + content digest
+            for r in fetch_broader():
+                key = _dedup_key(r)
                 if key not in seen:
                     results.append(r)
                     seen.add(key)
 
-        # Strategy 3: If still few results, try lower threshold
-        if len(results) < limit:
-            lower_threshold = similarity_threshold * 0.7  # 30% lower
-            logger.info(f"Trying lower threshold {lower_threshold:.2f}...")
-            fallback_results = search_similar_chunks(
-                query_embedding,
-                paper_type=paper_format,
-                section=None,
-                limit=candidate_limit,
-                similarity_threshold=lower_threshold,
-            )
-            seen = {(r.source_file, hash(r.content[:100])) for r in results}
-            for r in fallback_results:
-                key = (r.source_file, hash(r.content[:100]))
+        # Strategy 3: only when well short of the limit, try a lower threshold
+        if len(results) < max(1, limit // 2):
+            logger.info("Trying lower threshold {:.2f}...", lower_threshold)
+            for r in fetch_fallback():
+                key = _dedup_key(r)
                 if key not in seen:
                     results.append(r)
                     seen.add(key)
 
-        logger.info(f"RAG search returned {len(results)} candidate results")
+        logger.debug("RAG search returned {} candidate results", len(results))
+
+        # Score the records directly and build chunk dicts only for the top N survivors
+        recency_cutoff = datetime.now().year - RAG_CONFIG["recency_boost_years"]
+        scored = sorted(
+            (
+                (
+                    _relevance_score(
+                        record.similarity,
+                        record.year,
+                        record.section,
+                        record.paper_type,
+                        target_section=section,
+                        target_paper_format=paper_format,
+                        recency_cutoff=recency_cutoff,
+                    ),
+                    record,
+                )
+                for record in results
+            ),
+            key=lambda item: item[0][0],
+            reverse=True,
+        )
 
-        # Convert to dict format
-        context_chunks = []
-        for record in results:
-            context_chunks.append({
+        final_chunks = []
+        for (adjusted_similarity, flags), record in scored[:limit]:
+            chunk = {
                 "content": record.content,
                 "paper_type": record.paper_type,
                 "section": record.section,
                 "year": record.year,
                 "source_file": record.source_file,
                 "similarity": record.similarity,
-            })
-
-        # Apply relevance scoring
-        scored_chunks = _apply_relevance_scoring(
-            context_chunks,
-            target_section=section,
-            target_paper_format=paper_format,
-        )
-
-        # Take top N after scoring
-        final_chunks = scored_chunks[:limit]
+            }
+            for flag in flags:
+                chunk[flag] = True
+            chunk["adjusted_similarity"] = adjusted_similarity
+            final_chunks.append(chunk)
+
+        if final_chunks:
+            logger.info(
+                "Retrieved {} relevant chunks for RAG (best adjusted score: {:.2%})",
+                len(final_chunks),
+                final_chunks[0]["adjusted_similarity"],
+            )
+        else:
+            logger.info("No chunks retrieved")
 
-        logger.info(
-            f"Retrieved {len(final_chunks)} relevant chunks for RAG "
-            f"(best adjusted score: {final_chunks[0]['adjusted_similarity']:.2%})"
-            if final_chunks else "No chunks retrieved"
-        )
+        # Only successful lookups are cached; the error fallbacks below retry next time
+        with _retrieval_cache_lock:
+            if len(_retrieval_cache) >= RETRIEVAL_CACHE_MAX_ENTRIES:
+                _retrieval_cache.pop(next(iter(_retrieval_cache)))
+            stored = [dict(chunk) for chunk in final_chunks]
+            _retrieval_cache[cache_key] = (time.monotonic(), stored)
+            _semantic_cache.append((search_shape, query_vec, time.monotonic(), stored))
 
         return final_chunks
 
@@ -287,6 +387,21 @@ def retrieve_relevant_context(
         return []
 
 
+@lru_cache(maxsize=64)
+def _display_name(value: str) -> str:
+    """'section_a' -> 'Section A'; the handful of distinct values are converted once."""
+    return value.replace("_", " ").title()
+
+
+_CONTEXT_PREAMBLE = (
+    "## Reference Examples from Past Papers",
+    "Use the following excerpts as reference for tone, structure, and style.",
+    "Do NOT copy content directly; use them as guidance only.",
+    "These are ranked by relevance to your current task.",
+    "",
+)
+
+
 def format_rag_context(chunks: List[Dict[str, Any]]) -> str:
     """Format retrieved chunks into a context string for the LLM prompt.
 
@@ -296,20 +411,16 @@ def format_rag_context(chunks: List[Dict[str, Any]]) -> str:
     if not chunks:
         return ""
 
-    lines = [
-        "## Reference Examples from Past Papers",
-        "Use the following excerpts as reference for tone, structure, and style.",
-        "Do NOT copy content directly; use them as guidance only.",
-        "These are ranked by relevance to your current task.",
-        ""
-    ]
+    lines = list(_CONTEXT_PREAMBLE)
 
     max_chars = RAG_CONFIG["max_chunk_chars"]
 
     for i, chunk in enumerate(chunks, 1):
         year = chunk.get("year", "Unknown")
-        section = chunk.get("section", "").replace("_", " ").title() if chunk.get("section") else ""
-        paper_type = chunk.get("paper_type", "").replace("_", " ").title()
+        section = chunk.get("section")
+        section = _display_name(section) if section else ""
+        paper_type = chunk.get("paper_type")
+        paper_type = _display_name(paper_type) if paper_type else ""
 
         # Use adjusted similarity if available, otherwise raw similarity
         similarity = chunk.get("adjusted_similarity", chunk.get("similarity", 0))
@@ -341,9 +452,6 @@ def format_rag_context(chunks: List[Dict[str, Any]]) -> str:
         if boosts:
             relevance_line += f" ({', '.join(boosts)})"
 
-        lines.append(relevance_line)
-        lines.append("")
-
         # Truncate content intelligently at sentence boundary if possible
         content = chunk["content"]
         if len(content) > max_chars:
@@ -354,10 +462,7 @@ def format_rag_context(chunks: List[Dict[str, Any]]) -> str:
                 truncated = truncated[:last_period + 1]
             content = truncated + "..."
 
-        lines.append(content)
-        lines.append("")
-        lines.append("---")
-        lines.append("")
+        lines.extend((relevance_line, "", content, "", "---", ""))
 
     return "\n".join(lines)
 
@@ -367,7 +472,7 @@ def get_rag_enhanced_prompt(
     *,
     paper_format: str,
     section: Optional[str] = None,
-    topics: Optional[List[str]] = None,
+    topics: Optional[Sequence[str]] = None,
     difficulty: str = "standard",
     max_context_chunks: Optional[int] = None,
 ) -> str:
@@ -390,11 +495,12 @@ def get_rag_enhanced_prompt(
     # Use config default if not specified
     max_chunks = max_context_chunks or RAG_CONFIG["max_context_chunks"]
 
-    # Retrieve relevant context with enhanced scoring
+    # Retrieve relevant context with enhanced scoring; results are cached with a TTL
+    # (sorted topics, so equivalent topic lists retrieve the same context)
     chunks = retrieve_relevant_context(
         paper_format=paper_format,
         section=section,
-        topics=topics,
+        topics=tuple(sorted(topics)) if topics else None,
         difficulty=difficulty,
         limit=max_chunks,
     )
@@ -403,18 +509,20 @@ def get_rag_enhanced_prompt(
         logger.debug("No RAG context available, using base prompt only")
         return base_prompt
 
-    # Format context with scoring information
-    context_section = format_rag_context(chunks)
-
-    # Combine prompt with context
-    enhanced_prompt = f"{base_prompt}\n\n{context_section}"
-
-    # Log detailed info about what context was used
-    logger.info(
-        f"Enhanced prompt with {len(chunks)} RAG context chunks "
-        f"(years: {[c.get('year', '?') for c in chunks]}, "
-        f"sections: {[c.get('section', '?') for c in chunks]})"
+    # Log detailed info about what context was used; the lists are only built if emitted
+    logger.opt(lazy=True).info(
+        "Enhanced prompt with {} RAG context chunks (years: {}, sections: {})",
+        lambda: len(chunks),
+        lambda: [c.get("year", "?") for c in chunks],
+        lambda: [c.get("section", "?") for c in chunks],
     )
 
-    return enhanced_prompt
+    # Combine prompt with context formatted with scoring information
+    return f"{base_prompt}\n\n{format_rag_context(chunks)}"
+
 
+def clear_rag_cache() -> None:
+    """Drop cached RAG retrievals, e.g. after new embeddings are stored."""
+    with _retrieval_cache_lock:
+        _retrieval_cache.clear()
+        _semantic_cache.clear()
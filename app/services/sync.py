@@ -2,10 +2,15 @@
 
 from __future__ import annotations
 
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
 from loguru import logger
 
@@ -14,10 +19,13 @@ from app.services.ocr import extract_text_from_pdf, OCRExtractionError
 from app.services.embeddings import (
     extract_metadata_from_filename,
     create_paper_chunks,
-    generate_embeddings,
     should_skip_file,
 )
+from app.services.embedding_cache import generate_embeddings_cached
+from app.services.rag import clear_rag_cache
+from app.services.paper_generator import refresh_reference_cache
 from app.db.supabase import (
+    PaperChunk,
     init_pgvector_extension,
     create_embeddings_table,
     store_embeddings,
@@ -83,15 +91,43 @@ class SyncResult:
         }
 
 
-def _get_text_output_path(pdf_path: Path) -> Path:
+def _run_timestamp() -> str:
+    """Timestamp suffix for OCR text files; one per sync run is shared by all files."""
+    return datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+
+
+def _get_text_output_path(pdf_path: Path, timestamp: Optional[str] = None) -> Path:
     """Generate the output path for OCR text from a PDF."""
-    timestamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    timestamp = timestamp or _run_timestamp()
     stem = pdf_path.stem
     return settings.ocr_output_dir / f"{stem}-{timestamp}.txt"
 
 
-def _find_existing_text(pdf_stem: str) -> Optional[Path]:
+# Timestamp suffix added by _get_text_output_path (e.g. "-20251107-164330")
+_TEXT_TIMESTAMP_RE = re.compile(r"-\d{8}-\d{6}$")
+
+
+def _index_existing_texts() -> Dict[str, Path]:
+    """Map PDF stems to their OCR text files with a single directory listing."""
+    index: Dict[str, Path] = {}
+    try:
+        with os.scandir(settings.ocr_output_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith(".txt") and entry.is_file():
+                    stem = _TEXT_TIMESTAMP_RE.sub("", entry.name[:-4])
+                    index.setdefault(stem, Path(entry.path))
+    except FileNotFoundError:
+        pass
+    return index
+
+
+def _find_existing_text(
+    pdf_stem: str,
+    existing_index: Optional[Dict[str, Path]] = None,
+) -> Optional[Path]:
     """Find existing OCR text file for a PDF."""
+    if existing_index is not None:
+        return existing_index.get(pdf_stem)
     for txt_path in settings.ocr_output_dir.glob(f"{pdf_stem}*.txt"):
         return txt_path
     return None
@@ -105,19 +141,11 @@ def ensure_database_setup() -> None:
     logger.info("Database setup complete")
 
 
-def process_single_file(
-    file_path: Path,
-    *,
-    force_reprocess: bool = False,
-) -> SyncFileResult:
-    """Process a single PDF or text file into embeddings.
-    
-    Args:
-        file_path: Path to the PDF or text file.
-        force_reprocess: If True, reprocess even if text already exists.
-    
-    Returns:
-        SyncFileResult with processing details.
+def _classify_file(file_path: Path) -> Tuple[SyncFileResult, Optional[Dict[str, Any]]]:
+    """Apply the filename-based skip rules and parse the filename metadata.
+
+    Returns the file result and the metadata; the metadata is None when the file
+    is skipped, in which case the result already carries the reason.
     """
     filename = file_path.name
     result = SyncFileResult(filename=filename, status="pending")
@@ -126,8 +154,8 @@ def process_single_file(
     if should_skip_file(filename):
         result.status = "skipped"
         result.error_message = "Skipped: Answer sheet or no clear Paper1/Paper2 designation"
-        logger.info(f"Skipping {filename}: answer sheet or ambiguous")
-        return result
+        logger.info("Skipping {}: answer sheet or ambiguous", filename)
+        return result, None
     
     # Extract metadata from filename
     metadata = extract_metadata_from_filename(filename)
@@ -138,28 +166,50 @@ def process_single_file(
     if not result.paper_type:
         result.status = "skipped"
         result.error_message = "Skipped: Could not determine Paper 1 or Paper 2"
-        logger.info(f"Skipping {filename}: no paper type detected")
-        return result
+        logger.info("Skipping {}: no paper type detected", filename)
+        return result, None
+    
+    return result, metadata
+
+
+def _prepare_file(
+    file_path: Path,
+    *,
+    force_reprocess: bool = False,
+    existing_index: Optional[Dict[str, Path]] = None,
+    run_timestamp: Optional[str] = None,
+    classified: Optional[Tuple[SyncFileResult, Optional[Dict[str, Any]]]] = None,
+) -> Tuple[SyncFileResult, List[PaperChunk]]:
+    """Extract text from a PDF or text file and split it into chunks.
+
+    Returns the file result (still "pending" when chunks were produced) and the chunks;
+    skipped and failed files come back with an empty chunk list. ``classified`` is the
+    output of _classify_file when the caller has already run it.
+    """
+    result, metadata = classified or _classify_file(file_path)
+    if metadata is None:
+        return result, []
+    filename = result.filename
     
     try:
         # Determine if we need OCR or already have text
         if file_path.suffix.lower() == ".pdf":
             # Check for existing text
-            existing_text = _find_existing_text(file_path.stem)
+            existing_text = _find_existing_text(file_path.stem, existing_index)
             
             if existing_text and not force_reprocess:
-                logger.info(f"Using existing text for {filename}: {existing_text}")
+                logger.debug("Using existing text for {}: {}", filename, existing_text)
                 text = existing_text.read_text(encoding="utf-8")
                 source_file = existing_text.name
             else:
                 # Run OCR
-                logger.info(f"Running OCR on {filename}")
-                pdf_bytes = file_path.read_bytes()
-                output_path = _get_text_output_path(file_path)
-                ocr_result = extract_text_from_pdf(pdf_bytes, output_path)
+                logger.info("Running OCR on {}", filename)
+                output_path = _get_text_output_path(file_path, run_timestamp)
+                # Pass the path so PDFium reads the file lazily rather than from a full copy
+                ocr_result = extract_text_from_pdf(file_path, output_path)
                 text = ocr_result.text
                 source_file = output_path.name
-                logger.info(f"OCR complete: {ocr_result.page_count} pages, {len(text)} chars")
+                logger.info("OCR complete: {} pages, {} chars", ocr_result.page_count, len(text))
         
         elif file_path.suffix.lower() == ".txt":
             text = file_path.read_text(encoding="utf-8")
@@ -168,12 +218,12 @@ def process_single_file(
         else:
             result.status = "skipped"
             result.error_message = f"Unsupported file type: {file_path.suffix}"
-            return result
+            return result, []
         
         if not text.strip():
             result.status = "skipped"
             result.error_message = "Empty text content"
-            return result
+            return result, []
         
         # Create chunks
         chunks = create_paper_chunks(text, source_file, metadata)
@@ -182,18 +232,9 @@ def process_single_file(
         if not chunks:
             result.status = "skipped"
             result.error_message = "No chunks created from text"
-            return result
-        
-        # Generate embeddings
-        logger.info(f"Generating embeddings for {len(chunks)} chunks from {filename}")
-        chunk_texts = [c.content for c in chunks]
-        embeddings = generate_embeddings(chunk_texts)
+            return result, []
         
-        # Store in database
-        stored = store_embeddings(chunks, embeddings)
-        
-        result.status = "success"
-        logger.info(f"Successfully processed {filename}: {stored} embeddings stored")
+        return result, chunks
         
     except OCRExtractionError as exc:
         result.status = "error"
@@ -205,6 +246,58 @@ def process_single_file(
         result.error_message = str(exc)
         logger.error(f"Error processing {filename}: {exc}")
     
+    return result, []
+
+
+def _store_file_embeddings(
+    result: SyncFileResult,
+    chunks: List[PaperChunk],
+    embeddings: List[List[float]],
+) -> None:
+    """Store one file's chunks with their embeddings and record the outcome on ``result``."""
+    try:
+        stored = store_embeddings(chunks, embeddings)
+        result.status = "success"
+        logger.info("Successfully processed {}: {} embeddings stored", result.filename, stored)
+    except Exception as exc:
+        result.status = "error"
+        result.error_message = str(exc)
+        logger.error(f"Error processing {result.filename}: {exc}")
+
+
+def process_single_file(
+    file_path: Path,
+    *,
+    force_reprocess: bool = False,
+    existing_index: Optional[Dict[str, Path]] = None,
+) -> SyncFileResult:
+    """Process a single PDF or text file into embeddings.
+    
+    Args:
+        file_path: Path to the PDF or text file.
+        force_reprocess: If True, reprocess even if text already exists.
+        existing_index: Optional stem -> OCR text map from _index_existing_texts;
+            the OCR output directory is globbed when omitted.
+    
+    Returns:
+        SyncFileResult with processing details.
+    """
+    result, chunks = _prepare_file(
+        file_path, force_reprocess=force_reprocess, existing_index=existing_index
+    )
+    if not chunks:
+        return result
+    
+    logger.info("Generating embeddings for {} chunks from {}", len(chunks), result.filename)
+    try:
+        embeddings = generate_embeddings_cached([c.content for c in chunks])
+    except Exception as exc:
+        result.status = "error"
+        result.error_message = str(exc)
+        logger.error(f"Error processing {result.filename}: {exc}")
+        return result
+    
+    _store_file_embeddings(result, chunks, embeddings)
     return result
 
 
@@ -252,8 +345,64 @@ def sync_original_papers(
     
     logger.info(f"Found {len(all_files)} files to process")
     
-    for file_path in all_files:
-        file_result = process_single_file(file_path, force_reprocess=force_reprocess)
+    # One listing of the OCR output directory serves every PDF's existing-text lookup,
+    # and one timestamp names every OCR output of this run (stems keep them distinct)
+    existing_index = _index_existing_texts()
+    run_timestamp = _run_timestamp()
+    
+    # Filename checks are cheap, so skipped files are settled here and never dispatched
+    prepared: List[Tuple[SyncFileResult, List[PaperChunk]]] = []
+    to_prepare: List[Tuple[int, Path, Tuple[SyncFileResult, Dict[str, Any]]]] = []
+    for path in all_files:
+        file_result, metadata = _classify_file(path)
+        if metadata is not None:
+            to_prepare.append((len(prepared), path, (file_result, metadata)))
+        prepared.append((file_result, []))
+    
+    # Pass 1: extract and chunk every remaining file; OCR and reads overlap across
+    # worker threads, and map() keeps results in file order
+    with ThreadPoolExecutor(max_workers=max(1, settings.sync_workers)) as executor:
+        outcomes = executor.map(
+            lambda item: _prepare_file(
+                item[1],
+                force_reprocess=force_reprocess,
+                existing_index=existing_index,
+                run_timestamp=run_timestamp,
+                classified=item[2],
+            ),
+            to_prepare,
+        )
+        for (index, _, _), outcome in zip(to_prepare, outcomes):
+            prepared[index] = outcome
+    pending = [(file_result, chunks) for file_result, chunks in prepared if chunks]
+    
+    # Pass 2: embed all chunks together so requests fill whole provider batches, then
+    # hand each file its slice of the vectors
+    all_texts = [c.content for _, chunks in pending for c in chunks]
+    if all_texts:
+        logger.info("Generating embeddings for {} chunks across {} files", len(all_texts), len(pending))
+        try:
+            embeddings = generate_embeddings_cached(all_texts)
+        except Exception as exc:
+            # One failed API batch must not fail every file: retry file by file, so only the
+            # files that still fail are marked; batches that succeeded are already cached
+            logger.warning("Shared embedding call failed, retrying per file: {}", exc)
+            for file_result, chunks in pending:
+                try:
+                    file_embeddings = generate_embeddings_cached([c.content for c in chunks])
+                except Exception as file_exc:
+                    logger.error("Embedding generation failed for {}: {}", file_result.filename, file_exc)
+                    file_result.status = "error"
+                    file_result.error_message = str(file_exc)
+                    continue
+                _store_file_embeddings(file_result, chunks, file_embeddings)
+        else:
+            offset = 0
+            for file_result, chunks in pending:
+                _store_file_embeddings(file_result, chunks, embeddings[offset:offset + len(chunks)])
+                offset += len(chunks)
+    
+    for file_result, _ in prepared:
         result.file_results.append(file_result)
         
         if file_result.status == "success":
@@ -267,6 +416,10 @@ def sync_original_papers(
     
     result.completed_at = datetime.utcnow()
     
+    # New embeddings invalidate any memoized RAG context
+    if result.processed_files:
+        clear_rag_cache()
+    
     # Log summary
     logger.info(
         f"Sync complete: {result.processed_files} processed, "
@@ -274,6 +427,12 @@ def sync_original_papers(
         f"{result.total_embeddings} total embeddings"
     )
     
+    # Snapshot reference excerpts for prompt building before the parsed texts are removed
+    try:
+        refresh_reference_cache()
+    except Exception as exc:
+        logger.warning(f"Failed to refresh reference excerpt cache: {exc}")
+    
     # Cleanup temporary directories after processing
     _cleanup_temp_directories()
     
@@ -281,7 +440,11 @@ def sync_original_papers(
 
 
 def _cleanup_temp_directories() -> None:
-    """Remove all files from tmp/, texts/, and visuals/ directories after sync."""
+    """Remove all files from tmp/, texts/, and visuals/ directories after sync.
+
+    Each directory is renamed aside and recreated empty, so sync returns right away;
+    the old contents are deleted on a background thread.
+    """
     import shutil
     
     dirs_to_clean = [
@@ -290,10 +453,17 @@ def _cleanup_temp_directories() -> None:
         settings.visual_output_dir,  # storage/visuals/
     ]
     
+    stamp = time.time_ns()
     for dir_path in dirs_to_clean:
-        if dir_path.exists():
+        if not dir_path.exists():
+            continue
+        try:
+            trash = dir_path.parent / f".trash-{dir_path.name}-{stamp}"
+            dir_path.rename(trash)
+            dir_path.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            # Rename not possible (e.g. mount point or open handle): clear in place
             try:
-                # Remove all contents but keep the directory
                 for item in dir_path.iterdir():
                     if item.is_file():
                         item.unlink()
@@ -302,6 +472,15 @@ def _cleanup_temp_directories() -> None:
                 logger.info(f"Cleaned up directory: {dir_path}")
             except Exception as exc:
                 logger.warning(f"Failed to clean {dir_path}: {exc}")
+            continue
+        threading.Thread(
+            target=shutil.rmtree,
+            args=(trash,),
+            kwargs={"ignore_errors": True},
+            name=f"cleanup-{dir_path.name}",
+            daemon=True,
+        ).start()
+        logger.info(f"Cleaned up directory: {dir_path}")
 
 
 def get_sync_status() -> Dict[str, Any]:
@@ -3,23 +3,36 @@ from __future__ import annotations
 import hashlib
 import json
 import re
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache, wraps
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 from urllib.parse import urlparse
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from loguru import logger
+from lxml import etree
+from lxml import html as lxml_html
 from playwright.sync_api import sync_playwright
 
 from app.config.settings import settings
 from openai import OpenAI
 
 
+# Text cleanup and URL-parsing patterns, compiled once for the helpers below
+_SPACES_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+_URL_RE = re.compile(r"https?://[^\s\"'\]]+")
+_FENCE_OPEN_RE = re.compile(r"^```(?:json)?\s*")
+_FENCE_CLOSE_RE = re.compile(r"\s*```$")
+
+
 @dataclass
 class VisualSnapshot:
     url: str
@@ -30,6 +43,7 @@ class VisualSnapshot:
     created_at: datetime
 
 
+@lru_cache(maxsize=1024)
 def _hash(input_str: str) -> str:
     return hashlib.sha1(input_str.encode("utf-8")).hexdigest()[:16]
 
@@ -40,55 +54,136 @@ def _ensure_session_dir(key: str) -> Path:
     return dir_path
 
 
-def _validate_url(url: str) -> bool:
+# Shared connection pool: candidate URLs are checked concurrently and the HTML fallback
+# often hits a host that was just validated, so keep-alive connections are reused
+_SESSION = requests.Session()
+_SESSION.mount("http://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+_SESSION.mount("https://", HTTPAdapter(pool_connections=32, pool_maxsize=32))
+_VALIDATE_WORKERS = 16
+
+
+_VALIDATE_NEGATIVE_TTL_SECONDS = 600
+_VALIDATE_CACHE_SIZE = 4096
+_validated_urls: Dict[str, bool] = {}
+_rejected_urls: Dict[str, float] = {}  # url -> expiry for 404/5xx responses
+_validate_lock = threading.Lock()
+
+
+def _probe_url(url: str) -> Optional[int]:
+    """Fetch one byte of ``url`` (many sites reject HEAD); returns the status, or None on error.
+
+    A non-HTML success is reported as 415 so callers only need to check the status.
+    """
     try:
-        resp = requests.head(url, allow_redirects=True, timeout=8)
-        if resp.status_code >= 400:
-            return False
-        ctype = resp.headers.get("content-type", "")
-        if "text/html" not in ctype and "application/xhtml+xml" not in ctype:
-            return False
-        return True
+        with _SESSION.get(
+            url,
+            stream=True,
+            timeout=6,
+            headers={"Range": "bytes=0-0", "User-Agent": "Mozilla/5.0"},
+            allow_redirects=True,
+        ) as resp:
+            if resp.status_code >= 400:
+                return resp.status_code
+            ctype = resp.headers.get("content-type", "")
+            if "text/html" not in ctype and "application/xhtml+xml" not in ctype:
+                return 415
+            return resp.status_code
     except Exception:
-        return False
+        return None
+
+
+def _validate_url(url: str) -> bool:
+    now = time.monotonic()
+    with _validate_lock:
+        if url in _validated_urls:
+            return _validated_urls[url]
+        if _rejected_urls.get(url, 0.0) > now:
+            return False
+    status = _probe_url(url)
+    valid = status is not None and status < 400
+    with _validate_lock:
+        if status == 404 or (status is not None and status >= 500):
+            # May come back; skip the network for a while instead of caching for good
+            _rejected_urls[url] = now + _VALIDATE_NEGATIVE_TTL_SECONDS
+        elif status is not None and status != 429:
+            if len(_validated_urls) >= _VALIDATE_CACHE_SIZE:
+                _validated_urls.clear()
+            _validated_urls[url] = valid
+    return valid
+
+
+def _validate_urls(urls: List[str]) -> Dict[str, bool]:
+    """Validate candidate URLs concurrently; returns url -> _validate_url result."""
+    if not urls:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(_VALIDATE_WORKERS, len(urls))) as ex:
+        return dict(zip(urls, ex.map(_validate_url, urls)))
+
+
+_MAX_HTML_BYTES = 3_000_000
 
 
 def _fetch_html(url: str) -> Optional[str]:
     try:
-        resp = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
-        if resp.status_code >= 400:
-            return None
-        # limit size
-        if len(resp.content) > 3_000_000:
-            return None
-        return resp.text
+        with _SESSION.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0"}, stream=True) as resp:
+            if resp.status_code >= 400:
+                return None
+            # limit size: reject on the declared length, else stop reading once over the cap
+            if int(resp.headers.get("content-length") or 0) > _MAX_HTML_BYTES:
+                return None
+            body = bytearray()
+            for chunk in resp.iter_content(chunk_size=65536):
+                body += chunk
+                if len(body) > _MAX_HTML_BYTES:
+                    return None
+            return body.decode(resp.encoding or "utf-8", errors="replace")
     except Exception:
         return None
 
 
+def _node_text(node: Any) -> str:
+    """Newline-joined, stripped text nodes of an lxml element (bs4's get_text(strip=True) layout)."""
+    return "\n".join(part for part in (t.strip() for t in node.itertext()) if part)
+
+
 def _readable_text(html: str) -> Tuple[str, str]:
-    """Return (title, readable_text) using basic heuristics via BeautifulSoup."""
-    soup = BeautifulSoup(html, "lxml")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.extract()
-    title = (soup.title.string.strip() if soup.title and soup.title.string else "")[:200]
+    """Return (title, readable_text) using basic heuristics over an lxml tree."""
+    try:
+        try:
+            root = lxml_html.document_fromstring(html)
+        except ValueError:
+            # str input with an XML encoding declaration; parse the UTF-8 bytes instead
+            parser = lxml_html.HTMLParser(encoding="utf-8")
+            root = lxml_html.document_fromstring(html.encode("utf-8"), parser=parser)
+    except etree.ParserError:
+        return "", ""
+    # Drop script/style/noscript subtrees and comments, keeping the text that follows them
+    etree.strip_elements(root, etree.Comment, "script", "style", "noscript", with_tail=False)
+    title_node = root.find(".//title")
+    title = (title_node.text.strip() if title_node is not None and title_node.text else "")[:200]
     # Prefer <article>, then <main>, else longest <div>
     candidates = []
     for sel in ["article", "main"]:
-        node = soup.select_one(sel)
-        if node:
-            text = node.get_text(separator="\n", strip=True)
-            candidates.append(text)
+        node = root.find(f".//{sel}")
+        if node is not None:
+            candidates.append(_node_text(node))
     if not candidates:
-        longest_div = max((d.get_text(separator="\n", strip=True) for d in soup.find_all("div")), key=lambda t: len(t), default="")
+        longest_div = ""
+        for div in root.iter("div"):
+            div_text = _node_text(div)
+            if len(div_text) > len(longest_div):
+                longest_div = div_text
+                if len(longest_div) >= 12000:
+                    break  # already fills the returned slice; a longer div would be cut anyway
         candidates.append(longest_div)
     text = max(candidates, key=lambda t: len(t), default="")
     # Fallback to body text
-    if len(text) < 200 and soup.body:
-        text = soup.body.get_text(separator="\n", strip=True)
+    body = root.find("body")
+    if len(text) < 200 and body is not None:
+        text = _node_text(body)
     # Normalize whitespace
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _SPACES_RE.sub(" ", text)
+    text = _BLANK_LINES_RE.sub("\n\n", text)
     return title, text[:12000]
 
 
@@ -136,6 +231,45 @@ def _clear_fixed_overlays(page: Any) -> None:
         pass
 
 
+# Finds the first selector whose first match is visible, in one round-trip instead of a
+# timed locator probe per selector. Playwright's tag:has-text("...") form is emulated as
+# a case-insensitive substring match on the element text.
+_FIRST_VISIBLE_JS = """
+(selectors) => {
+    const visible = (el) => {
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+    };
+    for (const sel of selectors) {
+        const m = sel.match(/^(.*):has-text\\("(.*)"\\)$/);
+        let el = null;
+        try {
+            if (m) {
+                const needle = m[2].toLowerCase();
+                el = Array.from(document.querySelectorAll(m[1] || '*')).find(
+                    (node) => (node.textContent || '').replace(/\\s+/g, ' ').toLowerCase().includes(needle)
+                ) || null;
+            } else {
+                el = document.querySelector(sel);
+            }
+        } catch (e) {
+            continue;
+        }
+        if (el && visible(el)) return sel;
+    }
+    return null;
+}
+"""
+
+
+def _first_visible_selector(page: Any, selectors: List[str]) -> Optional[str]:
+    """Return the first selector whose first match is visible on the page, or None."""
+    try:
+        return page.evaluate(_FIRST_VISIBLE_JS, selectors)
+    except Exception:
+        return None
+
+
 def _dismiss_modal_overlays(page: Any, *, attempts: int = 3) -> None:
     """
     Best-effort dismissal of pop-ups or modals (e.g., close icons, dismiss buttons)
@@ -171,206 +305,184 @@ def _dismiss_modal_overlays(page: Any, *, attempts: int = 3) -> None:
         '[class*="close"][role="button"]',
     ]
     for _ in range(attempts):
-        dismissed = False
-        for selector in close_selectors:
-            try:
-                locator = page.locator(selector).first
-                if locator.is_visible(timeout=800):
-                    locator.click(timeout=1200)
-                    logger.info(f"Dismissed modal/popup via selector: {selector}")
-                    page.wait_for_timeout(600)
-                    dismissed = True
-                    break
-            except Exception:
-                continue
-        if not dismissed:
+        selector = _first_visible_selector(page, close_selectors)
+        if selector is None:
+            break
+        try:
+            page.locator(selector).first.click(timeout=1200)
+        except Exception:
             break
+        logger.info(f"Dismissed modal/popup via selector: {selector}")
+        page.wait_for_timeout(600)
     _clear_fixed_overlays(page)
 
 
-def _extract_visible_viewport_content(url: str) -> Tuple[Optional[str], Optional[str]]:
-    """Extract title and visible viewport content from a URL using Playwright.
-    This matches what's actually shown in the screenshot (viewport only, scrolled 200px down)."""
+# Captures reuse one Chromium per worker thread instead of launching a browser per call.
+# Playwright's sync objects are bound to the thread that created them (and must stay off
+# FastAPI's event loop), so the browser lives in thread-local storage of this executor;
+# each capture gets a fresh context so cookies and storage never carry over.
+_CAPTURE_WORKERS = 2
+_CAPTURE_EXECUTOR = ThreadPoolExecutor(max_workers=_CAPTURE_WORKERS, thread_name_prefix="visual-capture")
+_capture_local = threading.local()
+
+
+def _get_browser() -> Any:
+    """Return this worker's Chromium, (re)launching it if needed. Capture threads only."""
+    local = _capture_local
+    browser = getattr(local, "browser", None)
+    if browser is not None and browser.is_connected():
+        return browser
+    if getattr(local, "playwright", None) is None:
+        local.playwright = sync_playwright().start()
+    local.browser = local.playwright.chromium.launch(headless=True)
+    return local.browser
+
+
+# Cookie consent buttons tried in order; the first visible match is clicked
+_COOKIE_SELECTORS = [
+    # Text-based selectors (case-insensitive)
+    'button:has-text("Accept All Cookies")',
+    'button:has-text("Accept All")',
+    'button:has-text("Accept Cookies")',
+    'button:has-text("I Accept")',
+    'button:has-text("Accept")',
+    'button:has-text("Agree")',
+    'button:has-text("I Agree")',
+    'a:has-text("Accept All Cookies")',
+    'a:has-text("Accept All")',
+    'a:has-text("Accept Cookies")',
+    # ID and class-based selectors
+    '#accept-all-cookies',
+    '#acceptAllCookies',
+    '#cookie-accept',
+    '#accept-cookies',
+    '.accept-all-cookies',
+    '.acceptAllCookies',
+    '.cookie-accept',
+    '.accept-cookies',
+    '[id*="accept"][id*="cookie"]',
+    '[class*="accept"][class*="cookie"]',
+    '[data-testid*="accept"]',
+    # Common cookie banner button patterns
+    '[aria-label*="Accept"]',
+    '[aria-label*="accept"]',
+]
+
+
+def _capture(url: str, out_path: Path) -> Tuple[bool, Optional[str], Optional[str]]:
+    """Screenshot the viewport of ``url`` and extract the text visible in it, in one page load.
+
+    Returns (screenshot_ok, title, visible_text); title and text are None when the page
+    could not be loaded. The text matches what's shown in the screenshot (viewport only,
+    scrolled 200px down). Runs on a capture worker: submit it to _CAPTURE_EXECUTOR.
+    """
     try:
-        def _run():
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                page = browser.new_page(viewport={"width": 1920, "height": 1080})
-                page.goto(url, wait_until="load", timeout=30000)
-                page.wait_for_load_state("networkidle", timeout=15000)
-                
-                # Dismiss cookie banners (same logic as screenshot)
-                cookie_selectors = [
-                    'button:has-text("Accept All Cookies")', 'button:has-text("Accept All")',
-                    'button:has-text("Accept Cookies")', 'button:has-text("I Accept")',
-                    'button:has-text("Accept")', 'button:has-text("Agree")',
-                    'button:has-text("I Agree")', 'a:has-text("Accept All Cookies")',
-                    'a:has-text("Accept All")', 'a:has-text("Accept Cookies")',
-                    '#accept-all-cookies', '#acceptAllCookies', '#cookie-accept',
-                    '#accept-cookies', '.accept-all-cookies', '.acceptAllCookies',
-                    '.cookie-accept', '.accept-cookies',
-                    '[id*="accept"][id*="cookie"]', '[class*="accept"][class*="cookie"]',
-                    '[data-testid*="accept"]', '[aria-label*="Accept"]', '[aria-label*="accept"]',
-                ]
-                for selector in cookie_selectors:
-                    try:
-                        button = page.locator(selector).first
-                        if button.is_visible(timeout=2000):
-                            button.click(timeout=3000)
-                            page.wait_for_timeout(1000)
-                            break
-                    except Exception:
-                        continue
-
-                _dismiss_modal_overlays(page)
-                
-                # Scroll down 200px (same as screenshot)
-                page.evaluate("window.scrollTo(0, 200)")
+        # Set desktop viewport size (1920x1080 for standard desktop)
+        context = _get_browser().new_context(viewport={"width": 1920, "height": 1080})
+        try:
+            page = context.new_page()
+            page.goto(url, wait_until="load", timeout=30000)
+            page.wait_for_load_state("networkidle", timeout=15000)
+            
+            # Try to dismiss cookie consent banners
+            cookie_dismissed = False
+            selector = _first_visible_selector(page, _COOKIE_SELECTORS)
+            if selector is not None:
+                try:
+                    page.locator(selector).first.click(timeout=3000)
+                    logger.info(f"Clicked cookie consent button: {selector} for {url}")
+                    # Wait a bit for the banner to disappear
+                    page.wait_for_timeout(1000)
+                    cookie_dismissed = True
+                except Exception:
+                    pass  # Click failed; carry on with the banner in place
+            
+            if cookie_dismissed:
+                # Wait a bit more for any animations/transitions
                 page.wait_for_timeout(500)
-                
-                # Extract visible content from viewport
-                visible_content = page.evaluate("""
-                    () => {
-                        const viewportHeight = window.innerHeight;
-                        const viewportWidth = window.innerWidth;
-                        const elements = document.querySelectorAll('h1, h2, h3, h4, h5, h6, p, div, span, a, li, td, th, article, main, section');
-                        let textParts = [];
-                        let title = '';
-                        
-                        // Get title
-                        if (document.title) title = document.title;
-                        else {
-                            const h1 = document.querySelector('h1');
-                            if (h1) {
-                                const rect = h1.getBoundingClientRect();
-                                if (rect.top >= 0 && rect.top < viewportHeight && rect.left >= 0 && rect.left < viewportWidth) {
-                                    title = h1.innerText.trim();
-                                }
+                # Re-wait for network idle after dismissing banner
+                try:
+                    page.wait_for_load_state("networkidle", timeout=5000)
+                except Exception:
+                    pass  # Continue even if networkidle times out
+
+            _dismiss_modal_overlays(page)
+            
+            # Scroll down a bit to avoid header/navigation bars (scroll 200px)
+            page.evaluate("window.scrollTo(0, 200)")
+            page.wait_for_timeout(500)  # Wait for scroll to complete
+            
+            # Capture only viewport (visible area), not full page
+            try:
+                page.screenshot(path=str(out_path), full_page=False)
+            except Exception as e:
+                logger.warning(f"Screenshot failed for {url}: {e}")
+            
+            # Extract visible content from the same viewport
+            visible_content = page.evaluate("""
+                () => {
+                    const viewportHeight = window.innerHeight;
+                    const viewportWidth = window.innerWidth;
+                    const selector = 'h1, h2, h3, h4, h5, h6, p, div, span, a, li, td, th, article, main, section';
+                    const elements = document.querySelectorAll(selector);
+                    let textParts = [];
+                    let title = '';
+                    
+                    // Get title
+                    if (document.title) title = document.title;
+                    else {
+                        const h1 = document.querySelector('h1');
+                        if (h1) {
+                            const rect = h1.getBoundingClientRect();
+                            if (rect.top >= 0 && rect.top < viewportHeight && rect.left >= 0 && rect.left < viewportWidth) {
+                                title = h1.innerText.trim();
                             }
                         }
-                        
-                        // Collect visible text elements
-                        const seen = new Set();
-                        for (const el of elements) {
-                            const rect = el.getBoundingClientRect();
-                            // Check if element is visible in viewport (after scrolling 200px)
-                            if (rect.top >= 0 && rect.top < viewportHeight && 
-                                rect.left >= 0 && rect.left < viewportWidth &&
-                                rect.width > 0 && rect.height > 0) {
-                                const text = el.innerText.trim();
-                                if (text && text.length > 5 && !seen.has(text)) {
-                                    // Avoid duplicates by checking if parent is already included
-                                    let isChild = false;
-                                    for (const parent of elements) {
-                                        if (parent !== el && parent.contains(el)) {
-                                            const parentRect = parent.getBoundingClientRect();
-                                            if (parentRect.top >= 0 && parentRect.top < viewportHeight) {
-                                                isChild = true;
-                                                break;
-                                            }
+                    }
+                    
+                    // Collect visible text elements
+                    const seen = new Set();
+                    for (const el of elements) {
+                        const rect = el.getBoundingClientRect();
+                        // Check if element is visible in viewport (after scrolling 200px)
+                        if (rect.top >= 0 && rect.top < viewportHeight && 
+                            rect.left >= 0 && rect.left < viewportWidth &&
+                            rect.width > 0 && rect.height > 0) {
+                            const text = el.innerText.trim();
+                            if (text && text.length > 5 && !seen.has(text)) {
+                                // Avoid duplicates: skip if a matched ancestor starts inside the viewport
+                                // (one walk up the tree instead of scanning every element)
+                                let isChild = false;
+                                for (let parent = el.parentElement; parent; parent = parent.parentElement) {
+                                    if (parent.matches(selector)) {
+                                        const parentRect = parent.getBoundingClientRect();
+                                        if (parentRect.top >= 0 && parentRect.top < viewportHeight) {
+                                            isChild = true;
+                                            break;
                                         }
                                     }
-                                    if (!isChild) {
-                                        seen.add(text);
-                                        textParts.push(text);
-                                    }
+                                }
+                                if (!isChild) {
+                                    seen.add(text);
+                                    textParts.push(text);
                                 }
                             }
                         }
-                        return { title: title, text: textParts.join('\\n\\n').substring(0, 5000) };
                     }
-                """)
-                
-                browser.close()
-                return visible_content.get("title", ""), visible_content.get("text", "")
-        with ThreadPoolExecutor(max_workers=1) as ex:
-            result = ex.submit(_run).result()
-            return result
-    except Exception as e:
-        logger.warning(f"Failed to extract visible viewport content from {url}: {e}")
-        return None, None
-
-
-def _screenshot_url(url: str, out_path: Path) -> bool:
-    try:
-        def _run():
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=True)
-                # Set desktop viewport size (1920x1080 for standard desktop)
-                page = browser.new_page(viewport={"width": 1920, "height": 1080})
-                page.goto(url, wait_until="load", timeout=30000)
-                page.wait_for_load_state("networkidle", timeout=15000)
-                
-                # Try to dismiss cookie consent banners
-                cookie_selectors = [
-                    # Text-based selectors (case-insensitive)
-                    'button:has-text("Accept All Cookies")',
-                    'button:has-text("Accept All")',
-                    'button:has-text("Accept Cookies")',
-                    'button:has-text("I Accept")',
-                    'button:has-text("Accept")',
-                    'button:has-text("Agree")',
-                    'button:has-text("I Agree")',
-                    'a:has-text("Accept All Cookies")',
-                    'a:has-text("Accept All")',
-                    'a:has-text("Accept Cookies")',
-                    # ID and class-based selectors
-                    '#accept-all-cookies',
-                    '#acceptAllCookies',
-                    '#cookie-accept',
-                    '#accept-cookies',
-                    '.accept-all-cookies',
-                    '.acceptAllCookies',
-                    '.cookie-accept',
-                    '.accept-cookies',
-                    '[id*="accept"][id*="cookie"]',
-                    '[class*="accept"][class*="cookie"]',
-                    '[data-testid*="accept"]',
-                    # Common cookie banner button patterns
-                    '[aria-label*="Accept"]',
-                    '[aria-label*="accept"]',
-                ]
-                
-                cookie_dismissed = False
-                for selector in cookie_selectors:
-                    try:
-                        # Try to find and click the button
-                        button = page.locator(selector).first
-                        if button.is_visible(timeout=2000):
-                            button.click(timeout=3000)
-                            logger.info(f"Clicked cookie consent button: {selector} for {url}")
-                            # Wait a bit for the banner to disappear
-                            page.wait_for_timeout(1000)
-                            cookie_dismissed = True
-                            break
-                    except Exception:
-                        # Selector didn't match or click failed, try next
-                        continue
-                
-                if cookie_dismissed:
-                    # Wait a bit more for any animations/transitions
-                    page.wait_for_timeout(500)
-                    # Re-wait for network idle after dismissing banner
-                    try:
-                        page.wait_for_load_state("networkidle", timeout=5000)
-                    except Exception:
-                        pass  # Continue even if networkidle times out
-
-                _dismiss_modal_overlays(page)
-                
-                # Scroll down a bit to avoid header/navigation bars (scroll 200px)
-                page.evaluate("window.scrollTo(0, 200)")
-                page.wait_for_timeout(500)  # Wait for scroll to complete
-                
-                # Capture only viewport (visible area), not full page
-                page.screenshot(path=str(out_path), full_page=False)
-                browser.close()
-        with ThreadPoolExecutor(max_workers=1) as ex:
-            ex.submit(_run).result()
-        return out_path.exists()
+                    return { title: title, text: textParts.join('\\n\\n').substring(0, 5000) };
+                }
+            """)
+            
+            return (
+                out_path.exists(),
+                visible_content.get("title", ""),
+                visible_content.get("text", ""),
+            )
+        finally:
+            context.close()
     except Exception as e:
-        logger.warning(f"Screenshot failed for {url}: {e}")
-        return False
+        logger.warning(f"Failed to capture {url}: {e}")
+        return out_path.exists(), None, None
 
 
 def _build_description(title: str, text: str) -> str:
@@ -378,7 +490,7 @@ def _build_description(title: str, text: str) -> str:
     heading = title or "Visual: Informational Web Page"
     lines.append(f"Heading: {heading}")
     # Extract 2–3 short 'callouts' (first sentences)
-    sentences = re.split(r"(?<=[.!?])\s+", text)
+    sentences = _SENTENCE_SPLIT_RE.split(text)
     callouts = [s.strip() for s in sentences if 30 <= len(s) <= 140][:3]
     if callouts:
         lines.append("Callouts:")
@@ -401,6 +513,39 @@ def _openai_client() -> OpenAI:
     return OpenAI(api_key=settings.openai_api_key)
 
 
+def _cached_url_search(fn: Callable[..., List[str]]) -> Callable[..., List[str]]:
+    """Read-through disk cache for a candidate-URL search, keyed by its arguments.
+
+    Entries expire after ``visual_url_cache_ttl_hours``; empty results (failed or
+    unconfigured searches) are not stored.
+    """
+    @wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> List[str]:
+        ttl = settings.visual_url_cache_ttl_hours * 3600
+        if ttl <= 0:
+            return fn(*args, **kwargs)
+        raw_key = json.dumps(
+            [fn.__name__, settings.openai_model, args, sorted(kwargs.items())], default=list
+        )
+        path = settings.llm_cache_dir / "visual_urls" / f"{_hash(raw_key)}.json"
+        try:
+            if time.time() - path.stat().st_mtime < ttl:
+                urls = json.loads(path.read_text(encoding="utf-8"))
+                logger.info(f"Reusing cached {fn.__name__} results | count={len(urls)}")
+                return urls
+        except (OSError, ValueError):
+            pass
+        urls = fn(*args, **kwargs)
+        if urls:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.stem}.{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(urls), encoding="utf-8")
+            tmp_path.replace(path)
+        return urls
+    return wrapper
+
+
+@_cached_url_search
 def _llm_candidate_urls(topics: Iterable[str], paper_format: str, section: Optional[str], paper_name: str) -> List[str]:
     client = _openai_client()
     topic_str = ", ".join(topics) if topics else "general"
@@ -455,8 +600,8 @@ def _llm_candidate_urls(topics: Iterable[str], paper_format: str, section: Optio
     # Strip code fences if present
     fenced = content.strip()
     if fenced.startswith("```"):
-        fenced = re.sub(r"^```(?:json)?\s*", "", fenced)
-        fenced = re.sub(r"\s*```$", "", fenced)
+        fenced = _FENCE_OPEN_RE.sub("", fenced)
+        fenced = _FENCE_CLOSE_RE.sub("", fenced)
     try:
         data = json.loads(fenced)
         urls = [u for u in data if isinstance(u, str)]
@@ -464,11 +609,100 @@ def _llm_candidate_urls(topics: Iterable[str], paper_format: str, section: Optio
         return urls[:5]
     except Exception:
         # Fallback: extract URLs by regex
-        urls = re.findall(r"https?://[^\s\"'\]]+", content)
+        urls = _URL_RE.findall(content)
         logger.info(f"Extracted URLs via regex: {urls}")
         return urls[:5]
 
 
+# Hosts and URL fragments never used as visual stimuli (matched case-insensitively
+# anywhere in the URL), shared by the Tavily and OpenAI web search filters
+_EXCLUDED_DOMAINS = frozenset({
+    "quora.com",
+    "facebook.com",
+    "instagram.com",
+    "youtube.com",
+    "tiktok.com",
+    "twitter.com",
+    "x.com",
+    "reddit.com",
+    "nytimes.com",
+    "washingtonpost.com",
+    "cnn.com",
+    "exam-papers.com",
+    "pastpapers.com",
+    "exam-mate.com",
+    "cambridge.org",
+    "cie.org.uk",
+    "unacademy.com",
+    "unesco.org",
+    "un.org",
+    "scribd.com",
+    "pinterest.com",
+    "postermywall.com",
+    "arxiv.org",
+    "museumofscience.org",
+    "cookridgeprimary.co.uk",
+    "anaheim.net",
+    # Immigration/visa related domains
+    "ica.gov.sg",
+    "immigration",
+    "visa",
+    "immi.gov",
+    "uscis.gov",
+    "ukvi",
+    "homeoffice.gov",
+})
+
+# Keywords to filter out from URLs (immigration/visa/ads/government related)
+_EXCLUDED_KEYWORDS = frozenset({
+    "visa",
+    "immigration",
+    "immi",
+    "passport",
+    "citizenship",
+    "residency",
+    "work-permit",
+    "green-card",
+    "pr-application",
+    "migrate",
+    "ads",
+    "advertisement",
+    "sponsor",
+    "affiliate",
+    # Government/municipal website patterns
+    "cityof",
+    "city-of",
+    "countyof",
+    "county-of",
+    "stateof",
+    "state-of",
+    "townof",
+    "town-of",
+    "government",
+    "municipal",
+    "council",
+    "public-services",
+    "civic",
+})
+
+# One alternation scans each URL once instead of a substring test per entry
+_EXCLUDED_URL_RE = re.compile(
+    "|".join(re.escape(needle) for needle in sorted(_EXCLUDED_DOMAINS | _EXCLUDED_KEYWORDS)),
+    re.IGNORECASE,
+)
+_GOV_STYLE_TLDS = (".net", ".org", ".us")
+
+
+def _is_excluded_url(url: str) -> bool:
+    """True for PDFs, government sites and URLs matching the excluded domains/keywords."""
+    lower = url.lower()
+    if lower.endswith(".pdf") or ".gov" in lower or _EXCLUDED_URL_RE.search(lower):
+        return True
+    # Government-style .net/.org domains
+    return "city" in lower and any(ext in lower for ext in _GOV_STYLE_TLDS)
+
+
+@_cached_url_search
 def _tavily_urls(topics: Optional[List[str]] = None) -> List[str]:
     """Search Tavily for URLs related to topics, excluding problematic domains. Returns only URLs."""
     if not settings.tavily_api_key:
@@ -492,7 +726,7 @@ def _tavily_urls(topics: Optional[List[str]] = None) -> List[str]:
     }
 
     try:
-        resp = requests.post("https://api.tavily.com/search", json=payload, timeout=20)
+        resp = _SESSION.post("https://api.tavily.com/search", json=payload, timeout=20)
         resp.raise_for_status()
         data = resp.json()
         results = data.get("results", [])
@@ -501,90 +735,10 @@ def _tavily_urls(topics: Optional[List[str]] = None) -> List[str]:
         logger.warning(f"Tavily search failed: {exc}")
         return []
 
-    excluded_domains = [
-        "quora.com",
-        "facebook.com",
-        "instagram.com",
-        "youtube.com",
-        "tiktok.com",
-        "twitter.com",
-        "x.com",
-        "reddit.com",
-        "nytimes.com",
-        "washingtonpost.com",
-        "cnn.com",
-        "exam-papers.com",
-        "pastpapers.com",
-        "exam-mate.com",
-        "cambridge.org",
-        "cie.org.uk",
-        "unacademy.com",
-        "unesco.org",
-        "un.org",
-        "scribd.com",
-        "pinterest.com",
-        "postermywall.com",
-        "arxiv.org",
-        "museumofscience.org",
-        "cookridgeprimary.co.uk"
-        "anaheim.net"
-        # Immigration/visa related domains
-        "ica.gov.sg",
-        "immigration",
-        "visa",
-        "immi.gov",
-        "uscis.gov",
-        "ukvi",
-        "homeoffice.gov",
-    ]
-
-    # Keywords to filter out from URLs (immigration/visa/ads/government related)
-    excluded_keywords = [
-        "visa",
-        "immigration",
-        "immi",
-        "passport",
-        "citizenship",
-        "residency",
-        "work-permit",
-        "green-card",
-        "pr-application",
-        "migrate",
-        "ads",
-        "advertisement",
-        "sponsor",
-        "affiliate",
-        # Government/municipal website patterns
-        "cityof",
-        "city-of",
-        "countyof",
-        "county-of",
-        "stateof",
-        "state-of",
-        "townof",
-        "town-of",
-        "government",
-        "municipal",
-        "council",
-        "public-services",
-        "civic",
-    ]
-
     filtered: List[str] = []
     for url in urls:
-        lower = url.lower()
-        if lower.endswith(".pdf"):
-            continue
-        if any(dom in lower for dom in excluded_domains):
-            continue
-        if any(kw in lower for kw in excluded_keywords):
-            logger.debug(f"Filtered out URL with excluded keyword: {url}")
-            continue
-        if ".gov" in lower:
-            continue
-        # Filter government-style .net/.org domains
-        if "city" in lower and any(ext in lower for ext in [".net", ".org", ".us"]):
-            logger.debug(f"Filtered out government-style URL: {url}")
+        if _is_excluded_url(url):
+            logger.debug(f"Filtered out excluded URL: {url}")
             continue
         filtered.append(url)
 
@@ -602,6 +756,7 @@ def _tavily_urls(topics: Optional[List[str]] = None) -> List[str]:
     return unique_urls
 
 
+@_cached_url_search
 def _openai_web_search_urls(topics: Optional[List[str]] = None) -> List[str]:
     """Search the web using OpenAI's web_search tool to find URLs for visual stimuli.
     Returns a list of URLs suitable for screenshots, excluding problematic domains."""
@@ -683,8 +838,8 @@ def _openai_web_search_urls(topics: Optional[List[str]] = None) -> List[str]:
 
         # Strip code fences if present
         if raw_text.startswith("```"):
-            raw_text = re.sub(r"^```(?:json)?\s*", "", raw_text)
-            raw_text = re.sub(r"\s*```$", "", raw_text)
+            raw_text = _FENCE_OPEN_RE.sub("", raw_text)
+            raw_text = _FENCE_CLOSE_RE.sub("", raw_text)
 
         urls: List[str] = []
         try:
@@ -694,96 +849,13 @@ def _openai_web_search_urls(topics: Optional[List[str]] = None) -> List[str]:
             elif isinstance(parsed, list):
                 urls = [u for u in parsed if isinstance(u, str)]
         except Exception:
-            urls = re.findall(r"https?://[^\s\"'\]]+", raw_text)
+            urls = _URL_RE.findall(raw_text)
 
         # Filter out problematic domains and file types
         filtered_urls = []
-        excluded_domains = [
-            "quora.com",
-            "facebook.com",
-            "instagram.com",
-            "youtube.com",
-            "tiktok.com",
-            "twitter.com",
-            "x.com",
-            "reddit.com",
-            "nytimes.com",
-            "washingtonpost.com",
-            "cnn.com",
-            "exam-papers.com",
-            "pastpapers.com",
-            "exam-mate.com",
-            "cambridge.org",
-            "cie.org.uk",
-            "unacademy.com",
-            "unesco.org",
-            "un.org",
-            "scribd.com",
-            "pinterest.com",
-            "postermywall.com",
-            "arxiv.org",
-            "museumofscience.org",
-            "cookridgeprimary.co.uk",
-            # Immigration/visa related domains
-            "ica.gov.sg",
-            "immigration",
-            "visa",
-            "immi.gov",
-            "uscis.gov",
-            "ukvi",
-            "homeoffice.gov",
-            "anaheim.net",
-        ]
-
-        # Keywords to filter out from URLs (immigration/visa/ads/government related)
-        excluded_keywords = [
-            "visa",
-            "immigration",
-            "immi",
-            "passport",
-            "citizenship",
-            "residency",
-            "work-permit",
-            "green-card",
-            "pr-application",
-            "migrate",
-            "ads",
-            "advertisement",
-            "sponsor",
-            "affiliate",
-            # Government/municipal website patterns
-            "cityof",
-            "city-of",
-            "countyof",
-            "county-of",
-            "stateof",
-            "state-of",
-            "townof",
-            "town-of",
-            "government",
-            "municipal",
-            "council",
-            "public-services",
-            "civic",
-        ]
-
         for url in urls:
-            url_lower = url.lower()
-            if url_lower.endswith(".pdf"):
-                logger.debug(f"Filtered out PDF: {url}")
-                continue
-            if any(excluded in url_lower for excluded in excluded_domains):
-                logger.debug(f"Filtered out excluded domain: {url}")
-                continue
-            if any(kw in url_lower for kw in excluded_keywords):
-                logger.debug(f"Filtered out URL with excluded keyword: {url}")
-                continue
-            if ".gov" in url_lower:
-                logger.debug(f"Filtered out government domain: {url}")
-                continue
-            # Filter government-style .net/.org domains
-            if "city" in url_lower and any(ext in url_lower for ext in [".net", ".org", ".us"]):
-                logger.debug(f"Filtered out government-style URL: {url}")
+            if _is_excluded_url(url):
+                logger.debug(f"Filtered out excluded URL: {url}")
                 continue
             filtered_urls.append(url)
 
@@ -817,14 +889,51 @@ def get_visual(
     def try_urls(candidate_urls: List[str]) -> Tuple[Optional[VisualSnapshot], Optional[str], bool]:
         last_desc: Optional[str] = None
         logger.info(f"Visual search starting | provider={search_provider} | urls={candidate_urls}")
+        # URL probes are independent, so run them all up front instead of one timeout at a time
+        valid_urls = _validate_urls(candidate_urls)
+        usable: List[str] = []
         for url in candidate_urls:
-            logger.info(f"Trying candidate URL: {url}")
-            if not _validate_url(url):
+            if valid_urls.get(url):
+                usable.append(url)
+            else:
                 logger.info(f"URL failed validation: {url}")
-                continue
-            
-            # Extract visible viewport content (matches what's in screenshot)
-            visible_title, visible_text = _extract_visible_viewport_content(url)
+        
+        def _session_paths(url: str) -> Tuple[Path, Path, Path]:
+            out_dir = _ensure_session_dir(_hash(url + str(datetime.utcnow().date())))
+            return out_dir / "screenshot.png", out_dir / "extracted.txt", out_dir / "meta.json"
+        
+        def _start_capture(url: str) -> Optional[Future]:
+            shot, text_out, meta_out = _session_paths(url)
+            if shot.exists() and text_out.exists() and meta_out.exists():
+                return None  # already captured today (the session key includes the date)
+            return _CAPTURE_EXECUTOR.submit(_capture, url, shot)
+        
+        def _cancel_pending(pending: Dict[str, Optional[Future]]) -> None:
+            # Lookahead captures past the one that succeeded are never used; don't let them
+            # hold the shared capture workers (one already loading finishes on its own)
+            for capture in pending.values():
+                if capture is not None:
+                    capture.cancel()
+        
+        # Captures are tried in order, but the next candidates load in the other capture
+        # workers meanwhile, so a failed page does not leave Chromium idle
+        in_flight: Dict[str, Optional[Future]] = {}
+        for index, url in enumerate(usable):
+            for upcoming in usable[index:index + _CAPTURE_WORKERS]:
+                if upcoming not in in_flight:
+                    in_flight[upcoming] = _start_capture(upcoming)
+            logger.info(f"Trying candidate URL: {url}")
+            shot, text_out, meta_out = _session_paths(url)
+            capture = in_flight.pop(url)
+            if capture is None:
+                # Reuse today's capture: skip Chromium
+                ok = True
+                visible_text = text_out.read_text(encoding="utf-8")
+                visible_title = json.loads(meta_out.read_text(encoding="utf-8")).get("title")
+                logger.info(f"Reusing today's capture | url={url}")
+            else:
+                # Screenshot and visible viewport content from a single page load
+                ok, visible_title, visible_text = capture.result()
             if not visible_text:
                 # Fallback to HTML parsing if Playwright extraction fails
                 html = _fetch_html(url)
@@ -843,13 +952,9 @@ def get_visual(
             description = _build_description(visible_title or "Web Page", visible_text)
             last_desc = description
             
-            # Attempt screenshot
-            key = _hash(url + str(datetime.utcnow().date()))
-            out_dir = _ensure_session_dir(key)
-            shot = out_dir / "screenshot.png"
-            text_out = out_dir / "extracted.txt"
             text_out.write_text(visible_text, encoding="utf-8")
-            ok = _screenshot_url(url, shot)
+            if ok:
+                meta_out.write_text(json.dumps({"title": visible_title}), encoding="utf-8")
             logger.info(
                 f"Visual snapshot | url={url} | shot={ok} | visible_text_len={len(visible_text)} | "
                 f"shot_path={shot}"
@@ -864,6 +969,7 @@ def get_visual(
                 created_at=datetime.utcnow(),
             )
             if ok:
+                _cancel_pending(in_flight)
                 return snapshot, description, True
             # else continue to next candidate
             time.sleep(1.0)
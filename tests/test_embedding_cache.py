@@ -0,0 +1,66 @@
+"""Tests for the persistent embedding cache."""
+
+from pathlib import Path
+
+import pytest
+
+from app.config.settings import settings
+from app.services import embedding_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_path(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "embedding_cache_path", tmp_path / "embedding_cache.sqlite3")
+
+
+def test_only_uncached_texts_are_embedded(monkeypatch: pytest.MonkeyPatch):
+    calls = []
+
+    def fake_generate(texts):
+        calls.append(list(texts))
+        return [[float(len(t)), 0.5] for t in texts]
+
+    monkeypatch.setattr(embedding_cache, "generate_embeddings", fake_generate)
+
+    first = embedding_cache.generate_embeddings_cached(["alpha", "beta", "alpha"])
+    second = embedding_cache.generate_embeddings_cached(["beta", "gamma!"])
+
+    assert first == [[5.0, 0.5], [4.0, 0.5], [5.0, 0.5]]
+    assert second == [[4.0, 0.5], [6.0, 0.5]]
+    assert calls == [["alpha", "beta"], ["gamma!"]]
+
+
+def test_cache_is_per_model(monkeypatch: pytest.MonkeyPatch):
+    calls = []
+
+    def fake_generate(texts):
+        calls.append(list(texts))
+        return [[1.0] for _ in texts]
+
+    monkeypatch.setattr(embedding_cache, "generate_embeddings", fake_generate)
+
+    embedding_cache.generate_embeddings_cached(["alpha"])
+    monkeypatch.setattr(settings, "openai_embedding_model", "another-model")
+    embedding_cache.generate_embeddings_cached(["alpha"])
+
+    assert len(calls) == 2
+
+
+def test_completed_batches_survive_a_later_failure(monkeypatch: pytest.MonkeyPatch):
+    calls = []
+
+    def flaky_generate(texts):
+        calls.append(list(texts))
+        if len(calls) == 2:
+            raise RuntimeError("rate limited")
+        return [[1.0] for _ in texts]
+
+    monkeypatch.setattr(embedding_cache, "generate_embeddings", flaky_generate)
+    monkeypatch.setattr(embedding_cache, "EMBEDDING_BATCH_SIZE", 2)
+
+    with pytest.raises(RuntimeError):
+        embedding_cache.generate_embeddings_cached(["a", "b", "c"])
+    embedding_cache.generate_embeddings_cached(["a", "b", "c"])
+
+    # The first batch was stored before the failure, so the retry only embeds "c"
+    assert calls == [["a", "b"], ["c"], ["c"]]
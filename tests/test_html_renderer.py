@@ -8,6 +8,7 @@ from app.services.html_renderer import (
     _build_p1_section_a_html,
     _enhance_section_headers,
     _add_section_styles,
+    _content_to_html,
 )
 
 
@@ -114,6 +115,19 @@ class TestEnhanceSectionHeaders:
         assert "section-header" not in result
 
 
+class TestContentToHtml:
+    """Tests for _content_to_html function."""
+
+    def test_matches_whole_text_conversion(self):
+        content = (
+            "**Section A [10 marks]**\nRead the *passage*.\n\n"
+            "1. one **bold**\n2. two\n\n\n"
+            "READING ALOUD [10 marks]\nText <here>\n"
+        )
+        expected = _enhance_section_headers(_inline_markdown_to_html(content))
+        assert _content_to_html(content) == expected
+
+
 class TestAddSectionStyles:
     """Tests for _add_section_styles function."""
 
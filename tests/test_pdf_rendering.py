@@ -0,0 +1,72 @@
+"""Tests for the ReportLab PDF rendering helpers in the paper generator."""
+
+from pathlib import Path
+from typing import List
+
+import pytest
+from reportlab.platypus import ListFlowable, Table
+
+from app.config.settings import settings
+from app.services import paper_generator
+from app.services.paper_generator import AnswerLines, _bold_markup, _render_pdf, _use_reportlab
+
+
+@pytest.fixture
+def built_story(monkeypatch: pytest.MonkeyPatch) -> List[object]:
+    """Capture the flowables _render_pdf passes to ReportLab instead of laying them out."""
+    story: List[object] = []
+    monkeypatch.setattr(
+        paper_generator.SimpleDocTemplate, "build", lambda self, flowables, *a, **kw: story.extend(flowables)
+    )
+    return story
+
+
+class TestUseReportlab:
+    """Tests for _use_reportlab renderer selection."""
+
+    def test_html_template_by_default(self):
+        assert settings.pdf_renderer == "html"
+        assert _use_reportlab("paper_1", has_visual=False) is False
+        assert _use_reportlab("paper_2", has_visual=False) is False
+
+    def test_reportlab_opt_in_for_plain_papers(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "pdf_renderer", "reportlab")
+        assert _use_reportlab("paper_1", has_visual=False) is True
+        assert _use_reportlab("paper_2", has_visual=False) is True
+
+    def test_visuals_and_oral_keep_html(self, monkeypatch: pytest.MonkeyPatch):
+        monkeypatch.setattr(settings, "pdf_renderer", "reportlab")
+        assert _use_reportlab("paper_1", has_visual=True) is False
+        assert _use_reportlab("oral", has_visual=False) is False
+
+
+class TestBoldMarkup:
+    """Tests for _bold_markup ReportLab markup conversion."""
+
+    def test_escapes_xml_specials(self):
+        assert _bold_markup("x < y & **b**") == "x &lt; y &amp; <b>b</b>"
+
+    def test_stray_marker_left_alone(self):
+        assert _bold_markup("a **b** c **") == "a <b>b</b> c **"
+        assert _bold_markup("Q&A **") == "Q&amp;A **"
+
+
+class TestRenderPdfLayout:
+    """Tests for the story _render_pdf builds."""
+
+    def test_p1_section_a_uses_twelve_line_table(self, built_story: List[object], tmp_path: Path):
+        text = "\n".join(f"{i}. Line {i} of the passage." for i in range(1, 13))
+        _render_pdf(text, tmp_path / "p1a.pdf", paper_format="paper_1", section="section_a")
+
+        tables = [f for f in built_story if isinstance(f, Table)]
+        assert len(tables) == 1
+        assert any(isinstance(f, AnswerLines) for f in built_story)
+        assert not any(isinstance(f, ListFlowable) for f in built_story)
+
+    def test_multi_digit_items_stay_in_one_numbered_list(self, built_story: List[object], tmp_path: Path):
+        text = "\n".join(f"{i}. item {i}" for i in range(1, 11))
+        _render_pdf(text, tmp_path / "list.pdf")
+
+        lists = [f for f in built_story if isinstance(f, ListFlowable)]
+        assert len(lists) == 1
+        assert not any(isinstance(f, paper_generator.Paragraph) and "item 10" in f.getPlainText() for f in built_story)
@@ -1,15 +1,44 @@
 """Tests for RAG (Retrieval-Augmented Generation) service."""
 
 import pytest
+from typing import List, Optional, Sequence, Union
 from unittest.mock import MagicMock, patch
 
 from app.services.rag import (
     RAG_CONFIG,
     build_rag_query,
-    _apply_relevance_scoring,
+    _relevance_score,
+    retrieve_relevant_context,
     format_rag_context,
     get_rag_enhanced_prompt,
+    clear_rag_cache,
 )
+from app.db.supabase import EmbeddingRecord
+
+
+def _records(
+    n: int,
+    *,
+    paper_type: str = "paper_1",
+    section: Optional[str] = None,
+    year: Optional[str] = None,
+    similarity: Union[float, Sequence[float]] = 0.8,
+    content: str = "Reference content",
+) -> List[EmbeddingRecord]:
+    """Build ``n`` search hits; ``similarity`` may give one score per record."""
+    scores = [similarity] * n if isinstance(similarity, float) else list(similarity)
+    return [
+        EmbeddingRecord(
+            id=str(i),
+            content=f"{content} {i}",
+            paper_type=paper_type,
+            section=section,
+            year=year,
+            source_file=f"{year}_{paper_type}_{i}.txt",
+            similarity=scores[i],
+        )
+        for i in range(n)
+    ]
 
 
 class TestBuildRagQuery:
@@ -80,48 +109,47 @@ class TestBuildRagQuery:
         assert "technology" in query.lower()
 
 
-class TestApplyRelevanceScoring:
-    """Tests for _apply_relevance_scoring function."""
+class TestRelevanceScore:
+    """Tests for _relevance_score and the ordering of retrieved chunks."""
+
+    def setup_method(self):
+        clear_rag_cache()
 
     def test_recency_boost(self):
-        chunks = [
-            {"content": "old paper", "year": "2018", "section": None, "paper_type": "paper_1", "similarity": 0.5},
-            {"content": "new paper", "year": "2024", "section": None, "paper_type": "paper_1", "similarity": 0.5},
-        ]
-        scored = _apply_relevance_scoring(chunks, target_section=None, target_paper_format="paper_1")
+        new_score, new_flags = _relevance_score(
+            0.5, "2024", None, "paper_1", target_section=None, target_paper_format="paper_1", recency_cutoff=2020
+        )
+        old_score, old_flags = _relevance_score(
+            0.5, "2018", None, "paper_1", target_section=None, target_paper_format="paper_1", recency_cutoff=2020
+        )
 
         # Recent paper should be boosted
-        new_chunk = next(c for c in scored if c["content"] == "new paper")
-        old_chunk = next(c for c in scored if c["content"] == "old paper")
-
-        assert new_chunk.get("recency_boost") == True
-        assert old_chunk.get("recency_boost") is None or old_chunk.get("recency_boost") == False
-        assert new_chunk["adjusted_similarity"] > old_chunk["adjusted_similarity"]
+        assert "recency_boost" in new_flags
+        assert "recency_boost" not in old_flags
+        assert new_score > old_score
 
     def test_section_match_boost(self):
-        chunks = [
-            {"content": "section a", "year": None, "section": "section_a", "paper_type": "paper_1", "similarity": 0.5},
-            {"content": "section b", "year": None, "section": "section_b", "paper_type": "paper_1", "similarity": 0.5},
-        ]
-        scored = _apply_relevance_scoring(chunks, target_section="section_a", target_paper_format="paper_1")
+        section_a, flags_a = _relevance_score(
+            0.5, None, "section_a", "paper_1", target_section="section_a", target_paper_format="paper_1", recency_cutoff=2020
+        )
+        section_b, _ = _relevance_score(
+            0.5, None, "section_b", "paper_1", target_section="section_a", target_paper_format="paper_1", recency_cutoff=2020
+        )
 
-        section_a = next(c for c in scored if c["content"] == "section a")
-        section_b = next(c for c in scored if c["content"] == "section b")
+        assert "section_match_boost" in flags_a
+        assert section_a > section_b
 
-        assert section_a.get("section_match_boost") == True
-        assert section_a["adjusted_similarity"] > section_b["adjusted_similarity"]
+    @patch("app.services.rag.search_similar_chunks_cascade")
+    @patch("app.services.rag.generate_query_embedding")
+    def test_sorting_by_adjusted_similarity(self, mock_embed, mock_search):
+        mock_embed.return_value = [0.3, 0.4]
+        mock_search.return_value = {1: _records(3, similarity=(0.3, 0.9, 0.6), content="chunk"), 2: [], 3: []}
 
-    def test_sorting_by_adjusted_similarity(self):
-        chunks = [
-            {"content": "low", "year": None, "section": None, "paper_type": "paper_1", "similarity": 0.3},
-            {"content": "high", "year": None, "section": None, "paper_type": "paper_1", "similarity": 0.9},
-            {"content": "mid", "year": None, "section": None, "paper_type": "paper_1", "similarity": 0.6},
-        ]
-        scored = _apply_relevance_scoring(chunks, target_section=None, target_paper_format="paper_1")
+        chunks = retrieve_relevant_context(paper_format="paper_1", topics=("sorting",), limit=3)
 
-        # Should be sorted high to low
-        assert scored[0]["content"] == "high"
-        assert scored[2]["content"] == "low"
+        # Should be sorted high to low, with the boosts recorded on each chunk
+        assert [c["content"] for c in chunks] == ["chunk 1", "chunk 2", "chunk 0"]
+        assert all(c.get("paper_match_boost") for c in chunks)
 
 
 class TestFormatRagContext:
@@ -188,6 +216,9 @@ class TestFormatRagContext:
 class TestGetRagEnhancedPrompt:
     """Tests for get_rag_enhanced_prompt function."""
 
+    def setup_method(self):
+        clear_rag_cache()
+
     @patch("app.services.rag.retrieve_relevant_context")
     def test_no_context_returns_base_prompt(self, mock_retrieve):
         mock_retrieve.return_value = []
@@ -228,6 +259,75 @@ class TestGetRagEnhancedPrompt:
         assert "Reference" in result
         assert "Reference content" in result
 
+    @patch("app.services.rag.search_similar_chunks_cascade")
+    @patch("app.services.rag.generate_query_embedding")
+    def test_retrieval_cached_across_calls(self, mock_embed, mock_search):
+        mock_embed.return_value = [0.1, 0.2]
+        mock_search.return_value = {
+            1: _records(RAG_CONFIG["max_context_chunks"], section="section_b", year="2023"), 2: [], 3: []
+        }
+
+        search_calls = []
+        for topics in (["travel", "health"], ["health", "travel"]):
+            result = get_rag_enhanced_prompt(
+                "Generate a test paper",
+                paper_format="paper_1",
+                section="section_b",
+                topics=topics,
+                difficulty="standard",
+            )
+            assert "Reference content" in result
+            search_calls.append(mock_search.call_count)
+
+        assert mock_embed.call_count == 1
+        assert search_calls == [1, 1]
+
+    @patch("app.services.rag.search_similar_chunks")
+    @patch("app.services.rag.search_similar_chunks_cascade", return_value=None)
+    @patch("app.services.rag.generate_query_embedding")
+    def test_falls_back_when_cascade_missing(self, mock_embed, mock_cascade, mock_search):
+        mock_embed.return_value = [0.5, 0.6]
+        mock_search.return_value = _records(1, section="section_a", year="2021", content="Fallback reference content")
+
+        result = get_rag_enhanced_prompt(
+            "Generate a test paper",
+            paper_format="paper_1",
+            section="section_a",
+            topics=["fallback"],
+            difficulty="standard",
+        )
+
+        assert "Fallback reference content" in result
+        assert mock_cascade.call_count == 1
+        assert mock_search.call_count >= 1
+
+    @patch("app.services.rag.search_similar_chunks_cascade")
+    @patch("app.services.rag.generate_query_embedding")
+    def test_near_duplicate_query_reuses_retrieval(self, mock_embed, mock_search):
+        # Different topics, but the (mocked) query embeddings are identical
+        mock_embed.return_value = [0.3, 0.4]
+        mock_search.return_value = {
+            1: _records(
+                RAG_CONFIG["max_context_chunks"], paper_type="paper_2", section="section_c", year="2022", similarity=0.7
+            ),
+            2: [],
+            3: [],
+        }
+
+        search_calls = []
+        for topics in (["sports"], ["sport"]):
+            get_rag_enhanced_prompt(
+                "Generate a test paper",
+                paper_format="paper_2",
+                section="section_c",
+                topics=topics,
+                difficulty="standard",
+            )
+            search_calls.append(mock_search.call_count)
+
+        assert mock_embed.call_count == 2
+        assert search_calls[1] == search_calls[0]
+
 
 class TestRagConfig:
     """Tests for RAG configuration values."""